@@ -0,0 +1,55 @@
+"""
+Autenticación por usuario y contraseña que trae, en la misma consulta, el
+dispositivo TOTP confirmado del usuario (LEFT JOIN con FilteredRelation).
+LoginForm lo toma de user.otp_device para verificar el código 2FA sin otra
+consulta.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import F, FilteredRelation, Q
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+UserModel = get_user_model()
+
+DEVICE_FIELDS = [field.attname for field in TOTPDevice._meta.concrete_fields if field.attname != "user_id"]
+
+
+def _device_columns():
+    return {f"_otp_{name}": F(f"otp_device__{name}") for name in DEVICE_FIELDS}
+
+
+def _pop_device(user):
+    """Arma el TOTPDevice con las columnas anotadas y las saca del usuario"""
+    values = {name: user.__dict__.pop(f"_otp_{name}") for name in DEVICE_FIELDS}
+    if values["id"] is None:
+        return None
+    device = TOTPDevice(user=user, **values)
+    device._state.adding = False
+    device._state.db = user._state.db
+    return device
+
+
+class LoginBackend(ModelBackend):
+    """ModelBackend con el dispositivo TOTP confirmado precargado en user.otp_device"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = (
+            UserModel._default_manager
+            .annotate(otp_device=FilteredRelation("totpdevice", condition=Q(totpdevice__confirmed=True)))
+            .annotate(**_device_columns())
+            .filter(**{UserModel.USERNAME_FIELD: username})
+            .order_by("_otp_id")
+            .first()
+        )
+        if user is None:
+            # Mismo costo que con un usuario existente, para no revelar cuáles existen (igual que ModelBackend)
+            UserModel().set_password(password)
+            return None
+        user.otp_device = _pop_device(user)
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm, PasswordChangeForm
 from django.contrib.auth import authenticate
+from . import throttle
 from .models import CustomUser
 import pyotp # Necesario para la verificación de OTP, aunque TOTPDevice lo maneja directamente
 
@@ -64,6 +65,11 @@ class LoginForm(forms.Form):
         otp_token = self.cleaned_data.get('otp_token')
         
         if username and password:
+            # Con demasiados fallos recientes se rechaza sin consultar la base
+            if throttle.is_blocked(self.request, username):
+                raise forms.ValidationError("Demasiados intentos fallidos. Esperá unos minutos y volvé a probar.")
+
+            # LoginBackend trae el usuario y su dispositivo TOTP confirmado en una sola consulta
             self.user_cache = authenticate(
                 self.request, 
                 username=username, 
@@ -71,6 +77,7 @@ class LoginForm(forms.Form):
             )
             
             if self.user_cache is None:
+                throttle.register_failure(self.request, username)
                 raise forms.ValidationError("Credenciales inválidas")
             
             if not self.user_cache.is_active:
@@ -82,9 +89,15 @@ class LoginForm(forms.Form):
                     raise forms.ValidationError("Se requiere código 2FA")
                 
                 # Usar django-otp para verificar el token
-                device = self.user_cache.totpdevice_set.filter(confirmed=True).first()
+                if hasattr(self.user_cache, 'otp_device'):
+                    device = self.user_cache.otp_device
+                else:  # autenticado por otro backend
+                    device = self.user_cache.totpdevice_set.filter(confirmed=True).first()
                 if device and not device.verify_token(otp_token):
+                    throttle.register_failure(self.request, username)
                     raise forms.ValidationError("Código 2FA inválido")
+
+            throttle.reset(self.request, username)
         
         return self.cleaned_data
     
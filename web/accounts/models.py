@@ -51,6 +51,11 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            # Autocompletado por prefijo (core/autocomplete.py)
+            models.Index(fields=['first_name'], name='user_first_name_idx'),
+            models.Index(fields=['last_name'], name='user_last_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
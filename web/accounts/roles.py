@@ -0,0 +1,99 @@
+"""
+Rol efectivo y capacidades de un usuario.
+
+get_roles(user) resuelve el rol una sola vez y lo deja guardado en el objeto
+user, así que dura lo que dura el request (request.user) o el update del bot.
+Técnico es quien tiene user_type 'tecnico' o pertenece al grupo "Técnico"; los
+nombres de grupo del usuario se guardan en la caché de Django y se invalidan
+cuando cambian sus grupos (accounts/signals.py). Con eso los chequeos de
+permisos no hacen consultas. Si la caché no es compartida (CACHE_URL sin
+definir) los grupos se leen una vez por request.
+"""
+import re
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from core.cache import is_shared as cache_is_shared
+
+TECNICO_GROUP = re.compile(r"^t[eé]cnico$", re.IGNORECASE)
+MANAGER_TYPES = ("admin", "supervisor")
+CLIENT_MANAGER_TYPES = ("admin", "supervisor", "operador")
+# Estados de tarea reservados a supervisores y administradores
+TECNICO_BLOCKED_STATUSES = ("abierta", "cerrada")
+
+GROUPS_CACHE_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class Roles:
+    user_type: str = ""
+    is_staff: bool = False
+    groups: frozenset = frozenset()
+    authenticated: bool = True
+
+    @property
+    def is_tecnico(self):
+        return self.user_type == "tecnico" or any(TECNICO_GROUP.match(name) for name in self.groups)
+
+    @property
+    def is_manager(self):
+        """Administradores, supervisores y staff: ven y gestionan todas las tareas"""
+        return self.is_staff or self.user_type in MANAGER_TYPES
+
+    @property
+    def can_use_worklog(self):
+        return self.is_manager or self.is_tecnico
+
+    @property
+    def can_edit_work_orders(self):
+        return self.authenticated and not self.is_tecnico
+
+    @property
+    def can_manage_clients(self):
+        return self.user_type in CLIENT_MANAGER_TYPES
+
+    @property
+    def can_delete_clients(self):
+        return self.user_type == "admin"
+
+    def can_use_status(self, status):
+        return not (self.is_tecnico and status in TECNICO_BLOCKED_STATUSES)
+
+
+ANONYMOUS = Roles(authenticated=False)
+
+
+def _groups_key(user_id):
+    return f"roles:groups:{user_id}"
+
+
+def _group_names(user):
+    prefetched = getattr(user, "_prefetched_objects_cache", {})
+    if "groups" in prefetched:
+        return frozenset(group.name for group in prefetched["groups"])
+    if not cache_is_shared():
+        # Con una caché por proceso, invalidate_groups() solo limpiaría el worker que atendió
+        # el cambio y los demás seguirían con el rol viejo: se leen en cada request
+        return frozenset(user.groups.values_list("name", flat=True))
+    key = _groups_key(user.pk)
+    names = cache.get(key)
+    if names is None:
+        names = frozenset(user.groups.values_list("name", flat=True))
+        cache.set(key, names, GROUPS_CACHE_SECONDS)
+    return names
+
+
+def get_roles(user):
+    """Roles del usuario, calculados la primera vez y guardados en el objeto"""
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    roles = getattr(user, "_roles", None)
+    if roles is None:
+        roles = Roles(user_type=user.user_type, is_staff=user.is_staff, groups=_group_names(user))
+        user._roles = roles
+    return roles
+
+
+def invalidate_groups(user_ids):
+    cache.delete_many([_groups_key(user_id) for user_id in user_ids])
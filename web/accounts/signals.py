@@ -0,0 +1,33 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import CustomUser
+from .roles import invalidate_groups
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+def invalidar_grupos_usuario(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalida los grupos cacheados (accounts/roles.py) de los usuarios afectados
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_groups([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        invalidate_groups(pk_set or [])
+    elif action == "pre_clear":
+        # Después del clear ya no se sabe quiénes eran los miembros
+        instance._cleared_user_ids = list(instance.customuser_set.values_list("pk", flat=True))
+    elif action == "post_clear":
+        invalidate_groups(getattr(instance, "_cleared_user_ids", []))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidar_grupo(sender, instance, **kwargs):
+    """
+    Un grupo renombrado o eliminado cambia el rol de todos sus miembros
+    """
+    if instance.pk:
+        invalidate_groups(instance.customuser_set.values_list("pk", flat=True))
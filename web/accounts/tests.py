@@ -1,3 +1,211 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django_otp.oath import totp
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from core.checks import check_login_throttle_cache
+
+from .forms import LoginForm
+from .models import CustomUser
+from .roles import ANONYMOUS, Roles, get_roles
+from .throttle import client_ip
+from .two_factor import qr_svg
+
+
+class ClientIpTests(SimpleTestCase):
+    def request(self, forwarded=None):
+        extra = {'REMOTE_ADDR': '10.0.0.5'}
+        if forwarded is not None:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded
+        return RequestFactory().get('/', **extra)
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_header_is_ignored_without_trusted_proxies(self):
+        self.assertEqual(client_ip(self.request('1.2.3.4')), '10.0.0.5')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_takes_address_added_by_the_proxy(self):
+        # El cliente antepone una IP falsa; el proxy agrega la real al final
+        self.assertEqual(client_ip(self.request('6.6.6.6, 203.0.113.7')), '203.0.113.7')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_counts_proxies_from_the_right(self):
+        self.assertEqual(client_ip(self.request('6.6.6.6, 203.0.113.7, 10.0.0.2')), '203.0.113.7')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_short_header_falls_back_to_remote_addr(self):
+        self.assertEqual(client_ip(self.request('203.0.113.7')), '10.0.0.5')
+        self.assertEqual(client_ip(self.request()), '10.0.0.5')
+
+
+class RolesTests(SimpleTestCase):
+    def test_tecnico_by_type_or_group(self):
+        self.assertTrue(Roles(user_type='tecnico').is_tecnico)
+        self.assertTrue(Roles(user_type='operador', groups=frozenset({'Técnico'})).is_tecnico)
+        self.assertTrue(Roles(groups=frozenset({'TECNICO'})).is_tecnico)
+        self.assertFalse(Roles(user_type='operador', groups=frozenset({'Técnicos de campo'})).is_tecnico)
+
+    def test_managers(self):
+        self.assertTrue(Roles(user_type='supervisor').is_manager)
+        self.assertTrue(Roles(user_type='operador', is_staff=True).is_manager)
+        self.assertFalse(Roles(user_type='operador').is_manager)
+        self.assertTrue(Roles(user_type='tecnico').can_use_worklog)
+        self.assertFalse(Roles(user_type='operador').can_use_worklog)
+
+    def test_capabilities(self):
+        tecnico = Roles(user_type='tecnico')
+        self.assertFalse(tecnico.can_use_status('cerrada'))
+        self.assertTrue(tecnico.can_use_status('en_progreso'))
+        self.assertFalse(tecnico.can_edit_work_orders)
+        self.assertTrue(Roles(user_type='supervisor').can_use_status('cerrada'))
+        self.assertTrue(Roles(user_type='operador').can_manage_clients)
+        self.assertFalse(Roles(user_type='operador').can_delete_clients)
+        self.assertFalse(ANONYMOUS.can_edit_work_orders)
+
+
+class RoleGroupsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.grupo = Group.objects.create(name='Técnico')
+        self.user = CustomUser.objects.create_user('ana', password='x', user_type='operador')
+
+    def fresh_roles(self):
+        # Un objeto nuevo por "request", como request.user
+        return get_roles(CustomUser.objects.get(pk=self.user.pk))
+
+    def test_roles_are_kept_on_the_user_object(self):
+        user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertIs(get_roles(user), get_roles(user))
+        self.assertIs(get_roles(None), ANONYMOUS)
+
+    def test_per_process_cache_reads_groups_every_request(self):
+        self.assertFalse(self.fresh_roles().is_tecnico)
+        # Cambio hecho "en otro worker": no pasa por las señales de este proceso
+        with mock.patch('accounts.signals.invalidate_groups'):
+            self.user.groups.add(self.grupo)
+        self.assertTrue(self.fresh_roles().is_tecnico)
+
+    @mock.patch('accounts.roles.cache_is_shared', return_value=True)
+    def test_shared_cache_avoids_queries(self, _):
+        self.fresh_roles()
+        user = CustomUser.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            get_roles(user)
+
+    @mock.patch('accounts.roles.cache_is_shared', return_value=True)
+    def test_membership_changes_invalidate(self, _):
+        self.assertFalse(self.fresh_roles().is_tecnico)
+        self.user.groups.add(self.grupo)
+        self.assertTrue(self.fresh_roles().is_tecnico)
+        self.grupo.customuser_set.remove(self.user)
+        self.assertFalse(self.fresh_roles().is_tecnico)
+        self.grupo.customuser_set.add(self.user)
+        self.assertTrue(self.fresh_roles().is_tecnico)
+        self.grupo.customuser_set.clear()
+        self.assertFalse(self.fresh_roles().is_tecnico)
+        self.user.groups.add(self.grupo)
+        self.assertTrue(self.fresh_roles().is_tecnico)
+        self.user.groups.clear()
+        self.assertFalse(self.fresh_roles().is_tecnico)
+
+    @mock.patch('accounts.roles.cache_is_shared', return_value=True)
+    def test_group_rename_and_delete_invalidate(self, _):
+        self.user.groups.add(self.grupo)
+        self.assertTrue(self.fresh_roles().is_tecnico)
+        self.grupo.name = 'Ventas'
+        self.grupo.save()
+        self.assertFalse(self.fresh_roles().is_tecnico)
+        self.grupo.name = 'Tecnico'
+        self.grupo.save()
+        self.assertTrue(self.fresh_roles().is_tecnico)
+        self.grupo.delete()
+        self.assertFalse(self.fresh_roles().is_tecnico)
+
+
+class TwoFactorLoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('ana', password='clave-segura', is_2fa_enabled=True)
+        TOTPDevice.objects.create(user=self.user, name='viejo', confirmed=False)
+        self.device = TOTPDevice.objects.create(user=self.user, name='celular', confirmed=True)
+
+    def token(self):
+        device = self.device
+        return f'{totp(device.bin_key, device.step, device.t0, device.digits, device.drift):0{device.digits}d}'
+
+    def login(self, otp_token='', password='clave-segura'):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.5')
+        form = LoginForm({'username': 'ana', 'password': password, 'otp_token': otp_token}, request=request)
+        form.is_valid()
+        return form
+
+    def test_backend_loads_the_confirmed_device(self):
+        with self.assertNumQueries(1):
+            user = authenticate(None, username='ana', password='clave-segura')
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.otp_device.pk, self.device.pk)
+        self.assertEqual(user.otp_device.key, self.device.key)
+        self.assertFalse(any(name.startswith('_otp_') for name in vars(user)))
+
+    def test_user_without_device(self):
+        self.device.delete()
+        user = authenticate(None, username='ana', password='clave-segura')
+        self.assertIsNone(user.otp_device)
+
+    def test_login_requires_a_valid_token(self):
+        self.assertEqual(self.login().non_field_errors(), ['Se requiere código 2FA'])
+        wrong = '000000' if self.token() != '000000' else '111111'
+        self.assertEqual(self.login(wrong).non_field_errors(), ['Código 2FA inválido'])
+        # El dispositivo armado por LoginBackend guarda el fallo (throttling de django-otp)
+        self.device.refresh_from_db()
+        self.assertEqual(self.device.throttling_failure_count, 1)
+
+    def test_login_with_the_current_token(self):
+        form = self.login(self.token())
+        self.assertEqual(form.errors, {})
+        self.assertEqual(form.get_user(), self.user)
+
+    @override_settings(LOGIN_THROTTLE_ATTEMPTS=2)
+    def test_failures_block_even_the_right_password(self):
+        self.login(password='otra')
+        self.login(password='otra')
+        self.assertEqual(self.login(self.token()).non_field_errors(),
+                         ['Demasiados intentos fallidos. Esperá unos minutos y volvé a probar.'])
+
+
+class QrSvgTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create_user('ana', password='x')
+        self.device = TOTPDevice.objects.create(user=user, name='celular', confirmed=False)
+
+    def test_renders_svg_once_per_device_key(self):
+        svg = qr_svg(self.device)
+        self.assertIn('<svg', svg)
+        with mock.patch('accounts.two_factor.qrcode.make') as make:
+            self.assertEqual(qr_svg(self.device), svg)
+            make.assert_not_called()
+
+        other = TOTPDevice.objects.create(user=self.device.user, name='nuevo', confirmed=False)
+        self.assertNotEqual(qr_svg(other), svg)
+
+
+class ThrottleCacheCheckTests(SimpleTestCase):
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    shared = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'}}
+
+    @override_settings(DEBUG=False, CACHES=locmem)
+    def test_warns_with_a_per_process_cache(self):
+        self.assertEqual([w.id for w in check_login_throttle_cache(None)], ['core.W002'])
+
+    @override_settings(DEBUG=False, CACHES=shared)
+    def test_shared_cache_is_fine(self):
+        self.assertEqual(check_login_throttle_cache(None), [])
+
+    @override_settings(DEBUG=False, CACHES=locmem, LOGIN_THROTTLE_ATTEMPTS=0, LOGIN_THROTTLE_IP_ATTEMPTS=0)
+    def test_no_warning_without_limits(self):
+        self.assertEqual(check_login_throttle_cache(None), [])
@@ -0,0 +1,64 @@
+"""
+Límite de intentos fallidos de login, con contadores en la caché de Django.
+
+Se cuenta por usuario y por IP en una ventana de LOGIN_THROTTLE_SECONDS;
+superado LOGIN_THROTTLE_ATTEMPTS (por usuario) o LOGIN_THROTTLE_IP_ATTEMPTS
+(por IP, más alto porque una oficina comparte IP), el formulario rechaza el
+intento antes de autenticar, así que una ráfaga no llega a la base de datos.
+Los contadores necesitan una caché compartida entre workers (CACHE_URL); con
+la caché en memoria del proceso core.W002 avisa que el límite no es global.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def client_ip(request):
+    """
+    IP del cliente. Por defecto REMOTE_ADDR: X-Forwarded-For lo escribe quien quiera.
+    Detrás de TRUSTED_PROXY_COUNT proxies propios se toma la dirección que agregó el
+    más externo de ellos (contando desde la derecha), que el cliente no puede falsear.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR", "")
+    proxies = settings.TRUSTED_PROXY_COUNT
+    if proxies <= 0:
+        return remote_addr
+    forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+    if len(forwarded) < proxies:
+        return remote_addr
+    return forwarded[-proxies]
+
+
+def _limits(request, username):
+    """Clave del contador -> intentos permitidos (0 = sin límite)"""
+    user_hash = hashlib.sha256(username.lower().encode()).hexdigest()[:32]
+    limits = {f"login:fail:user:{user_hash}": settings.LOGIN_THROTTLE_ATTEMPTS}
+    if request is not None:
+        limits[f"login:fail:ip:{client_ip(request)}"] = settings.LOGIN_THROTTLE_IP_ATTEMPTS
+    return limits
+
+
+def _keys(request, username):
+    return list(_limits(request, username))
+
+
+def is_blocked(request, username):
+    limits = _limits(request, username)
+    counts = cache.get_many(list(limits))
+    return any(limits[key] and count >= limits[key] for key, count in counts.items())
+
+
+def register_failure(request, username):
+    for key in _keys(request, username):
+        # add() abre la ventana solo en el primer fallo; incr() no la extiende
+        cache.add(key, 0, settings.LOGIN_THROTTLE_SECONDS)
+        try:
+            cache.incr(key)
+        except ValueError:  # venció entre add() e incr()
+            cache.set(key, 1, settings.LOGIN_THROTTLE_SECONDS)
+
+
+def reset(request, username):
+    # Solo el contador del usuario: la IP puede ser compartida por otros intentos
+    cache.delete(_keys(request, username)[0])
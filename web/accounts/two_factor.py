@@ -0,0 +1,26 @@
+"""
+Código QR para configurar el dispositivo TOTP.
+
+Se genera como SVG (sin Pillow ni PNG en base64) y se cachea por URL de
+configuración: la URL incluye la clave del dispositivo, así que un dispositivo
+nuevo o regenerado obtiene su propio QR y recargar la página no lo vuelve a
+dibujar.
+"""
+import hashlib
+
+import qrcode
+import qrcode.image.svg
+from django.core.cache import cache
+
+QR_CACHE_SECONDS = 15 * 60  # lo que tarda razonablemente un usuario en escanearlo
+
+
+def qr_svg(device):
+    config_url = device.config_url
+    key = f"2fa:qr:{hashlib.sha256(config_url.encode()).hexdigest()}"
+    svg = cache.get(key)
+    if svg is None:
+        image = qrcode.make(config_url, image_factory=qrcode.image.svg.SvgPathImage, box_size=10, border=4)
+        svg = image.to_string(encoding="unicode")
+        cache.set(key, svg, QR_CACHE_SECONDS)
+    return svg
@@ -7,12 +7,12 @@ from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django_otp.plugins.otp_totp.models import TOTPDevice
 from django_otp.util import random_hex # No usado directamente en el código provisto, pero útil para OTP
-import qrcode
-import io
-import base64
 import pyotp # Necesario para la generación de la URL de configuración, aunque TOTPDevice lo maneja
 from .models import CustomUser
+from .roles import get_roles
+from .two_factor import qr_svg
 from .forms import CustomUserCreationForm, ProfileForm, LoginForm, ChangePasswordForm
+from core.db import read_only_view
 
 def login_view(request):
     if request.method == 'POST':
@@ -32,11 +32,16 @@ def logout_view(request):
     return redirect('login')
 
 @login_required
+@read_only_view
 def dashboard(request):
     context = {
         'user': request.user,
         'user_count': CustomUser.objects.count() if request.user.can_manage_users() else None,
     }
+    # Métricas de horas desde los resúmenes diarios (no recorre la tabla de tareas)
+    if get_roles(request.user).can_use_worklog:
+        from worklog.rollups import dashboard_summary
+        context['hours_summary'] = dashboard_summary(request.user)
     return render(request, 'dashboard.html', context)
 
 @login_required
@@ -70,18 +75,6 @@ def setup_2fa(request):
     )
     
     if not device.confirmed:
-        # Generar QR code
-        qr_code_url = device.config_url
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(qr_code_url)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        qr_code_data = base64.b64encode(buffer.getvalue()).decode()
-        
         if request.method == 'POST':
             token = request.POST.get('token')
             if device.verify_token(token):
@@ -95,7 +88,8 @@ def setup_2fa(request):
                 messages.error(request, 'Código inválido')
         
         context = {
-            'qr_code_data': qr_code_data,
+            # SVG cacheado por clave del dispositivo (accounts/two_factor.py)
+            'qr_svg': qr_svg(device),
             'secret_key': device.key, # La clave secreta es útil para depuración o si el usuario no puede escanear el QR
         }
         return render(request, 'accounts/setup_2fa.html', context)
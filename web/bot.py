@@ -9,7 +9,8 @@ import time
 from datetime import timedelta
 from functools import partial
 
-CPU_COUNT = os.cpu_count() or 1
+# Tiempos de arranque (se registran cuando el logging ya está configurado)
+STARTED_AT = time.perf_counter()
 
 # ----------------------------
 # Django setup
@@ -18,13 +19,27 @@ import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "web.settings")
 os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
 django.setup()
+DJANGO_READY_AT = time.perf_counter()
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 
 from django.utils import timezone
-from django.db import connection
+from django.db import connection, close_old_connections
 from django.db import models
 
 from accounts.models import CustomUser
-from worklog.models import WorkLog
+from worklog.models import TranscriptSegment, WorkLog
+from worklog.intervals import find_overlaps, describe_overlaps
+from bot_state import DraftStore, Step, TaskDraft, Transcription
+from bot_outbound import OutboundRateLimiter
+from bot_cards import order_card, task_card
+from bot_callbacks import (
+    CANCELAR, COLABORADOR, COLABORADOR_ELEGIDO, EDITAR, EDITAR_AUDIO, EDITAR_TEXTO, ESTADO, GARANTIA, GUARDAR,
+    NUEVA_TAREA, ORDEN, SUBTIPO, TIPO, VER_ORDEN, VER_TAREA, VOLVER_ORDENES, VOLVER_TAREAS,
+    CallbackRouter, encode, pattern, value_of,
+)
 
 # ----------------------------
 # Telegram (python-telegram-bot v20)
@@ -45,6 +60,7 @@ from telegram.ext import (
     ContextTypes,
     filters,
 )
+IMPORTS_READY_AT = time.perf_counter()
 
 # ----------------------------
 # Logging
@@ -74,81 +90,63 @@ logging.getLogger("telegram.ext").setLevel(logging.ERROR)
 SELECTING_WORK_ORDER, SELECTING_TASK_TYPE, ENTERING_DESCRIPTION, SELECTING_STATUS, ENTERING_DURATION, ASK_COLLABORATOR, SELECTING_COLLABORATOR = range(7)
 
 # ----------------------------
-# faster-whisper (CTranslate2)
+# faster-whisper (CTranslate2); configuración en settings WHISPER_*
 # ----------------------------
-from faster_whisper import WhisperModel
-
-FW_MODEL = None
-
-def get_fw_model() -> WhisperModel:
-    global FW_MODEL
-    if FW_MODEL is None:
-        logger.info("Cargando faster-whisper 'medium' (CPU, int8)…")
-        FW_MODEL = WhisperModel(
-            "medium",
-            device="cpu",
-            compute_type="int8",
-            cpu_threads=CPU_COUNT,
-            num_workers=1
-        )
-        logger.info("Modelo faster-whisper cargado.")
-    return FW_MODEL
+from worklog.transcription import (
+    NO_TEXT_PLACEHOLDER, Segment, TranscriptionConfig, TranscriptionResult, decode_audio, get_model,
+    load_in_background, transcribe,
+)
 
-def _fw_transcribe_sync(audio_path: str) -> str:
-    """
-    Transcripción síncrona con faster-whisper, con logs y fallback sin VAD.
-    """
-    model = get_fw_model()
-
-    def _do_transcribe(vad_enabled: bool):
-        segments, info = model.transcribe(
-            audio_path,
-            language="es",
-            beam_size=1,
-            vad_filter=vad_enabled,
-            condition_on_previous_text=False
-        )
-        parts = [seg.text for seg in segments]
-        text = ("".join(parts)).strip()
-        return text, info
+FW_CONFIG = TranscriptionConfig.from_settings()
 
-    # 1) Con VAD
-    try:
-        text, info = _do_transcribe(vad_enabled=True)
-        logging.getLogger("faster_whisper").info(
-            f"fw: language={getattr(info, 'language', 'n/a')} duration={getattr(info, 'duration', 'n/a')}"
-        )
-        if text:
-            return text
-        logging.getLogger("faster_whisper").warning("fw: texto vacío con VAD; reintento sin VAD…")
-    except Exception as e:
-        logging.getLogger("faster_whisper").error(f"fw: error con VAD: {e}")
+# Se activa cuando el modelo está cargado; los audios que llegan antes esperan acá, en orden
+FW_READY = asyncio.Event()
 
-    # 2) Sin VAD
-    try:
-        text, _ = _do_transcribe(vad_enabled=False)
-        logging.getLogger("faster_whisper").info("fw: reintento sin VAD completado")
-        return text
-    except Exception as e:
-        logging.getLogger("faster_whisper").error(f"fw: error sin VAD: {e}")
-        return ""
+def get_fw_model():
+    return get_model(FW_CONFIG)
 
-async def fw_transcribe_in_executor(audio_path: str) -> str:
+def _fw_transcribe_sync(audio, received_at=None) -> TranscriptionResult:
+    """
+    Transcripción síncrona con faster-whisper, con logs y fallback sin VAD.
+    Acepta una ruta o el audio en memoria (bytes), que se decodifica acá una
+    sola vez: el reintento sin VAD reutiliza el mismo PCM.
+    """
+    if isinstance(audio, (bytes, bytearray)):
+        started = time.perf_counter()
+        audio = decode_audio(audio)
+        logger.info(f"Audio decodificado en memoria en {(time.perf_counter() - started) * 1000:.0f} ms")
+    if received_at is not None:
+        logger.info(f"Transcripción iniciada a {(time.perf_counter() - received_at) * 1000:.0f} ms de recibido el audio")
+    return transcribe(audio, FW_CONFIG)
+
+async def fw_transcribe_in_executor(audio, received_at=None) -> TranscriptionResult:
+    if not FW_READY.is_set():
+        logger.info("Audio en cola hasta que cargue el modelo")
+        await FW_READY.wait()
     loop = asyncio.get_running_loop()
     try:
-        return await loop.run_in_executor(None, partial(_fw_transcribe_sync, audio_path))
+        return await loop.run_in_executor(None, partial(_fw_transcribe_sync, audio, received_at))
     except Exception as e:
         logger.error(f"Error transcribiendo (faster-whisper): {e}")
-        return ""
+        return TranscriptionResult("", 0.0)
+
+def archive_audio(name: str, data: bytes) -> str:
+    """Copia de archivo del audio en el storage de Django; devuelve el nombre con que quedó guardado"""
+    return default_storage.save(name, ContentFile(data))
+
+def read_archived_audio(name: str) -> bytes:
+    with default_storage.open(name, "rb") as f:
+        return f.read()
 
 # ----------------------------
 # Utilidades de DB y helpers
 # ----------------------------
 def ensure_db_connection() -> bool:
     try:
-        if connection.connection is None or not connection.is_usable():
-            connection.close()
-            connection.ensure_connection()
+        # Igual que al inicio de cada request web: descarta la conexión si venció
+        # CONN_MAX_AGE o quedó rota; si sigue sana se reutiliza (CONN_HEALTH_CHECKS)
+        close_old_connections()
+        connection.ensure_connection()
         return True
     except Exception as e:
         logger.error(f"Error al conectar a la base de datos: {e}")
@@ -158,9 +156,7 @@ def get_user_from_chat(chat_id: int):
     max_retries, retry_delay = 3, 1.2
     for attempt in range(max_retries):
         try:
-            if connection.connection is None or not connection.is_usable():
-                connection.close()
-                connection.ensure_connection()
+            close_old_connections()
             return CustomUser.objects.get(telegram_chat_id=chat_id)
         except Exception as e:
             logger.error(f"DB error get_user_from_chat (intento {attempt+1}): {e}")
@@ -174,6 +170,19 @@ def get_user_from_chat(chat_id: int):
             else:
                 return None
 
+# ----------------------------
+# Borrador de la tarea en curso por chat (bot_state.py)
+# ----------------------------
+DRAFTS = DraftStore(settings.BOT_DRAFT_DB, settings.BOT_DRAFT_TTL_HOURS * 3600)
+
+DRAFT_MISSING_TEXT = "⌛ No hay una tarea en curso (venció o ya se guardó). Usá /nueva_tarea para empezar otra."
+STALE_BUTTON_TEXT = "⌛ Este botón es de una versión anterior del bot. Usá /tareas, /ver_OTs o /nueva_tarea para seguir."
+TRANSCRIBING_TEXT = "⏳ Procesando audio… Te aviso cuando esté la transcripción para confirmar y guardar la tarea."
+
+def chat_id_of(update_or_query) -> int:
+    chat = getattr(update_or_query, "effective_chat", None)
+    return chat.id if chat else update_or_query.message.chat.id
+
 def parse_hhmm_to_timedelta(text: str) -> timedelta:
     text = text.strip()
     if ":" in text:
@@ -193,18 +202,16 @@ def parse_hhmm_to_timedelta(text: str) -> timedelta:
 # ----------------------------
 # Helpers de UI (resumen + botones)
 # ----------------------------
-def build_summary_text_and_markup(context: ContextTypes.DEFAULT_TYPE):
-    task_type = context.user_data.get("task_type", "N/A")
-    description = context.user_data.get("description", "N/A")
-    status = context.user_data.get("status", "N/A")
-    duration = context.user_data.get("duration_td", timedelta())
-    work_order = context.user_data.get("work_order")
-    collaborator = context.user_data.get("collaborator")
-    other_task_type = context.user_data.get("other_task_type")
-    general_ops_subtype = context.user_data.get("general_ops_subtype")
-    warranty = context.user_data.get("warranty")
-    field_city = context.user_data.get("field_city")
-    field_km_one_way = context.user_data.get("field_km_one_way")
+def build_summary_text_and_markup(draft: TaskDraft):
+    task_type = draft.task_type or "N/A"
+    description = draft.description or "N/A"
+    status = draft.status or "N/A"
+    duration = timedelta(minutes=draft.duration_minutes)
+    other_task_type = draft.other_task_type
+    general_ops_subtype = draft.general_ops_subtype
+    warranty = draft.warranty
+    field_city = draft.field_city
+    field_km_one_way = draft.field_km_one_way
 
     hours = int(duration.total_seconds() // 3600)
     minutes = int((duration.total_seconds() % 3600) // 60)
@@ -230,15 +237,15 @@ def build_summary_text_and_markup(context: ContextTypes.DEFAULT_TYPE):
         f"📊 <b>Estado:</b> {status}\n"
         f"⏱️ <b>Duración:</b> {duration_str}\n"
     )
-    if work_order:
-        summary += f"📋 <b>Orden de Trabajo:</b> {work_order.numero} - {work_order.titulo}\n"
-    if collaborator:
-        summary += f"👥 <b>Colaborador:</b> {collaborator.get_full_name()}\n"
+    if draft.work_order_label:
+        summary += f"📋 <b>Orden de Trabajo:</b> {draft.work_order_label}\n"
+    if draft.collaborator_name:
+        summary += f"👥 <b>Colaborador:</b> {draft.collaborator_name}\n"
 
     buttons = InlineKeyboardMarkup([
-        [InlineKeyboardButton("💾 Guardar Tarea", callback_data="save_task_direct")],
-        [InlineKeyboardButton("✏️ Editar Transcripción", callback_data="edit_transcription")],
-        [InlineKeyboardButton("❌ Cancelar Tarea", callback_data="cancelar")],
+        [InlineKeyboardButton("💾 Guardar Tarea", callback_data=encode(GUARDAR))],
+        [InlineKeyboardButton("✏️ Editar Transcripción", callback_data=encode(EDITAR))],
+        [InlineKeyboardButton("❌ Cancelar Tarea", callback_data=encode(CANCELAR))],
     ])
     return summary, buttons
 
@@ -255,6 +262,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"Hola {user.get_full_name()} 👷‍♂️\n"
                 f"Usá /tareas para ver tus tareas, /nueva_tarea para crear una o /ver_OTs para ver tus Órdenes de Trabajo."
             )
+            if DRAFTS.get(chat_id):
+                await update.message.reply_text(
+                    "📝 Tenés una tarea sin terminar: seguí desde el último paso o usá /cancel para descartarla."
+                )
         else:
             logger.warning(f"Intento de acceso no autorizado desde chat_id: {chat_id}")
             await update.message.reply_text("🚫 No estás autorizado. Agregá tu chat ID en tu perfil desde la web.")
@@ -294,8 +305,8 @@ async def tareas(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for t in tareas_qs[:25]:
             rol = "👷 Técnico" if t.technician == user else "🤝 Colaborador"
             texto = f"{rol} | {t.start.strftime('%d-%m %H:%M')} | {t.description[:35]}..."
-            buttons.append([InlineKeyboardButton(texto, callback_data=f"ver_tarea:{t.id}")])
-        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data="nueva_tarea_bot")])
+            buttons.append([InlineKeyboardButton(texto, callback_data=encode(VER_TAREA, t.id))])
+        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data=encode(NUEVA_TAREA))])
 
         await update.message.reply_text("📋 Tus tareas activas:", reply_markup=InlineKeyboardMarkup(buttons))
     except Exception as e:
@@ -333,9 +344,9 @@ async def ver_OTs(update: Update, context: ContextTypes.DEFAULT_TYPE):
             rol = "👷 Asignado" if o.asignado_a == user else "🤝 Colaborador"
             emoji = prioridad_emoji.get(o.prioridad, "⚪")
             texto = f"{emoji} {o.numero} | {rol} | {o.titulo[:30]}..."
-            buttons.append([InlineKeyboardButton(texto, callback_data=f"ver_orden:{o.id}")])
+            buttons.append([InlineKeyboardButton(texto, callback_data=encode(VER_ORDEN, o.id))])
 
-        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data="nueva_tarea_bot")])
+        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data=encode(NUEVA_TAREA))])
         await update.message.reply_text("📋 Tus órdenes de trabajo:", reply_markup=InlineKeyboardMarkup(buttons))
     except Exception as e:
         logger.error(f"/ver_OTs error: {e}")
@@ -347,45 +358,14 @@ async def callback_query_router(update: Update, context: ContextTypes.DEFAULT_TY
     try:
         query = update.callback_query
         await query.answer()
-        data = query.data
-
-        if data.startswith("ver_tarea:"):
-            return await show_task_detail(query, context)
-        if data.startswith("ver_orden:"):
-            return await show_work_order_detail(query, context)
-        if data == "nueva_tarea_bot":
-            return await handle_nueva_tarea_direct(query, context)
-
-        if data.startswith("work_order:"):
-            return await handle_work_order_selection_direct(query, context)
-        if data.startswith("task_type:"):
-            return await handle_task_type_selection_direct(query, context)
-        if data.startswith("general_ops_subtype:" ):
-            return await handle_general_ops_subtype(query, context)
-        if data.startswith("warranty:"):
-            return await handle_warranty(query, context)
-        if data.startswith("status_direct:"):
-            return await handle_status_selection_direct(query, context)
-        if data.startswith("colaborador_direct:"):
-            return await handle_collaborator_direct(query, context)
-        if data.startswith("colaborador_select:"):
-            return await handle_collaborator_select_direct(query, context)
-        if data == "save_task_direct":
-            return await save_task_direct(query, context)
-        if data == "edit_transcription":
-            return await edit_transcription_direct(query, context)
-        if data == "edit_transcription_text":
-            return await handle_edit_transcription_text(query, context)
-        if data == "edit_transcription_audio":
-            return await handle_edit_transcription_audio(query, context)
-        if data == "volver_tareas":
-            return await volver_tareas_callback(query, context)
-        if data == "volver_ordenes":
-            return await volver_ordenes_callback(query, context)
-        if data == "cancelar":
-            return await cancel(update, context)
-
-        await query.edit_message_text("❌ Comando no reconocido.")
+
+        route = CALLBACKS.resolve(query.data)
+        if route is None:
+            # Botón de otra versión o mal formado: se rechaza sin consultar la base
+            await query.edit_message_text(STALE_BUTTON_TEXT)
+            return
+        handler, _ = route
+        return await handler(query, context)
     except Exception as e:
         logger.error(f"callback_query_router error: {e}")
         try:
@@ -423,8 +403,8 @@ async def volver_tareas_callback(query, context):
         for t in tareas_qs[:25]:
             rol = "👷 Técnico" if t.technician == user else "🤝 Colaborador"
             texto = f"{rol} | {t.start.strftime('%d-%m %H:%M')} | {t.description[:35]}..."
-            buttons.append([InlineKeyboardButton(texto, callback_data=f"ver_tarea:{t.id}")])
-        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data="nueva_tarea_bot")])
+            buttons.append([InlineKeyboardButton(texto, callback_data=encode(VER_TAREA, t.id))])
+        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data=encode(NUEVA_TAREA))])
 
         await query.edit_message_text("📋 Tus tareas activas:", reply_markup=InlineKeyboardMarkup(buttons))
     except Exception as e:
@@ -460,9 +440,9 @@ async def volver_ordenes_callback(query, context):
             rol = "👷 Asignado" if o.asignado_a == user else "🤝 Colaborador"
             emoji = prioridad_emoji.get(o.prioridad, "⚪")
             texto = f"{emoji} {o.numero} | {rol} | {o.titulo[:30]}..."
-            buttons.append([InlineKeyboardButton(texto, callback_data=f"ver_orden:{o.id}")])
+            buttons.append([InlineKeyboardButton(texto, callback_data=encode(VER_ORDEN, o.id))])
 
-        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data="nueva_tarea_bot")])
+        buttons.append([InlineKeyboardButton("➕ Nueva Tarea", callback_data=encode(NUEVA_TAREA))])
         await query.edit_message_text("📋 Tus órdenes de trabajo:", reply_markup=InlineKeyboardMarkup(buttons))
     except Exception as e:
         logger.error(f"volver_ordenes_callback error: {e}")
@@ -473,50 +453,16 @@ async def show_task_detail(query, context):
         if not ensure_db_connection():
             await query.edit_message_text("❌ Error de conexión. Probá más tarde.")
             return
-        tarea_id = int(query.data.split(":")[1])
-        t = WorkLog.objects.get(id=tarea_id)
-
-        rol = "👷 Técnico Principal"
-        msg = (
-            f"📋 <b>Detalle de Tarea</b>\n\n"
-            f"{rol}\n"
-            f"🧑 Técnico: {t.technician.get_full_name()}\n"
-            f"📆 Inicio: {t.start.strftime('%Y-%m-%d %H:%M')}\n"
-            f"📆 Fin: {t.end.strftime('%Y-%m-%d %H:%M')}\n"
-            f"⏱️ Duración: {t.duration()} hs\n"
-            f"🔧 Tipo: {t.task_type}\n"
-        )
-        # Mostrar subtipo para Operaciones generales
-        if t.task_type == "Operaciones generales" and t.general_ops_subtype:
-            msg += f"⚙️ Subtipo: {t.general_ops_subtype}\n"
-        # Mostrar otro tipo para Otros
-        if t.task_type == "Otros" and t.other_task_type:
-            msg += f"🧩 Otro tipo: {t.other_task_type}\n"
-        # Mostrar garantía para Taller/Campo
-        if t.task_type in ["Taller", "Campo"]:
-            msg += f"🛡️ Garantía: {'Sí' if getattr(t, 'warranty', False) else 'No'}\n"
-        # Mostrar ciudad y km para Campo
-        if t.task_type == "Campo":
-            if t.field_city:
-                msg += f"🏙️ Ciudad: {t.field_city}\n"
-            if t.field_km_one_way is not None:
-                msg += f"🛣️ Km ida: {t.field_km_one_way}\n"
-        msg += (
-            f"📊 Estado: {t.get_status_display()}\n"
-            f"📝 Descripción:\n{t.description}\n"
-        )
-        if t.collaborator:
-            msg += f"👥 Colaborador: {t.collaborator.get_full_name()}\n"
-        if t.work_order:
-            msg += f"📋 Orden de Trabajo: {t.work_order}\n"
+        card = task_card(value_of(query))
+        if card is None:
+            await query.edit_message_text("⚠️ La tarea no existe.")
+            return
 
         buttons = [
-            [InlineKeyboardButton("🔙 Volver a Tareas", callback_data="volver_tareas")],
-            [InlineKeyboardButton("➕ Nueva Tarea", callback_data="nueva_tarea_bot")],
+            [InlineKeyboardButton("🔙 Volver a Tareas", callback_data=encode(VOLVER_TAREAS))],
+            [InlineKeyboardButton("➕ Nueva Tarea", callback_data=encode(NUEVA_TAREA))],
         ]
-        await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup(buttons), parse_mode="HTML")
-    except WorkLog.DoesNotExist:
-        await query.edit_message_text("⚠️ La tarea no existe.")
+        await query.edit_message_text(card.text, reply_markup=InlineKeyboardMarkup(buttons), parse_mode="HTML")
     except Exception as e:
         logger.error(f"show_task_detail error: {e}")
         await query.edit_message_text("❌ Error al mostrar la tarea.")
@@ -526,47 +472,17 @@ async def show_work_order_detail(query, context):
         if not ensure_db_connection():
             await query.edit_message_text("❌ Error de conexión. Probá más tarde.")
             return
+        card = order_card(value_of(query))
+        if card is None:
+            await query.edit_message_text("⚠️ La orden no existe.")
+            return
 
-        from work_order.models import WorkOrder
-        orden_id = int(query.data.split(":")[1])
-        o = WorkOrder.objects.get(id=orden_id)
-
-        tareas_qs = WorkLog.objects.filter(
-            models.Q(work_order=o.numero) | models.Q(work_order_ref=o)
-        ).order_by("-start")
-
-        total_horas = sum([t.duration() for t in tareas_qs]) if tareas_qs.exists() else 0.0
-        prioridad_emoji = {"urgente": "🔴", "alta": "🟠", "media": "🟡", "baja": "🟢"}.get(o.prioridad, "⚪")
-
-        msg = (
-            f"📋 <b>Orden de Trabajo: {o.numero}</b>\n\n"
-            f"📝 <b>Título:</b> {o.titulo}\n"
-            f"🏢 <b>Cliente:</b> {o.cliente}\n"
-            f"{prioridad_emoji} <b>Prioridad:</b> {o.get_prioridad_display()}\n"
-            f"📊 <b>Estado:</b> {o.get_estado_display()}\n"
-            f"👷 <b>Asignado a:</b> {o.asignado_a.get_full_name() if o.asignado_a else 'No asignado'}\n"
-            f"📅 <b>Creación:</b> {o.fecha_creacion.strftime('%d/%m/%Y %H:%M')}\n"
-        )
-        if o.fecha_limite:
-            msg += f"⏰ <b>Fecha límite:</b> {o.fecha_limite.strftime('%d/%m/%Y %H:%M')}\n"
-        if o.descripcion:
-            msg += f"📄 <b>Descripción:</b>\n{o.descripcion}\n\n"
-
-        msg += f"⏱️ <b>Total de horas:</b> {total_horas:.2f} hs\n"
-        msg += f"📋 <b>Tareas asociadas:</b> {tareas_qs.count()}\n"
-
-        buttons = []
-        if tareas_qs.exists():
-            msg += "\n📋 <b>Tareas:</b>\n"
-            for t in tareas_qs[:5]:
-                texto = f"🔧 {t.start.strftime('%d/%m %H:%M')} - {t.description[:25]}..."
-                buttons.append([InlineKeyboardButton(texto, callback_data=f"ver_tarea:{t.id}")])
-
+        buttons = [[InlineKeyboardButton(texto, callback_data=data)] for texto, data in card.buttons]
         buttons.extend([
-            [InlineKeyboardButton("🔙 Volver a Órdenes", callback_data="volver_ordenes")],
-            [InlineKeyboardButton("➕ Nueva Tarea", callback_data="nueva_tarea_bot")],
+            [InlineKeyboardButton("🔙 Volver a Órdenes", callback_data=encode(VOLVER_ORDENES))],
+            [InlineKeyboardButton("➕ Nueva Tarea", callback_data=encode(NUEVA_TAREA))],
         ])
-        await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup(buttons), parse_mode="HTML")
+        await query.edit_message_text(card.text, reply_markup=InlineKeyboardMarkup(buttons), parse_mode="HTML")
     except Exception as e:
         logger.error(f"show_work_order_detail error: {e}")
         await query.edit_message_text("❌ Error al mostrar la orden.")
@@ -581,10 +497,7 @@ async def handle_nueva_tarea_direct(query, context):
             await query.edit_message_text("🚫 No estás autorizado.")
             return
 
-        context.user_data.clear()
-        context.user_data["technician"] = user
-        context.user_data["chat_id"] = chat_id
-
+        DRAFTS.save(TaskDraft(chat_id=chat_id, technician_id=user.id))
         await ask_work_order_selection(query, context)
     except Exception as e:
         logger.error(f"handle_nueva_tarea_direct error: {e}")
@@ -593,17 +506,20 @@ async def handle_nueva_tarea_direct(query, context):
 async def ask_work_order_selection(update_or_query, context):
     try:
         from work_order.models import WorkOrder
-        user = context.user_data.get("technician")
-        assigned_orders = WorkOrder.objects.filter(asignado_a=user).exclude(estado="cerrada")
-        collaborator_orders = WorkOrder.objects.filter(worklogs__collaborator=user).exclude(estado="cerrada").distinct()
+        draft = DRAFTS.get(chat_id_of(update_or_query))
+        if draft is None:
+            return
+        user_id = draft.technician_id
+        assigned_orders = WorkOrder.objects.filter(asignado_a_id=user_id).exclude(estado="cerrada")
+        collaborator_orders = WorkOrder.objects.filter(worklogs__collaborator_id=user_id).exclude(estado="cerrada").distinct()
         available_orders = assigned_orders.union(collaborator_orders)
 
         if available_orders.exists():
-            buttons = [[InlineKeyboardButton("❌ No asociar a ninguna OT", callback_data="work_order:none")]]
+            buttons = [[InlineKeyboardButton("❌ No asociar a ninguna OT", callback_data=encode(ORDEN))]]
             prioridad_emoji = {"urgente": "🔴", "alta": "🟠", "media": "🟡", "baja": "🟢"}
             for o in available_orders[:25]:
                 texto = f"{prioridad_emoji.get(o.prioridad, '⚪')} {o.numero} - {o.titulo[:30]}..."
-                buttons.append([InlineKeyboardButton(texto, callback_data=f"work_order:{o.id}")])
+                buttons.append([InlineKeyboardButton(texto, callback_data=encode(ORDEN, o.id))])
 
             if hasattr(update_or_query, "data"):
                 await update_or_query.edit_message_text(
@@ -616,7 +532,7 @@ async def ask_work_order_selection(update_or_query, context):
                     reply_markup=InlineKeyboardMarkup(buttons),
                 )
         else:
-            context.user_data["work_order"] = None
+            DRAFTS.update(draft.chat_id, step=Step.TASK_TYPE)
             if hasattr(update_or_query, "data"):
                 await update_or_query.edit_message_text("No tenés órdenes disponibles. Continuando sin asociar…")
                 await ask_task_type_selection(update_or_query, context)
@@ -630,19 +546,25 @@ async def ask_work_order_selection(update_or_query, context):
 
 async def handle_work_order_selection_direct(query, context):
     try:
-        if query.data == "work_order:none":
-            context.user_data["work_order"] = None
+        chat_id = query.message.chat.id
+        work_order_id = value_of(query)
+        wo = None
+        if work_order_id is not None:
+            from work_order.models import WorkOrder
+            wo = WorkOrder.objects.filter(id=work_order_id).values("numero", "titulo").first()
+        label = f"{wo['numero']} - {wo['titulo']}" if wo else None
+        draft = DRAFTS.update(
+            chat_id, step=Step.TASK_TYPE, work_order_id=work_order_id if wo else None, work_order_label=label,
+        )
+        if draft is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
+        if work_order_id is None:
             await query.edit_message_text("✅ Continuando sin asociar a ninguna OT.")
+        elif wo:
+            await query.edit_message_text(f"✅ Tarea asociada a: {label}")
         else:
-            from work_order.models import WorkOrder
-            work_order_id = int(query.data.split(":")[1])
-            try:
-                wo = WorkOrder.objects.get(id=work_order_id)
-                context.user_data["work_order"] = wo
-                await query.edit_message_text(f"✅ Tarea asociada a: {wo.numero} - {wo.titulo}")
-            except WorkOrder.DoesNotExist:
-                context.user_data["work_order"] = None
-                await query.edit_message_text("⚠️ Orden no válida. Continuando sin asociar.")
+            await query.edit_message_text("⚠️ Orden no válida. Continuando sin asociar.")
         await ask_task_type_selection(query, context)
     except Exception as e:
         logger.error(f"handle_work_order_selection_direct error: {e}")
@@ -651,12 +573,12 @@ async def handle_work_order_selection_direct(query, context):
 async def ask_task_type_selection(update_or_query, context):
     try:
         buttons = [
-            [InlineKeyboardButton("🏭 Taller", callback_data="task_type:Taller")],
-            [InlineKeyboardButton("🌍 Campo", callback_data="task_type:Campo")],
-            [InlineKeyboardButton("📋 Diligencia", callback_data="task_type:Diligencia")],
-            [InlineKeyboardButton("⚙️ Operaciones generales", callback_data="task_type:Operaciones generales")],
-            [InlineKeyboardButton("🔧 Otros", callback_data="task_type:Otros")],
-            [InlineKeyboardButton("❌ Cancelar Tarea", callback_data="cancelar")],
+            [InlineKeyboardButton("🏭 Taller", callback_data=encode(TIPO, "Taller"))],
+            [InlineKeyboardButton("🌍 Campo", callback_data=encode(TIPO, "Campo"))],
+            [InlineKeyboardButton("📋 Diligencia", callback_data=encode(TIPO, "Diligencia"))],
+            [InlineKeyboardButton("⚙️ Operaciones generales", callback_data=encode(TIPO, "Operaciones generales"))],
+            [InlineKeyboardButton("🔧 Otros", callback_data=encode(TIPO, "Otros"))],
+            [InlineKeyboardButton("❌ Cancelar Tarea", callback_data=encode(CANCELAR))],
         ]
         if hasattr(update_or_query, "data"):
             await update_or_query.edit_message_text("🔧 Seleccioná el tipo de tarea:", reply_markup=InlineKeyboardMarkup(buttons))
@@ -668,27 +590,23 @@ async def ask_task_type_selection(update_or_query, context):
 async def ask_general_ops_subtype(update_or_query, context):
     try:
         buttons = [
-            [InlineKeyboardButton("📦 Mandados/trámites", callback_data="general_ops_subtype:Mandados/tramites")],
-            [InlineKeyboardButton("🗂️ Tareas administrativas", callback_data="general_ops_subtype:Tareas administrativas")],
-            [InlineKeyboardButton("🚗 Movimiento de vehículos", callback_data="general_ops_subtype:Movimiento de vehiculos")],
-            [InlineKeyboardButton("🧹 Limpieza", callback_data="general_ops_subtype:Limpieza")],
-            [InlineKeyboardButton("❌ Cancelar Tarea", callback_data="cancelar")],
+            [InlineKeyboardButton("📦 Mandados/trámites", callback_data=encode(SUBTIPO, "Mandados/tramites"))],
+            [InlineKeyboardButton("🗂️ Tareas administrativas", callback_data=encode(SUBTIPO, "Tareas administrativas"))],
+            [InlineKeyboardButton("🚗 Movimiento de vehículos", callback_data=encode(SUBTIPO, "Movimiento de vehiculos"))],
+            [InlineKeyboardButton("🧹 Limpieza", callback_data=encode(SUBTIPO, "Limpieza"))],
+            [InlineKeyboardButton("❌ Cancelar Tarea", callback_data=encode(CANCELAR))],
         ]
         if hasattr(update_or_query, "data"):
             await update_or_query.edit_message_text("⚙️ Elegí el subtipo de Operaciones generales:", reply_markup=InlineKeyboardMarkup(buttons))
         else:
             await update_or_query.effective_chat.send_message("⚙️ Elegí el subtipo de Operaciones generales:", reply_markup=InlineKeyboardMarkup(buttons))
-        context.user_data["waiting_for_general_ops_subtype"] = True
     except Exception as e:
         logger.error(f"ask_general_ops_subtype error: {e}")
 
 async def handle_general_ops_subtype(query, context):
     try:
-        subtype = query.data.split(":")[1]
-        context.user_data["general_ops_subtype"] = subtype
-        context.user_data["waiting_for_general_ops_subtype"] = False
-        context.user_data["waiting_for_description"] = True
-        await query.edit_message_text(f"✅ Subtipo seleccionado: {subtype}\n📝 Enviá la descripción de la tarea (texto o audio).")
+        subtype = value_of(query)
+        await ask_description(query, f"✅ Subtipo seleccionado: {subtype}\n", general_ops_subtype=subtype)
     except Exception as e:
         logger.error(f"handle_general_ops_subtype error: {e}")
         await query.edit_message_text("❌ Error interno del bot.")
@@ -696,27 +614,28 @@ async def handle_general_ops_subtype(query, context):
 async def ask_warranty(update_or_query, context):
     try:
         buttons = [
-            [InlineKeyboardButton("🛡️ Sí, es garantía", callback_data="warranty:yes")],
-            [InlineKeyboardButton("❌ No", callback_data="warranty:no")],
+            [InlineKeyboardButton("🛡️ Sí, es garantía", callback_data=encode(GARANTIA, True))],
+            [InlineKeyboardButton("❌ No", callback_data=encode(GARANTIA, False))],
         ]
         if hasattr(update_or_query, "data"):
             await update_or_query.edit_message_text("🛡️ ¿La tarea es garantía?", reply_markup=InlineKeyboardMarkup(buttons))
         else:
             await update_or_query.effective_chat.send_message("🛡️ ¿La tarea es garantía?", reply_markup=InlineKeyboardMarkup(buttons))
-        context.user_data["waiting_for_warranty"] = True
     except Exception as e:
         logger.error(f"ask_warranty error: {e}")
 
 async def handle_warranty(query, context):
     try:
-        val = query.data.split(":")[1]
-        context.user_data["warranty"] = (val == "yes")
-        context.user_data["waiting_for_warranty"] = False
-        if context.user_data.get("task_type") == "Campo":
+        chat_id = query.message.chat.id
+        draft = DRAFTS.update(chat_id, warranty=value_of(query))
+        if draft is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
+        if draft.task_type == "Campo":
+            DRAFTS.update(chat_id, step=Step.FIELD_CITY)
             await ask_field_city(query, context)
             return
-        context.user_data["waiting_for_description"] = True
-        await query.edit_message_text("📝 Enviá la descripción de la tarea (texto o audio).")
+        await ask_description(query)
     except Exception as e:
         logger.error(f"handle_warranty error: {e}")
         await query.edit_message_text("❌ Error interno del bot.")
@@ -727,51 +646,90 @@ async def ask_field_city(update_or_query, context):
             await update_or_query.edit_message_text("🏙️ Ingresá la ciudad (Campo):")
         else:
             await update_or_query.effective_chat.send_message("🏙️ Ingresá la ciudad (Campo):")
-        context.user_data["waiting_for_field_city"] = True
     except Exception as e:
         logger.error(f"ask_field_city error: {e}")
 async def handle_task_type_selection_direct(query, context):
     try:
-        task_type_value = query.data.split(":")[1]
-        context.user_data["task_type"] = task_type_value
-        if task_type_value == "Operaciones generales":
-            await ask_general_ops_subtype(query, context)
+        task_type_value = value_of(query)
+        next_step = {
+            "Operaciones generales": Step.GENERAL_OPS_SUBTYPE,
+            "Taller": Step.WARRANTY,
+            "Campo": Step.WARRANTY,
+            "Otros": Step.OTHER_TASK_TYPE,
+        }.get(task_type_value)
+        if next_step is None:
+            await ask_description(query, task_type=task_type_value)
             return
-        if task_type_value in ["Taller", "Campo"]:
-            await ask_warranty(query, context)
+        if DRAFTS.update(query.message.chat.id, task_type=task_type_value, step=next_step) is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
             return
-        if task_type_value == "Otros":
-            context.user_data["waiting_for_other_task_type"] = True
+        if next_step == Step.GENERAL_OPS_SUBTYPE:
+            await ask_general_ops_subtype(query, context)
+        elif next_step == Step.WARRANTY:
+            await ask_warranty(query, context)
+        else:
             await query.edit_message_text("✍️ Escribí el 'Otro tipo' de tarea.")
-            return
-        context.user_data["waiting_for_description"] = True
-        await query.edit_message_text("📝 Enviá la descripción de la tarea (texto o audio).")
     except Exception as e:
         logger.error(f"handle_task_type_selection_direct error: {e}")
         await query.edit_message_text("❌ Error interno del bot.")
 
+def status_markup():
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("⏳ Pendiente", callback_data=encode(ESTADO, "pendiente"))],
+        [InlineKeyboardButton("🔄 En Proceso", callback_data=encode(ESTADO, "en_proceso"))],
+        [InlineKeyboardButton("⏸️ En Espera de Repuestos", callback_data=encode(ESTADO, "en_espera_repuestos"))],
+        [InlineKeyboardButton("✅ Completada", callback_data=encode(ESTADO, "completada"))],
+        [InlineKeyboardButton("❌ Cancelada", callback_data=encode(ESTADO, "cancelada"))],
+        [InlineKeyboardButton("❌ Cancelar Tarea", callback_data=encode(CANCELAR))],
+    ])
+
+async def ask_description(update_or_query, prefix="", **changes):
+    """
+    Guarda los cambios del paso actual y pide la descripción. Si el técnico ya
+    mandó un audio en un paso anterior, ese audio es la descripción (su
+    transcripción viene corriendo en segundo plano desde que llegó) y se pasa
+    directo al estado. Devuelve el borrador, o None si ya no existe.
+    """
+    chat_id = chat_id_of(update_or_query)
+    draft = DRAFTS.update(chat_id, **changes)
+    if draft is None:
+        text = DRAFT_MISSING_TEXT
+        if hasattr(update_or_query, "data"):
+            await update_or_query.edit_message_text(text)
+        else:
+            await update_or_query.effective_chat.send_message(text)
+        return None
+    if draft.audio_file:
+        draft = DRAFTS.update(chat_id, step=Step.STATUS)
+        note = "se está transcribiendo" if draft.transcribing else "ya está transcripto"
+        text = f"{prefix}🎵 Uso como descripción el audio que mandaste ({note}).\n📊 Seleccioná el estado de la tarea:"
+        markup = status_markup()
+    else:
+        draft = DRAFTS.update(chat_id, step=Step.DESCRIPTION)
+        text, markup = f"{prefix}📝 Enviá la descripción de la tarea (texto o audio).", None
+    if hasattr(update_or_query, "data"):
+        await update_or_query.edit_message_text(text, reply_markup=markup)
+    else:
+        await update_or_query.effective_chat.send_message(text, reply_markup=markup)
+    return draft
+
 async def ask_status_direct(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        buttons = [
-            [InlineKeyboardButton("⏳ Pendiente", callback_data="status_direct:pendiente")],
-            [InlineKeyboardButton("🔄 En Proceso", callback_data="status_direct:en_proceso")],
-            [InlineKeyboardButton("⏸️ En Espera de Repuestos", callback_data="status_direct:en_espera_repuestos")],
-            [InlineKeyboardButton("✅ Completada", callback_data="status_direct:completada")],
-            [InlineKeyboardButton("❌ Cancelada", callback_data="status_direct:cancelada")],
-            [InlineKeyboardButton("❌ Cancelar Tarea", callback_data="cancelar")],
-        ]
-        await update.message.reply_text("📊 Seleccioná el estado de la tarea:", reply_markup=InlineKeyboardMarkup(buttons))
+        await update.message.reply_text("📊 Seleccioná el estado de la tarea:", reply_markup=status_markup())
     except Exception as e:
         logger.error(f"ask_status_direct error: {e}")
         await update.message.reply_text("❌ Error interno del bot.")
 
 async def handle_status_selection_direct(query, context):
     try:
-        status_value = query.data.split(":")[1]
-        context.user_data["status"] = status_value
-        await query.edit_message_text(f"✅ Estado seleccionado: {status_value}")
-        context.user_data["waiting_for_duration"] = True
-        await query.edit_message_text("⏱️ ¿Cuánto tiempo duró la tarea? (ej: 2:30, 0:20, 10:50)")
+        status_value = value_of(query)
+        if DRAFTS.update(query.message.chat.id, status=status_value, step=Step.DURATION) is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
+        # Un solo envío: la confirmación se reemplazaba enseguida por la pregunta
+        await query.edit_message_text(
+            f"✅ Estado seleccionado: {status_value}\n⏱️ ¿Cuánto tiempo duró la tarea? (ej: 2:30, 0:20, 10:50)"
+        )
     except Exception as e:
         logger.error(f"handle_status_selection_direct error: {e}")
         await query.edit_message_text("❌ Error interno del bot.")
@@ -779,8 +737,8 @@ async def handle_status_selection_direct(query, context):
 async def ask_collaborator_direct(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         buttons = [
-            [InlineKeyboardButton("❌ No agregar colaborador", callback_data="colaborador_direct:none")],
-            [InlineKeyboardButton("✅ Sí, agregar colaborador", callback_data="colaborador_direct:yes")],
+            [InlineKeyboardButton("❌ No agregar colaborador", callback_data=encode(COLABORADOR, False))],
+            [InlineKeyboardButton("✅ Sí, agregar colaborador", callback_data=encode(COLABORADOR, True))],
         ]
         await update.message.reply_text("👥 ¿Querés agregar un colaborador a esta tarea?", reply_markup=InlineKeyboardMarkup(buttons))
     except Exception as e:
@@ -789,28 +747,20 @@ async def ask_collaborator_direct(update: Update, context: ContextTypes.DEFAULT_
 
 async def handle_collaborator_direct(query, context):
     try:
-        if query.data == "colaborador_direct:none":
-            context.user_data["collaborator"] = None
-            # Si la transcripción no está lista, NO mostrar resumen ni botones; avisar y esperar
-            if context.user_data.get("pending_transcription"):
-                context.user_data["awaiting_transcription_for_summary"] = True
-                await query.edit_message_text("⏳ Procesando audio… Te aviso cuando esté la transcripción para confirmar y guardar la tarea.")
-                return
-            # Si ya está lista, mostrar resumen con botones
-            return await show_task_summary_direct(query, context)
+        draft = DRAFTS.get(query.message.chat.id)
+        if draft is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
+        if not value_of(query):
+            return await show_task_summary_direct(query, collaborator_id=None, collaborator_name=None)
 
-        tecnicos = CustomUser.objects.filter(user_type="tecnico").exclude(id=context.user_data["technician"].id)
+        tecnicos = CustomUser.objects.filter(user_type="tecnico").exclude(id=draft.technician_id)
         if not tecnicos.exists():
-            context.user_data["collaborator"] = None
-            if context.user_data.get("pending_transcription"):
-                context.user_data["awaiting_transcription_for_summary"] = True
-                await query.edit_message_text("⏳ Procesando audio… Te aviso cuando esté la transcripción para confirmar y guardar la tarea.")
-                return
-            return await show_task_summary_direct(query, context)
+            return await show_task_summary_direct(query, collaborator_id=None, collaborator_name=None)
 
-        buttons = [[InlineKeyboardButton(f"👷 {t.get_full_name()}", callback_data=f"colaborador_select:{t.id}")]
+        buttons = [[InlineKeyboardButton(f"👷 {t.get_full_name()}", callback_data=encode(COLABORADOR_ELEGIDO, t.id))]
                    for t in tecnicos[:10]]
-        buttons.append([InlineKeyboardButton("❌ Cancelar", callback_data="cancelar")])
+        buttons.append([InlineKeyboardButton("❌ Cancelar", callback_data=encode(CANCELAR))])
 
         await query.edit_message_text("👥 Seleccioná el colaborador:", reply_markup=InlineKeyboardMarkup(buttons))
     except Exception as e:
@@ -819,33 +769,34 @@ async def handle_collaborator_direct(query, context):
 
 async def handle_collaborator_select_direct(query, context):
     try:
-        collaborator_id = int(query.data.split(":")[1])
+        if DRAFTS.get(query.message.chat.id) is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
+        collaborator_id = value_of(query)
         colab = CustomUser.objects.filter(id=collaborator_id, user_type="tecnico").first()
         if colab:
-            context.user_data["collaborator"] = colab
             await query.edit_message_text(f"✅ Colaborador seleccionado: {colab.get_full_name()}")
+            # El borrador se vuelve a leer después del await: la transcripción pudo terminar mientras tanto
+            await show_task_summary_direct(query, collaborator_id=colab.id, collaborator_name=colab.get_full_name())
         else:
-            context.user_data["collaborator"] = None
             await query.edit_message_text("❌ Técnico no encontrado. Continuando sin colaborador.")
-        # Gate por transcripción
-        if context.user_data.get("pending_transcription"):
-            context.user_data["awaiting_transcription_for_summary"] = True
-            await query.edit_message_text("⏳ Procesando audio… Te aviso cuando esté la transcripción para confirmar y guardar la tarea.")
-            return
-        await show_task_summary_direct(query, context)
+            await show_task_summary_direct(query, collaborator_id=None, collaborator_name=None)
     except Exception as e:
         logger.error(f"handle_collaborator_select_direct error: {e}")
         await query.edit_message_text("❌ Error interno del bot.")
 
-async def show_task_summary_direct(query, context):
+async def show_task_summary_direct(query, **changes):
+    """Pasa el borrador al resumen; si el audio todavía se transcribe, el resumen llega al terminar"""
     try:
-        # Si todavía transcribe, gatear
-        if context.user_data.get("pending_transcription"):
-            context.user_data["awaiting_transcription_for_summary"] = True
-            await query.edit_message_text("⏳ Procesando audio… Te aviso cuando esté la transcripción para confirmar y guardar la tarea.")
+        draft = DRAFTS.update(query.message.chat.id, step=Step.SUMMARY, **changes)
+        if draft is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
+        if draft.transcribing:
+            await query.edit_message_text(TRANSCRIBING_TEXT)
             return
 
-        summary, buttons = build_summary_text_and_markup(context)
+        summary, buttons = build_summary_text_and_markup(draft)
         await query.edit_message_text(summary, reply_markup=buttons, parse_mode="HTML")
     except Exception as e:
         logger.error(f"show_task_summary_direct error: {e}")
@@ -857,55 +808,71 @@ async def save_task_direct(query, context):
             await query.edit_message_text("❌ Error de conexión a DB. No se pudo guardar.")
             return ConversationHandler.END
 
-        user = context.user_data["technician"]
-        end_time = timezone.now()
-        duration_td = context.user_data.get("duration_td", timedelta())
-        start_time = end_time - duration_td
-        task_type = context.user_data["task_type"]
-        status_value = context.user_data.get("status", "pendiente")
-        collaborator = context.user_data.get("collaborator")
-        work_order = context.user_data.get("work_order")
-        audio_file_relative = context.user_data.get("audio_file_relative")
+        chat_id = query.message.chat.id
+        draft = DRAFTS.get(chat_id)
+        if draft is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return ConversationHandler.END
 
         # A esta altura, como gateamos, no debería quedar pendiente, pero por seguridad:
-        if context.user_data.get("pending_transcription"):
+        if draft.transcribing:
             await query.edit_message_text("⏳ Aún estamos transcribiendo el audio. Te muestro los botones cuando termine.")
-            context.user_data["awaiting_transcription_for_summary"] = True
             return ConversationHandler.END
 
-        final_description = context.user_data.get("description", "")
+        user = get_user_from_chat(chat_id)
+        if not user or user.id != draft.technician_id:
+            await query.edit_message_text("🚫 No estás autorizado.")
+            return ConversationHandler.END
 
-        work_order_value = work_order.numero if work_order else None
-        work_order_ref = work_order if work_order else None
+        from work_order.models import WorkOrder
+        end_time = timezone.now()
+        start_time = end_time - timedelta(minutes=draft.duration_minutes)
+        task_type = draft.task_type
+        final_description = draft.description
+        # La OT pudo haberse borrado mientras el borrador esperaba
+        work_order_value = (
+            WorkOrder.objects.filter(id=draft.work_order_id).values_list("numero", flat=True).first()
+            if draft.work_order_id else None
+        )
 
         # Crear la tarea
         worklog = WorkLog.objects.create(
             technician=user,
-            collaborator=collaborator,
+            collaborator_id=draft.collaborator_id,
             start=start_time,
             end=end_time,
             task_type=task_type,
-            other_task_type=context.user_data.get("other_task_type") if task_type == "Otros" else None,
-            general_ops_subtype=context.user_data.get("general_ops_subtype") if task_type == "Operaciones generales" else None,
-            warranty=context.user_data.get("warranty", False) if task_type in ["Taller", "Campo"] else False,
-            field_city=context.user_data.get("field_city") if task_type == "Campo" else None,
-            field_km_one_way=context.user_data.get("field_km_one_way") if task_type == "Campo" else None,
+            other_task_type=draft.other_task_type if task_type == "Otros" else None,
+            general_ops_subtype=draft.general_ops_subtype if task_type == "Operaciones generales" else None,
+            warranty=bool(draft.warranty) if task_type in ["Taller", "Campo"] else False,
+            field_city=draft.field_city if task_type == "Campo" else None,
+            field_km_one_way=draft.field_km_one_way if task_type == "Campo" else None,
             description=final_description,
-            status=status_value,
+            status=draft.status or "pendiente",
             work_order=work_order_value,
-            work_order_ref=work_order_ref,
+            work_order_ref_id=draft.work_order_id if work_order_value else None,
             created_by=user,
-            audio_file=audio_file_relative if audio_file_relative else None,
+            audio_file=draft.audio_file or None,
         )
+        if draft.audio_file and draft.segments:
+            TranscriptSegment.replace_for({worklog.id: [Segment.from_list(segment) for segment in draft.segments]})
+        # Guardada la tarea, el borrador ya no sirve (evita duplicados si se toca "Guardar" dos veces)
+        DRAFTS.delete(chat_id)
 
         # Log de actividad del usuario
         logger.info(f"Usuario {user.get_full_name()} ({user.username}) creó tarea #{worklog.id}: {task_type} - {final_description[:50]}...")
-        if work_order:
-            logger.info(f"Tarea #{worklog.id} asociada a OT: {work_order.numero}")
+        if work_order_value:
+            logger.info(f"Tarea #{worklog.id} asociada a OT: {work_order_value}")
 
         msg = "✅ Tarea registrada correctamente."
-        if work_order:
-            msg += f"\n📋 Asociada a: {work_order.numero} - {work_order.titulo}"
+        if work_order_value:
+            msg += f"\n📋 Asociada a: {draft.work_order_label}"
+
+        # El horario del bot se calcula hacia atrás desde ahora: no se bloquea, solo se avisa
+        overlapping = find_overlaps(user.id, start_time, end_time, exclude_id=worklog.id)
+        if overlapping.exists():
+            logger.warning(f"Tarea #{worklog.id} se superpone con otras tareas de {user.username}")
+            msg += f"\n⚠️ El horario se superpone con: {describe_overlaps(overlapping)}. Revisalo desde la web."
         await query.edit_message_text(msg)
         return ConversationHandler.END
     except Exception as e:
@@ -915,33 +882,40 @@ async def save_task_direct(query, context):
 
 async def edit_transcription_direct(query, context):
     try:
-        audio_file_relative = context.user_data.get("audio_file_relative")
-        if audio_file_relative:
+        draft = DRAFTS.get(query.message.chat.id)
+        if draft is None:
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
+        if draft.audio_file:
             await query.edit_message_text(
                 "📝 ¿Querés editar la transcripción? (Texto o Audio)",
                 reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("Texto", callback_data="edit_transcription_text")],
-                    [InlineKeyboardButton("Audio", callback_data="edit_transcription_audio")],
-                    [InlineKeyboardButton("❌ Cancelar", callback_data="cancelar")],
+                    [InlineKeyboardButton("Texto", callback_data=encode(EDITAR_TEXTO))],
+                    [InlineKeyboardButton("Audio", callback_data=encode(EDITAR_AUDIO))],
+                    [InlineKeyboardButton("❌ Cancelar", callback_data=encode(CANCELAR))],
                 ])
             )
         else:
             await query.edit_message_text(
                 "📝 ¿Querés editar la transcripción? (Texto)",
                 reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("Texto", callback_data="edit_transcription_text")],
-                    [InlineKeyboardButton("❌ Cancelar", callback_data="cancelar")],
+                    [InlineKeyboardButton("Texto", callback_data=encode(EDITAR_TEXTO))],
+                    [InlineKeyboardButton("❌ Cancelar", callback_data=encode(CANCELAR))],
                 ])
             )
     except Exception as e:
         logger.error(f"edit_transcription_direct error: {e}")
         await query.edit_message_text("❌ Error interno del bot.")
 
+def set_draft_step(chat_id: int, step: Step) -> bool:
+    """Vuelve el borrador a un paso; una transcripción en curso deja de aplicarse"""
+    return DRAFTS.update(chat_id, step=step, transcription=Transcription.NONE) is not None
+
 async def handle_edit_transcription_text(query, context):
     try:
-        context.user_data["waiting_for_description"] = True
-        context.user_data["transcription_complete"] = False
-        context.user_data["pending_transcription"] = False
+        if not set_draft_step(query.message.chat.id, Step.DESCRIPTION):
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
         await query.edit_message_text("📝 Escribí la nueva descripción de la tarea (texto).", reply_markup=ReplyKeyboardRemove())
     except Exception as e:
         logger.error(f"handle_edit_transcription_text error: {e}")
@@ -949,9 +923,9 @@ async def handle_edit_transcription_text(query, context):
 
 async def handle_edit_transcription_audio(query, context):
     try:
-        context.user_data["waiting_for_description"] = True
-        context.user_data["transcription_complete"] = False
-        context.user_data["pending_transcription"] = False
+        if not set_draft_step(query.message.chat.id, Step.DESCRIPTION):
+            await query.edit_message_text(DRAFT_MISSING_TEXT)
+            return
         await query.edit_message_text("🎵 Enviá el nuevo audio de la tarea.", reply_markup=ReplyKeyboardRemove())
     except Exception as e:
         logger.error(f"handle_edit_transcription_audio error: {e}")
@@ -963,154 +937,201 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.callback_query.edit_message_text("❌ Operación cancelada.")
         else:
             await update.message.reply_text("❌ Operación cancelada.")
-        context.user_data.clear()
+        DRAFTS.delete(update.effective_chat.id)
         return ConversationHandler.END
     except Exception as e:
         logger.error(f"cancel error: {e}")
         return ConversationHandler.END
 
+async def cancel_callback(query, context):
+    try:
+        await query.edit_message_text("❌ Operación cancelada.")
+        DRAFTS.delete(query.message.chat.id)
+    except Exception as e:
+        logger.error(f"cancel_callback error: {e}")
+
 # ----------------------------
 # Entrada de mensajes (texto/voz) para flujo directo y edición
 # ----------------------------
+async def transcribe_draft_audio(bot, chat_id: int, audio_name: str, data: bytes = None, received_at: float = None):
+    """
+    Transcribe el audio del borrador en segundo plano. Con el audio en memoria,
+    la copia al storage se escribe en paralelo con la transcripción y el nombre
+    definitivo (por contenido, core/storage.py) se anota en el borrador apenas
+    queda archivada: si el bot se reinicia antes de terminar, la transcripción
+    se retoma leyendo esa copia. Si mientras tanto el borrador se canceló, se
+    guardó o se reemplazó la descripción, el texto se descarta. Si el técnico ya
+    llegó al resumen, se le envía al terminar.
+    """
+    def waiting_for(name):
+        return lambda current: current.audio_file == name and current.transcribing
+
+    stored_name = audio_name
+    if data is None:
+        try:
+            data = await asyncio.to_thread(read_archived_audio, audio_name)
+        except Exception as e:
+            logger.error(f"No se pudo leer el audio archivado {audio_name}: {e}")
+            data = b""
+            stored_name = None  # la tarea no puede quedar apuntando a un archivo que no está
+        result = await fw_transcribe_in_executor(data, received_at) if data else TranscriptionResult("", 0.0)
+    else:
+        transcription = asyncio.create_task(fw_transcribe_in_executor(data, received_at)) if data else None
+        try:
+            stored_name = await asyncio.to_thread(archive_audio, audio_name, data)
+        except Exception as e:
+            # La tarea se puede guardar igual, sin el audio adjunto
+            logger.error(f"No se pudo archivar el audio {audio_name}: {e}")
+            stored_name = None
+        if stored_name and DRAFTS.update(chat_id, when=waiting_for(audio_name), audio_file=stored_name):
+            audio_name = stored_name
+        result = await transcription if transcription else TranscriptionResult("", 0.0)
+    text = result.text
+
+    draft = DRAFTS.update(
+        chat_id,
+        when=waiting_for(audio_name),
+        audio_file=stored_name,
+        transcription=Transcription.DONE,
+        description=text or NO_TEXT_PLACEHOLDER,
+        segments=[segment.as_list() for segment in result.segments] if text else [],
+    )
+    if draft is None:
+        return
+    try:
+        if text:
+            await bot.send_message(chat_id, f"📝 Transcripción lista:\n{text}")
+        else:
+            await bot.send_message(
+                chat_id,
+                "⚠️ No se detectó texto en el audio.\n"
+                f"(archivo: {os.path.basename(audio_name)}, tamaño: {len(data)} bytes)\n"
+                "Tip: hablá más cerca del micrófono o en un ambiente sin ruido."
+            )
+        # Si estábamos esperando para mostrar la última pregunta, enviarla ahora:
+        if draft.step == Step.SUMMARY:
+            summary, buttons = build_summary_text_and_markup(draft)
+            await bot.send_message(chat_id, summary, reply_markup=buttons, parse_mode="HTML")
+    except Exception as e:
+        logger.error(f"transcribe_draft_audio error: {e}")
+
+# Pasos previos a la descripción: un audio mandado acá se usa como descripción al llegar a ese paso
+EARLY_AUDIO_STEPS = {
+    Step.WORK_ORDER, Step.TASK_TYPE, Step.OTHER_TASK_TYPE, Step.GENERAL_OPS_SUBTYPE,
+    Step.WARRANTY, Step.FIELD_CITY, Step.FIELD_KM,
+}
+
+async def receive_voice(update: Update, context: ContextTypes.DEFAULT_TYPE, **changes):
+    """
+    Descarga el audio y deja el borrador transcribiéndolo en segundo plano (más
+    los cambios indicados, p. ej. el paso). Descarga en memoria con el cliente
+    HTTP compartido del bot; el transcriptor recibe el PCM decodificado y la
+    copia en disco se escribe en paralelo. Devuelve el borrador, o None si se
+    canceló durante la descarga.
+    """
+    received_at = time.perf_counter()
+    audio_file = await context.bot.get_file(update.message.voice.file_id)
+    data = bytes(await audio_file.download_as_bytearray())
+    # Identifica el audio en el borrador hasta que se archiva; el id del mensaje no se repite en el chat
+    rel_path = f"worklog_audios/audio_{update.effective_chat.id}_{update.message.message_id}.ogg"
+    logger.info(f"Audio descargado: {len(data)} bytes en {(time.perf_counter() - received_at) * 1000:.0f} ms")
+    if not data:
+        await update.message.reply_text("⚠️ El audio parece estar vacío (0 bytes).")
+
+    # Se aplica sobre el borrador guardado: durante la descarga pudo cambiar (o cancelarse)
+    draft = DRAFTS.update(
+        update.effective_chat.id, audio_file=rel_path, transcription=Transcription.PENDING,
+        description="[Audio adjunto - Transcribiendo…]", segments=[], **changes,
+    )
+    if draft is None:
+        return None
+    asyncio.create_task(transcribe_draft_audio(context.bot, draft.chat_id, rel_path, data, received_at))
+    return draft
+
 async def handle_text_or_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    Único handler para texto y audio.
-    Flags:
-      - waiting_for_description
-      - waiting_for_duration
-      - pending_transcription
-      - awaiting_transcription_for_summary
+    Único handler para texto y audio: lo que se espera depende del paso del
+    borrador del chat (bot_state.Step).
     """
     try:
+        chat_id = update.effective_chat.id
+        draft = DRAFTS.get(chat_id)
+        # Si no hay una tarea en curso, no respondemos
+        if draft is None:
+            return
+
+        # Un audio se acepta en cualquier paso: la transcripción arranca ya y se
+        # superpone con las preguntas que faltan (ver ask_description)
+        if update.message.voice and draft.step != Step.DESCRIPTION:
+            if await receive_voice(update, context) is None:
+                return
+            if draft.step in EARLY_AUDIO_STEPS:
+                await update.message.reply_text(
+                    "🎵 Audio recibido: lo transcribo mientras completás el resto y lo uso como descripción. "
+                    "Seguí con la pregunta de arriba."
+                )
+            else:
+                await update.message.reply_text("🎵 Audio recibido: reemplaza la descripción. Transcribiendo…")
+            return
+
         # 1a) ¿Esperamos 'otro tipo'?
-        if context.user_data.get("waiting_for_other_task_type"):
+        if draft.step == Step.OTHER_TASK_TYPE:
             other_text = update.message.text or ""
-            context.user_data["other_task_type"] = other_text.strip()
-            context.user_data["waiting_for_other_task_type"] = False
-            context.user_data["waiting_for_description"] = True
-            await update.message.reply_text("📝 Enviá la descripción de la tarea (texto o audio).")
+            await ask_description(update, other_task_type=other_text.strip())
             return
 
         # 1b) ¿Esperamos descripción?
-        if context.user_data.get("waiting_for_description"):
+        if draft.step == Step.DESCRIPTION:
             if update.message.voice:
-                # Guardar audio y lanzar transcripción
-                audio_file = await context.bot.get_file(update.message.voice.file_id)
-
-                rel_dir = "worklog_audios"
-                abs_dir = os.path.join("media", rel_dir)
-                os.makedirs(abs_dir, exist_ok=True)
-                rel_path = f"{rel_dir}/audio_{update.effective_user.id}_{int(time.time())}.ogg"
-                abs_path = os.path.join("media", rel_path)
-
-                await audio_file.download_to_drive(abs_path)
-
-                # Tamaño (debug)
-                try:
-                    size_bytes = os.path.getsize(abs_path)
-                    logger.info(f"Audio guardado: {abs_path} ({size_bytes} bytes)")
-                    if size_bytes == 0:
-                        await update.message.reply_text("⚠️ El audio parece estar vacío (0 bytes).")
-                except Exception:
-                    logger.warning("No se pudo obtener tamaño del archivo.")
-
-                context.user_data["audio_file_relative"] = rel_path
-                context.user_data["pending_transcription"] = True
-                context.user_data["description"] = "[Audio adjunto - Transcribiendo…]"
-
-                async def _bg(apath: str, chat_id: int):
-                    try:
-                        text = await fw_transcribe_in_executor(apath)
-                        if context.user_data is not None:
-                            if text:
-                                context.user_data["description"] = text
-                                context.user_data["transcription_complete"] = True
-                                context.user_data["pending_transcription"] = False
-                                await context.bot.send_message(chat_id, f"📝 Transcripción lista:\n{text}")
-                            else:
-                                context.user_data["description"] = "[Audio adjunto - Sin texto detectado]"
-                                context.user_data["pending_transcription"] = False
-                                try:
-                                    size_b = os.path.getsize(apath)
-                                except Exception:
-                                    size_b = -1
-                                await context.bot.send_message(
-                                    chat_id,
-                                    "⚠️ No se detectó texto en el audio.\n"
-                                    f"(archivo: {os.path.basename(apath)}, tamaño: {size_b} bytes)\n"
-                                    "Tip: hablá más cerca del micrófono o en un ambiente sin ruido."
-                                )
-                            # Si estábamos esperando para mostrar la última pregunta, enviarla ahora:
-                            if context.user_data.get("awaiting_transcription_for_summary"):
-                                summary, buttons = build_summary_text_and_markup(context)
-                                await context.bot.send_message(chat_id, summary, reply_markup=buttons, parse_mode="HTML")
-                                context.user_data["awaiting_transcription_for_summary"] = False
-                    except Exception as e:
-                        context.user_data["description"] = "[Audio adjunto - Error en transcripción]"
-                        context.user_data["pending_transcription"] = False
-                        await context.bot.send_message(chat_id, f"❌ Error transcribiendo: {e}")
-
-                chat_id = update.effective_chat.id
-                asyncio.create_task(_bg(abs_path, chat_id))
-                await update.message.reply_text("🎵 Audio recibido. Transcribiendo…")
+                if await receive_voice(update, context, step=Step.STATUS) is None:
+                    return
+                if FW_READY.is_set():
+                    await update.message.reply_text("🎵 Audio recibido. Transcribiendo…")
+                else:
+                    await update.message.reply_text(
+                        "🎵 Audio recibido. El bot se acaba de reiniciar y está cargando el modelo de "
+                        "transcripción: el audio quedó en cola y te aviso cuando esté listo."
+                    )
 
             else:
                 # Texto directo
-                description = update.message.text or ""
-                context.user_data["description"] = description
-                context.user_data["transcription_complete"] = True
-                context.user_data["pending_transcription"] = False
+                DRAFTS.update(
+                    chat_id, description=update.message.text or "", transcription=Transcription.NONE, step=Step.STATUS,
+                )
 
-            context.user_data["waiting_for_description"] = False
             await ask_status_direct(update, context)
             return
 
-        # 2a) ¿Esperamos subtipo de Operaciones generales?
-        if context.user_data.get("waiting_for_general_ops_subtype"):
-            # No manejamos por texto; viene por callback
-            return
-
-        # 2b) ¿Esperamos garantía?
-        if context.user_data.get("waiting_for_warranty"):
-            # No manejamos por texto; viene por callback
-            return
-
         # 2c) ¿Esperamos ciudad/kms de Campo?
-        if context.user_data.get("waiting_for_field_city"):
+        if draft.step == Step.FIELD_CITY:
             city = update.message.text or ""
-            context.user_data["field_city"] = city.strip()
-            context.user_data["waiting_for_field_city"] = False
-            context.user_data["waiting_for_field_km"] = True
+            DRAFTS.update(chat_id, field_city=city.strip(), step=Step.FIELD_KM)
             await update.message.reply_text("🛣️ Ingresá los kilómetros de ida (número entero).")
             return
-        if context.user_data.get("waiting_for_field_km"):
+        if draft.step == Step.FIELD_KM:
             km_text = update.message.text or ""
             try:
                 km_val = int(km_text)
                 if km_val < 0:
                     raise ValueError()
-                context.user_data["field_km_one_way"] = km_val
-                context.user_data["waiting_for_field_km"] = False
-                context.user_data["waiting_for_description"] = True
-                await update.message.reply_text("📝 Enviá la descripción de la tarea (texto o audio).")
+                await ask_description(update, field_km_one_way=km_val)
             except ValueError:
                 await update.message.reply_text("❌ Debe ser un número entero positivo. Probá de nuevo.")
             return
 
         # 2d) ¿Esperamos duración?
-        if context.user_data.get("waiting_for_duration"):
+        if draft.step == Step.DURATION:
             duration_text = update.message.text or ""
             try:
                 td = parse_hhmm_to_timedelta(duration_text)
-                context.user_data["duration_td"] = td
-                context.user_data["waiting_for_duration"] = False
+                DRAFTS.update(chat_id, duration_minutes=int(td.total_seconds() // 60), step=Step.COLLABORATOR)
                 await update.message.reply_text(f"✅ Duración registrada: {duration_text}")
                 await ask_collaborator_direct(update, context)
             except ValueError:
                 await update.message.reply_text("❌ Formato inválido. Usá H:MM (ej: 2:30) o minutos (ej: 24).")
             return
 
-        # Si no esperamos nada, no respondemos
+        # En los demás pasos la respuesta llega por botones (callback)
     except Exception as e:
         logger.error(f"handle_text_or_voice error: {e}")
         await update.message.reply_text("❌ Error al procesar el mensaje.")
@@ -1129,10 +1150,7 @@ async def nueva_tarea_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("🚫 No estás autorizado.")
             return ConversationHandler.END
 
-        context.user_data.clear()
-        context.user_data["technician"] = user
-        context.user_data["chat_id"] = chat_id
-
+        DRAFTS.save(TaskDraft(chat_id=chat_id, technician_id=user.id))
         await ask_work_order_selection(update, context)
         return SELECTING_WORK_ORDER
     except Exception as e:
@@ -1142,22 +1160,7 @@ async def nueva_tarea_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def conv_select_work_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        query = update.callback_query
-        if query.data == "work_order:none":
-            context.user_data["work_order"] = None
-            await query.edit_message_text("✅ Continuando sin asociar a ninguna OT.")
-        else:
-            from work_order.models import WorkOrder
-            work_order_id = int(query.data.split(":")[1])
-            try:
-                wo = WorkOrder.objects.get(id=work_order_id)
-                context.user_data["work_order"] = wo
-                await query.edit_message_text(f"✅ Tarea asociada a: {wo.numero} - {wo.titulo}")
-            except WorkOrder.DoesNotExist:
-                context.user_data["work_order"] = None
-                await query.edit_message_text("⚠️ Orden no válida. Continuando sin asociar.")
-
-        await ask_task_type_selection(query, context)
+        await handle_work_order_selection_direct(update.callback_query, context)
         return SELECTING_TASK_TYPE
     except Exception as e:
         logger.error(f"conv_select_work_order error: {e}")
@@ -1167,11 +1170,10 @@ async def conv_select_work_order(update: Update, context: ContextTypes.DEFAULT_T
 async def conv_select_task_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         query = update.callback_query
-        task_type_value = query.data.split(":")[1]
-        context.user_data["task_type"] = task_type_value
-        context.user_data["waiting_for_description"] = True
-        await query.edit_message_text("📝 Enviá la descripción de la tarea (texto o audio).")
-        return ENTERING_DESCRIPTION
+        draft = await ask_description(query, task_type=value_of(query))
+        if draft is None:
+            return ConversationHandler.END
+        return SELECTING_STATUS if draft.step == Step.STATUS else ENTERING_DESCRIPTION
     except Exception as e:
         logger.error(f"conv_select_task_type error: {e}")
         await update.callback_query.edit_message_text("❌ Error interno del bot.")
@@ -1184,12 +1186,8 @@ async def conv_enter_description(update: Update, context: ContextTypes.DEFAULT_T
 async def conv_select_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         query = update.callback_query
-        if query.data.startswith("status_direct:"):
-            status_value = query.data.split(":")[1]
-            context.user_data["status"] = status_value
-            await query.edit_message_text(f"✅ Estado seleccionado: {status_value}")
-            context.user_data["waiting_for_duration"] = True
-            await query.edit_message_text("⏱️ ¿Cuánto tiempo duró la tarea? (ej: 2:30, 0:20, 10:50)")
+        if value_of(query) is not None:
+            await handle_status_selection_direct(query, context)
             return ENTERING_DURATION
     except Exception as e:
         logger.error(f"conv_select_status error: {e}")
@@ -1203,9 +1201,68 @@ async def conv_enter_duration(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def conv_ask_collaborator(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECTING_COLLABORATOR
 
+# ----------------------------
+# Callbacks: acción del botón -> handler
+# ----------------------------
+CALLBACKS = CallbackRouter()
+for _action, _handler in (
+    (VER_TAREA, show_task_detail),
+    (VER_ORDEN, show_work_order_detail),
+    (NUEVA_TAREA, handle_nueva_tarea_direct),
+    (ORDEN, handle_work_order_selection_direct),
+    (TIPO, handle_task_type_selection_direct),
+    (SUBTIPO, handle_general_ops_subtype),
+    (GARANTIA, handle_warranty),
+    (ESTADO, handle_status_selection_direct),
+    (COLABORADOR, handle_collaborator_direct),
+    (COLABORADOR_ELEGIDO, handle_collaborator_select_direct),
+    (GUARDAR, save_task_direct),
+    (EDITAR, edit_transcription_direct),
+    (EDITAR_TEXTO, handle_edit_transcription_text),
+    (EDITAR_AUDIO, handle_edit_transcription_audio),
+    (VOLVER_TAREAS, volver_tareas_callback),
+    (VOLVER_ORDENES, volver_ordenes_callback),
+    (CANCELAR, cancel_callback),
+):
+    CALLBACKS.register(_action, _handler)
+
 # ----------------------------
 # Main
 # ----------------------------
+async def post_init(application: Application):
+    """Corre dentro del loop, justo antes de empezar a recibir updates"""
+    mode = settings.WHISPER_LOAD_MODE
+    if mode == "background":
+        loop = asyncio.get_running_loop()
+
+        def on_done(ok):
+            # Si la carga falló igual se libera la cola: cada audio reintenta la carga al transcribir
+            loop.call_soon_threadsafe(FW_READY.set)
+            logger.info(
+                "Modelo %s a los %.1fs del arranque.",
+                "listo" if ok else "no disponible", time.perf_counter() - STARTED_AT,
+            )
+
+        load_in_background(FW_CONFIG, on_done)
+    else:
+        # eager: ya se cargó en main(); lazy: se carga con el primer audio
+        FW_READY.set()
+
+    expired = DRAFTS.purge_expired()
+    pending = DRAFTS.pending_transcriptions()
+    for draft in pending:
+        # Audios que quedaron sin transcribir por el reinicio: esperan al modelo como cualquier otro
+        asyncio.create_task(transcribe_draft_audio(application.bot, draft.chat_id, draft.audio_file))
+    logger.info("Borradores: %s vencidos eliminados, %s transcripciones retomadas.", expired, len(pending))
+    logger.info(
+        "Bot aceptando updates a los %.1fs del arranque (modelo: %s).",
+        time.perf_counter() - STARTED_AT, mode,
+    )
+
+async def on_error(update: object, context: ContextTypes.DEFAULT_TYPE):
+    """Errores que escapan de los handlers (p. ej. RetryAfter agotados): se registran en lugar de perderse"""
+    logger.error(f"Error no manejado: {context.error}", exc_info=context.error)
+
 def main():
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     if not token:
@@ -1214,13 +1271,28 @@ def main():
 
     logger.info("==== Diagnóstico entorno ====")
     logger.info("cpu_count=%s platform=%s", os.cpu_count(), sys.platform)
-    logger.info("faster-whisper compute_type=int8 cpu_threads=%s", CPU_COUNT)
+    logger.info("faster-whisper %s (carga: %s)", FW_CONFIG.label(), settings.WHISPER_LOAD_MODE)
+    logger.info(
+        "Arranque: django.setup %.2fs, imports %.2fs",
+        DJANGO_READY_AT - STARTED_AT, IMPORTS_READY_AT - DJANGO_READY_AT,
+    )
     logger.info("=============================")
 
-    # Precarga modelo para evitar cold-start
-    get_fw_model()
-
-    application: Application = ApplicationBuilder().token(token).build()
+    if settings.WHISPER_LOAD_MODE == "eager":
+        # Modo anterior: no atiende updates hasta tener el modelo
+        get_fw_model()
+
+    application: Application = (
+        ApplicationBuilder()
+        .token(token)
+        # Un único cliente HTTP con pool para la API y las descargas de audios
+        .connection_pool_size(settings.BOT_HTTP_POOL_SIZE)
+        .read_timeout(settings.BOT_HTTP_READ_TIMEOUT)
+        .rate_limiter(OutboundRateLimiter.from_settings())
+        .post_init(post_init)
+        .build()
+    )
+    application.add_error_handler(on_error)
 
     # Comandos
     application.add_handler(CommandHandler("start", start))
@@ -1239,18 +1311,18 @@ def main():
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler("nueva_tarea", nueva_tarea_start)],
         states={
-            SELECTING_WORK_ORDER: [CallbackQueryHandler(conv_select_work_order, pattern="^work_order:")],
-            SELECTING_TASK_TYPE: [CallbackQueryHandler(conv_select_task_type, pattern="^task_type:")],
+            SELECTING_WORK_ORDER: [CallbackQueryHandler(conv_select_work_order, pattern=pattern(ORDEN))],
+            SELECTING_TASK_TYPE: [CallbackQueryHandler(conv_select_task_type, pattern=pattern(TIPO))],
             ENTERING_DESCRIPTION: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, conv_enter_description),
                 MessageHandler(filters.VOICE, conv_enter_description),
             ],
-            SELECTING_STATUS: [CallbackQueryHandler(conv_select_status, pattern="^status_direct:")],
+            SELECTING_STATUS: [CallbackQueryHandler(conv_select_status, pattern=pattern(ESTADO))],
             ENTERING_DURATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, conv_enter_duration)],
-            ASK_COLLABORATOR: [CallbackQueryHandler(callback_query_router, pattern="^(colaborador_direct:|colaborador_select:)")],
-            SELECTING_COLLABORATOR: [CallbackQueryHandler(callback_query_router, pattern="^(save_task_direct|cancelar)$")],
+            ASK_COLLABORATOR: [CallbackQueryHandler(callback_query_router, pattern=pattern(COLABORADOR, COLABORADOR_ELEGIDO))],
+            SELECTING_COLLABORATOR: [CallbackQueryHandler(callback_query_router, pattern=pattern(GUARDAR, CANCELAR))],
         },
-        fallbacks=[CallbackQueryHandler(cancel, pattern="^cancelar$"), CommandHandler("cancel", cancel)],
+        fallbacks=[CallbackQueryHandler(cancel, pattern=pattern(CANCELAR)), CommandHandler("cancel", cancel)],
         allow_reentry=True,
         per_chat=True,     # Rastrear conversaciones por chat individual
         per_user=True,     # Rastrear conversaciones por usuario individual
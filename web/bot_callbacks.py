@@ -0,0 +1,158 @@
+# bot_callbacks.py
+# -*- coding: utf-8 -*-
+"""
+Protocolo de los callback_data de los botones del bot.
+
+Cada botón lleva "<versión>.<acción>[.<valor>]", por ejemplo "k3.t.4fx" para
+ver la tarea 4fx (base 36). Las opciones fijas (tipo de tarea, subtipo,
+estado) viajan como índice en la lista de choices del modelo y los sí/no como
+1/0, así que ningún payload se acerca a los 64 bytes que admite Telegram.
+
+La versión es una huella de la tabla de acciones: si cambia un código o el
+orden de las opciones, los botones de mensajes viejos (y los del formato
+anterior, "ver_tarea:12") dejan de decodificar y el router los rechaza sin
+tocar la base. CallbackRouter resuelve el handler con un solo lookup en un
+dict indexado por código, en lugar de una cadena de startswith.
+"""
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+from worklog.models import WorkLog
+
+MAX_BYTES = 64  # límite de Telegram para callback_data
+SEP = "."
+
+# Tipos de valor
+NONE = "none"  # sin valor
+ID = "id"  # entero en base 36; vacío = None ("no asociar")
+BOOL = "bool"  # 1/0
+
+
+@dataclass(frozen=True)
+class Action:
+    name: str  # nombre legible, para logs
+    code: str
+    kind: object = NONE  # NONE, ID, BOOL o una tupla de opciones (se codifica el índice)
+
+
+VER_TAREA = Action("ver_tarea", "t", ID)
+VER_ORDEN = Action("ver_orden", "o", ID)
+NUEVA_TAREA = Action("nueva_tarea", "n")
+VOLVER_TAREAS = Action("volver_tareas", "T")
+VOLVER_ORDENES = Action("volver_ordenes", "O")
+ORDEN = Action("orden", "w", ID)
+TIPO = Action("tipo", "y", tuple(value for value, _ in WorkLog.TASK_TYPES))
+SUBTIPO = Action("subtipo", "g", tuple(value for value, _ in WorkLog.GENERAL_OPS_SUBTYPES))
+GARANTIA = Action("garantia", "r", BOOL)
+ESTADO = Action("estado", "s", tuple(value for value, _ in WorkLog.STATUS_CHOICES))
+COLABORADOR = Action("colaborador", "c", BOOL)
+COLABORADOR_ELEGIDO = Action("colaborador_elegido", "u", ID)
+GUARDAR = Action("guardar", "k")
+EDITAR = Action("editar", "e")
+EDITAR_TEXTO = Action("editar_texto", "x")
+EDITAR_AUDIO = Action("editar_audio", "a")
+CANCELAR = Action("cancelar", "z")
+
+ACTIONS = {
+    action.code: action
+    for action in (
+        VER_TAREA, VER_ORDEN, NUEVA_TAREA, VOLVER_TAREAS, VOLVER_ORDENES, ORDEN, TIPO, SUBTIPO,
+        GARANTIA, ESTADO, COLABORADOR, COLABORADOR_ELEGIDO, GUARDAR, EDITAR, EDITAR_TEXTO, EDITAR_AUDIO, CANCELAR,
+    )
+}
+
+
+def _base36(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        number, rest = divmod(number, 36)
+        text = digits[rest] + text
+        if not number:
+            return text
+
+
+def _fingerprint():
+    table = "|".join(f"{code}={action.kind}" for code, action in sorted(ACTIONS.items()))
+    return "k" + _base36(zlib.crc32(table.encode()) % 1296)
+
+
+VERSION = _fingerprint()
+
+
+@dataclass(frozen=True)
+class Callback:
+    action: Action
+    value: object = None
+
+
+def encode(action, value=None):
+    """callback_data del botón; ValueError si el valor no corresponde a la acción"""
+    kind = action.kind
+    if kind == NONE:
+        if value is not None:
+            raise ValueError(f"{action.name} no lleva valor")
+        return f"{VERSION}{SEP}{action.code}"
+    if kind == ID:
+        raw = "" if value is None else _base36(int(value))
+    elif kind == BOOL:
+        raw = "1" if value else "0"
+    else:
+        raw = _base36(kind.index(value))
+    data = f"{VERSION}{SEP}{action.code}{SEP}{raw}"
+    if len(data.encode()) > MAX_BYTES:
+        raise ValueError(f"callback_data de {action.name} excede {MAX_BYTES} bytes")
+    return data
+
+
+@lru_cache(maxsize=4096)
+def decode(data):
+    """Callback del botón, o None si es de otra versión o está mal formado"""
+    parts = (data or "").split(SEP)
+    if len(parts) not in (2, 3) or parts[0] != VERSION:
+        return None
+    action = ACTIONS.get(parts[1])
+    if action is None or (len(parts) == 2) != (action.kind == NONE):
+        return None
+    if action.kind == NONE:
+        return Callback(action)
+    raw = parts[2]
+    try:
+        if action.kind == ID:
+            return Callback(action, int(raw, 36) if raw else None)
+        if action.kind == BOOL:
+            return Callback(action, {"1": True, "0": False}[raw])
+        return Callback(action, action.kind[int(raw, 36)])
+    except (ValueError, KeyError, IndexError):
+        return None
+
+
+def value_of(query):
+    """Valor del botón presionado (los handlers ya reciben callbacks decodificados por el router)"""
+    callback = decode(query.data)
+    return callback.value if callback else None
+
+
+def pattern(*actions):
+    """Regex para CallbackQueryHandler(pattern=...) que acepta solo esas acciones en la versión actual"""
+    codes = "|".join(action.code for action in actions)
+    return rf"^{VERSION}\{SEP}({codes})(\{SEP}|$)"
+
+
+class CallbackRouter:
+    """Tabla código de acción -> handler"""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def register(self, action, handler):
+        self._handlers[action.code] = handler
+
+    def resolve(self, data):
+        """(handler, callback), o None si el botón es viejo, inválido o no tiene handler"""
+        callback = decode(data)
+        if callback is None:
+            return None
+        handler = self._handlers.get(callback.action.code)
+        return (handler, callback) if handler else None
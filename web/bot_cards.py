@@ -0,0 +1,168 @@
+# bot_cards.py
+# -*- coding: utf-8 -*-
+"""
+Tarjetas de detalle del bot: tarea (ver_tarea) y orden de trabajo (ver_orden).
+
+Cada tarjeta sale de una consulta: técnico, colaborador, cliente y asignado con
+select_related, y las horas y la cantidad de tareas de la orden agregadas en
+SQL. El texto renderizado se cachea con las marcas de modificación en la clave
+(updated_at de la tarea y de sus usuarios; actualizado_en de la orden, la
+última modificación y la cantidad de sus tareas), así que cualquier cambio
+genera una tarjeta nueva sin tener que invalidar nada.
+"""
+from dataclasses import dataclass
+from html import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateTimeField, DurationField, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+
+from bot_callbacks import VER_TAREA, VERSION, encode
+from work_order.models import WorkOrder
+from worklog.models import WorkLog
+from worklog.rollups import duration_expression, to_hours
+
+PRIORITY_EMOJI = {"urgente": "🔴", "alta": "🟠", "media": "🟡", "baja": "🟢"}
+RECENT_TASKS = 5
+
+
+@dataclass(frozen=True)
+class Card:
+    text: str
+    buttons: tuple = ()  # (texto, callback_data) por fila, sin los botones de navegación
+
+
+def _stamp(*values):
+    return ":".join(str(value.timestamp()) if hasattr(value, "timestamp") else str(value) for value in values)
+
+
+def _cached(key, render):
+    card = cache.get(key)
+    if card is None:
+        card = render()
+        cache.set(key, card, settings.BOT_CARD_CACHE_SECONDS)
+    return card
+
+
+# ----------------------------
+# Tarea
+# ----------------------------
+
+def task_card(task_id):
+    """Tarjeta de la tarea, o None si no existe"""
+    stamp = (
+        WorkLog.objects.filter(pk=task_id)
+        .values_list("updated_at", "technician__updated_at", "collaborator__updated_at")
+        .first()
+    )
+    if stamp is None:
+        return None
+    return _cached(f"bot:card:task:{task_id}:{_stamp(*stamp)}", lambda: _render_task(task_id))
+
+
+def _render_task(task_id):
+    t = WorkLog.objects.select_related("technician", "collaborator").get(pk=task_id)
+    msg = (
+        f"📋 <b>Detalle de Tarea</b>\n\n"
+        f"👷 Técnico Principal\n"
+        f"🧑 Técnico: {escape(t.technician.get_full_name())}\n"
+        f"📆 Inicio: {t.start.strftime('%Y-%m-%d %H:%M')}\n"
+        f"📆 Fin: {t.end.strftime('%Y-%m-%d %H:%M')}\n"
+        f"⏱️ Duración: {t.duration()} hs\n"
+        f"🔧 Tipo: {t.task_type}\n"
+    )
+    # Mostrar subtipo para Operaciones generales
+    if t.task_type == "Operaciones generales" and t.general_ops_subtype:
+        msg += f"⚙️ Subtipo: {t.general_ops_subtype}\n"
+    # Mostrar otro tipo para Otros
+    if t.task_type == "Otros" and t.other_task_type:
+        msg += f"🧩 Otro tipo: {escape(t.other_task_type)}\n"
+    # Mostrar garantía para Taller/Campo
+    if t.task_type in ["Taller", "Campo"]:
+        msg += f"🛡️ Garantía: {'Sí' if t.warranty else 'No'}\n"
+    # Mostrar ciudad y km para Campo
+    if t.task_type == "Campo":
+        if t.field_city:
+            msg += f"🏙️ Ciudad: {escape(t.field_city)}\n"
+        if t.field_km_one_way is not None:
+            msg += f"🛣️ Km ida: {t.field_km_one_way}\n"
+    msg += (
+        f"📊 Estado: {t.get_status_display()}\n"
+        f"📝 Descripción:\n{escape(t.description)}\n"
+    )
+    if t.collaborator:
+        msg += f"👥 Colaborador: {escape(t.collaborator.get_full_name())}\n"
+    if t.work_order:
+        msg += f"📋 Orden de Trabajo: {escape(t.work_order)}\n"
+    return Card(msg)
+
+
+# ----------------------------
+# Orden de trabajo
+# ----------------------------
+
+def _order_tasks():
+    """Tareas de la orden: por FK o, en registros viejos, por el número de OT en texto"""
+    return WorkLog.objects.filter(Q(work_order_ref=OuterRef("pk")) | Q(work_order=OuterRef("numero"))).order_by()
+
+
+def _tasks_aggregate(expression, output_field):
+    # Agrupar por una constante: un único total por orden dentro de la subconsulta
+    return Subquery(
+        _order_tasks().annotate(group=Value(1)).values("group").annotate(value=expression).values("value")[:1],
+        output_field=output_field,
+    )
+
+
+def order_card(order_id):
+    """Tarjeta de la orden, o None si no existe"""
+    o = (
+        WorkOrder.objects.select_related("cliente", "asignado_a")
+        .annotate(
+            total_duration=_tasks_aggregate(Sum(duration_expression()), DurationField()),
+            task_count=_tasks_aggregate(Count("id"), IntegerField()),
+            tasks_updated=_tasks_aggregate(Max("updated_at"), DateTimeField()),
+        )
+        .filter(pk=order_id)
+        .first()
+    )
+    if o is None:
+        return None
+    key = _stamp(
+        o.actualizado_en, o.cliente.updated_at, o.asignado_a.updated_at if o.asignado_a else "",
+        o.task_count or 0, o.tasks_updated or "",
+    )
+    # Los botones llevan callback_data: una versión nueva del protocolo no reusa tarjetas viejas
+    return _cached(f"bot:card:order:{VERSION}:{o.pk}:{key}", lambda: _render_order(o))
+
+
+def _render_order(o):
+    msg = (
+        f"📋 <b>Orden de Trabajo: {escape(o.numero)}</b>\n\n"
+        f"📝 <b>Título:</b> {escape(o.titulo)}\n"
+        f"🏢 <b>Cliente:</b> {escape(str(o.cliente))}\n"
+        f"{PRIORITY_EMOJI.get(o.prioridad, '⚪')} <b>Prioridad:</b> {o.get_prioridad_display()}\n"
+        f"📊 <b>Estado:</b> {o.get_estado_display()}\n"
+        f"👷 <b>Asignado a:</b> {escape(o.asignado_a.get_full_name()) if o.asignado_a else 'No asignado'}\n"
+        f"📅 <b>Creación:</b> {o.fecha_creacion.strftime('%d/%m/%Y %H:%M')}\n"
+    )
+    if o.fecha_limite:
+        msg += f"⏰ <b>Fecha límite:</b> {o.fecha_limite.strftime('%d/%m/%Y %H:%M')}\n"
+    if o.descripcion:
+        msg += f"📄 <b>Descripción:</b>\n{escape(o.descripcion)}\n\n"
+
+    msg += f"⏱️ <b>Total de horas:</b> {to_hours(o.total_duration):.2f} hs\n"
+    msg += f"📋 <b>Tareas asociadas:</b> {o.task_count or 0}\n"
+
+    buttons = ()
+    if o.task_count:
+        msg += "\n📋 <b>Tareas:</b>\n"
+        recent = (
+            WorkLog.objects.filter(Q(work_order=o.numero) | Q(work_order_ref=o))
+            .order_by("-start").values_list("id", "start", "description")[:RECENT_TASKS]
+        )
+        buttons = tuple(
+            (f"🔧 {start.strftime('%d/%m %H:%M')} - {description[:25]}...", encode(VER_TAREA, task_id))
+            for task_id, start, description in recent
+        )
+    return Card(msg, buttons)
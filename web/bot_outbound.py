@@ -0,0 +1,217 @@
+# bot_outbound.py
+# -*- coding: utf-8 -*-
+"""
+Control de salida de mensajes del bot hacia Telegram.
+
+Todos los pedidos con chat_id (send_message, edit_message_text, ...) pasan por
+dos token buckets: uno global (Telegram corta a ~30 mensajes/s por bot) y uno
+por chat (~1 por segundo en privados con una pequeña ráfaga, 20 por minuto en
+grupos). Si se encolan varias ediciones del mismo mensaje, solo sale la última.
+Ante un RetryAfter se pausa toda la cola el tiempo indicado y se reintenta.
+Cada BOT_SEND_STATS_SECONDS se registra el throughput y la espera en cola.
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from telegram.error import RetryAfter, TelegramError
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger("worklog-bot-fw.outbound")
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # tokens por segundo
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class ChatQueue:
+    """Bucket del chat y un lock FIFO: los mensajes de un mismo chat salen en orden"""
+    __slots__ = ("bucket", "lock")
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.lock = asyncio.Lock()
+
+    def idle(self, now):
+        return not self.lock.locked() and self.bucket.idle(now)
+
+
+class SendStats:
+    __slots__ = ("sent", "queued", "coalesced", "retry_after", "errors", "wait_total", "wait_max", "waiting", "waiting_max")
+
+    def __init__(self):
+        self.reset()
+        self.waiting = 0
+
+    def reset(self):
+        self.sent = self.queued = self.coalesced = self.retry_after = self.errors = 0
+        self.wait_total = self.wait_max = 0.0
+        self.waiting_max = 0
+
+
+def _seconds(retry_after):
+    # Según la versión de python-telegram-bot viene en segundos o como timedelta
+    return retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+
+
+class OutboundRateLimiter(BaseRateLimiter):
+    def __init__(self, global_per_second=25, chat_per_second=1.0, chat_burst=3, group_per_minute=20,
+                 max_retries=3, stats_seconds=60):
+        self.global_bucket = TokenBucket(global_per_second, global_per_second)
+        self.chat_per_second = chat_per_second
+        self.chat_burst = chat_burst
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self.stats_seconds = stats_seconds
+        self.stats = SendStats()
+        self._chats = {}  # chat_id -> ChatQueue
+        self._edits = {}  # (chat_id, message_id) -> generación de la última edición encolada
+        self._paused_until = 0.0
+        self._stats_task = None
+
+    @classmethod
+    def from_settings(cls):
+        from django.conf import settings
+
+        return cls(
+            global_per_second=settings.BOT_RATE_GLOBAL_PER_SECOND,
+            chat_per_second=settings.BOT_RATE_CHAT_PER_SECOND,
+            chat_burst=settings.BOT_RATE_CHAT_BURST,
+            group_per_minute=settings.BOT_RATE_GROUP_PER_MINUTE,
+            max_retries=settings.BOT_RATE_MAX_RETRIES,
+            stats_seconds=settings.BOT_SEND_STATS_SECONDS,
+        )
+
+    async def initialize(self):
+        if self.stats_seconds and self._stats_task is None:
+            self._stats_task = asyncio.create_task(self._report_loop())
+
+    async def shutdown(self):
+        if self._stats_task is not None:
+            self._stats_task.cancel()
+            self._stats_task = None
+        if self.stats_seconds:
+            self._report(self.stats_seconds)
+
+    def _chat_queue(self, chat_id):
+        queue = self._chats.get(chat_id)
+        if queue is None:
+            # Grupos y canales tienen id negativo (o @usuario)
+            if isinstance(chat_id, str) or chat_id < 0:
+                queue = ChatQueue(TokenBucket(self.group_per_minute / 60, 1))
+            else:
+                queue = ChatQueue(TokenBucket(self.chat_per_second, self.chat_burst))
+            self._chats[chat_id] = queue
+        return queue
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        """
+        Espera el turno del chat y envía. Una edición que quedó vieja en la cola (llegó otra
+        del mismo mensaje) no se envía y devuelve True, como editMessage* cuando no hay un
+        Message que devolver: quien la pidió no recibe el mensaje editado.
+        """
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            # answerCallbackQuery, getFile, etc.: sin límite por chat y sin demorar
+            return await self._call(callback, args, kwargs, endpoint)
+
+        edit_key = generation = None
+        if endpoint.startswith("editMessage") and data.get("message_id"):
+            edit_key = (chat_id, data["message_id"])
+            generation = self._edits.get(edit_key, 0) + 1
+            self._edits[edit_key] = generation
+
+        queue = self._chat_queue(chat_id)
+        queued_at = time.monotonic()
+        self.stats.waiting += 1
+        self.stats.waiting_max = max(self.stats.waiting_max, self.stats.waiting)
+        try:
+            async with queue.lock:
+                while True:
+                    if edit_key and self._edits.get(edit_key) != generation:
+                        # Llegó otra edición del mismo mensaje mientras esperaba: sale solo la última
+                        self.stats.coalesced += 1
+                        return True
+                    now = time.monotonic()
+                    wait = max(
+                        self._paused_until - now, queue.bucket.wait_time(now), self.global_bucket.wait_time(now)
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                queue.bucket.take()
+                self.global_bucket.take()
+        finally:
+            self.stats.waiting -= 1
+
+        waited = time.monotonic() - queued_at
+        self.stats.queued += 1
+        self.stats.wait_total += waited
+        self.stats.wait_max = max(self.stats.wait_max, waited)
+        try:
+            return await self._call(callback, args, kwargs, endpoint)
+        finally:
+            if edit_key and self._edits.get(edit_key) == generation:
+                del self._edits[edit_key]
+
+    async def _call(self, callback, args, kwargs, endpoint):
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await callback(*args, **kwargs)
+                self.stats.sent += 1
+                return result
+            except RetryAfter as e:
+                self.stats.retry_after += 1
+                if attempt == self.max_retries:
+                    self.stats.errors += 1
+                    raise
+                delay = _seconds(e.retry_after)
+                # El flood control de Telegram es por bot: se frena toda la cola, no solo este pedido
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                logger.warning(f"{endpoint}: RetryAfter {delay:.0f}s (intento {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+            except TelegramError:
+                self.stats.errors += 1
+                raise
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.stats_seconds)
+            self._report(self.stats_seconds)
+            now = time.monotonic()
+            # Los chats sin cola y con el bucket lleno no guardan estado útil: se descartan
+            self._chats = {chat: queue for chat, queue in self._chats.items() if not queue.idle(now)}
+
+    def _report(self, interval):
+        stats = self.stats
+        if not (stats.sent or stats.coalesced or stats.errors):
+            return
+        logger.info(
+            f"Envíos: {stats.sent} en {interval}s ({stats.sent / interval:.2f}/s), "
+            f"espera media {stats.wait_total / max(stats.queued, 1) * 1000:.0f} ms, "
+            f"máx {stats.wait_max * 1000:.0f} ms, cola máx {stats.waiting_max}, "
+            f"ediciones combinadas {stats.coalesced}, RetryAfter {stats.retry_after}, errores {stats.errors}"
+        )
+        stats.reset()
@@ -0,0 +1,172 @@
+# bot_state.py
+# -*- coding: utf-8 -*-
+"""
+Borrador de tarea por chat del bot, persistido en un SQLite local.
+
+Cada chat tiene como mucho un borrador: ids en lugar de objetos del ORM, un
+único paso (Step) en lugar de banderas waiting_for_* y el estado de la
+transcripción aparte, porque corre en segundo plano mientras el técnico sigue
+completando el resto. Los borradores sobreviven a un reinicio del bot y vencen
+después de BOT_DRAFT_TTL_HOURS sin cambios.
+"""
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from enum import Enum
+from typing import Optional
+
+
+class Step(str, Enum):
+    WORK_ORDER = "work_order"
+    TASK_TYPE = "task_type"
+    OTHER_TASK_TYPE = "other_task_type"
+    GENERAL_OPS_SUBTYPE = "general_ops_subtype"
+    WARRANTY = "warranty"
+    FIELD_CITY = "field_city"
+    FIELD_KM = "field_km"
+    DESCRIPTION = "description"
+    STATUS = "status"
+    DURATION = "duration"
+    COLLABORATOR = "collaborator"
+    SUMMARY = "summary"
+
+
+class Transcription(str, Enum):
+    NONE = "none"  # descripción escrita o todavía sin audio
+    PENDING = "pending"
+    DONE = "done"
+
+
+@dataclass(slots=True)
+class TaskDraft:
+    chat_id: int
+    technician_id: int
+    step: Step = Step.WORK_ORDER
+    work_order_id: Optional[int] = None
+    work_order_label: Optional[str] = None  # "numero - titulo", para el resumen sin consultar la DB
+    task_type: Optional[str] = None
+    other_task_type: Optional[str] = None
+    general_ops_subtype: Optional[str] = None
+    warranty: Optional[bool] = None
+    field_city: Optional[str] = None
+    field_km_one_way: Optional[int] = None
+    description: str = ""
+    transcription: Transcription = Transcription.NONE
+    audio_file: Optional[str] = None  # nombre en el storage de archivos (core/storage.py)
+    segments: list = field(default_factory=list)  # transcripción del audio con tiempos (Segment.as_list())
+    status: Optional[str] = None
+    duration_minutes: int = 0
+    collaborator_id: Optional[int] = None
+    collaborator_name: Optional[str] = None
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def transcribing(self):
+        return self.transcription == Transcription.PENDING
+
+    def to_json(self):
+        data = asdict(self)
+        data["step"] = self.step.value
+        data["transcription"] = self.transcription.value
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        known = {f.name for f in fields(cls)}
+        # Campos de versiones anteriores se ignoran; los nuevos toman su valor por defecto
+        data = {key: value for key, value in data.items() if key in known}
+        data["step"] = Step(data.get("step", Step.WORK_ORDER))
+        data["transcription"] = Transcription(data.get("transcription", Transcription.NONE))
+        return cls(**data)
+
+
+class DraftStore:
+    """
+    Borradores en una tabla SQLite (chat_id -> JSON). Las operaciones son
+    locales y cortas, así que se llaman directo desde los handlers.
+    """
+
+    def __init__(self, path, ttl_seconds):
+        self.path = str(path)
+        self.ttl_seconds = ttl_seconds
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS drafts ("
+                " chat_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _load(self, chat_id):
+        """Lee el borrador vigente; se llama con el lock tomado"""
+        row = self._connection().execute(
+            "SELECT data, updated_at FROM drafts WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time() - self.ttl_seconds:
+            self._connection().execute("DELETE FROM drafts WHERE chat_id = ?", (chat_id,))
+            return None
+        return TaskDraft.from_json(row[0])
+
+    def get(self, chat_id):
+        with self._lock:
+            return self._load(chat_id)
+
+    def update(self, chat_id, when=None, **changes):
+        """
+        Cambia solo los campos indicados sobre la versión guardada y devuelve el
+        borrador resultante (None si no existe o si when(borrador) es falso).
+        Los handlers lo usan en lugar de save() con una copia leída antes de un
+        await, que pisaría lo que la transcripción en segundo plano guardó entre
+        tanto.
+        """
+        with self._lock:
+            draft = self._load(chat_id)
+            if draft is None or (when is not None and not when(draft)):
+                return None
+            for name, value in changes.items():
+                setattr(draft, name, value)
+            draft.updated_at = time.time()
+            self._connection().execute(
+                "UPDATE drafts SET data = ?, updated_at = ? WHERE chat_id = ?",
+                (draft.to_json(), draft.updated_at, chat_id),
+            )
+        return draft
+
+    def save(self, draft):
+        draft.updated_at = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO drafts (chat_id, data, updated_at) VALUES (?, ?, ?)",
+                (draft.chat_id, draft.to_json(), draft.updated_at),
+            )
+
+    def delete(self, chat_id):
+        with self._lock:
+            self._connection().execute("DELETE FROM drafts WHERE chat_id = ?", (chat_id,))
+
+    def purge_expired(self):
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM drafts WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            return cursor.rowcount
+
+    def pending_transcriptions(self):
+        """Borradores vigentes con un audio que quedó sin transcribir (p. ej. por un reinicio)"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT data FROM drafts WHERE updated_at >= ?", (time.time() - self.ttl_seconds,)
+            ).fetchall()
+        drafts = (TaskDraft.from_json(data) for (data,) in rows)
+        return [draft for draft in drafts if draft.transcribing and draft.audio_file]
@@ -1,9 +1,23 @@
 from django.contrib import admin
-from .models import Client
+from .models import Client, ClientSummary
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
     list_display = ('razon_social', 'cuit', 'ciudad', 'provincia', 'telefono', 'created_at')
     search_fields = ('razon_social', 'cuit', 'ciudad', 'provincia', 'telefono')
     list_filter = ('provincia', 'ciudad')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(ClientSummary)
+class ClientSummaryAdmin(admin.ModelAdmin):
+    """Solo lectura: se mantiene desde clients/summary.py"""
+    list_display = ('client', 'active_orders', 'total_orders', 'total_hours', 'entries', 'last_activity', 'updated_at')
+    search_fields = ('client__razon_social', 'client__cuit')
+    list_select_related = ('client',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -31,7 +31,7 @@ class ClientForm(forms.ModelForm):
 
     def clean_cuit(self):
         cuit = self.cleaned_data['cuit']
-        # Eliminar guiones o espacios para la validación de unicidad
+        # Se guarda sin guiones ni espacios: así lo busca el directorio de clientes (por prefijo)
         cuit_cleaned = cuit.replace('-', '').replace(' ', '')
 
         # Validar formato básico (ej. 11 o 13 dígitos)
@@ -40,10 +40,10 @@ class ClientForm(forms.ModelForm):
 
         # Verificar unicidad (excluyendo el propio cliente si es edición)
         if self.instance.pk: # Si es una edición
-            if Client.objects.filter(cuit=cuit).exclude(pk=self.instance.pk).exists():
+            if Client.objects.filter(cuit=cuit_cleaned).exclude(pk=self.instance.pk).exists():
                 raise forms.ValidationError("Ya existe un cliente con este CUIT/CUIL.")
         else: # Si es una creación
-            if Client.objects.filter(cuit=cuit).exists():
+            if Client.objects.filter(cuit=cuit_cleaned).exists():
                 raise forms.ValidationError("Ya existe un cliente con este CUIT/CUIL.")
         
-        return cuit
\ No newline at end of file
+        return cuit_cleaned
\ No newline at end of file
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from clients.summary import rebuild_client_summaries
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los resúmenes por cliente (ClientSummary) a partir de las órdenes y los resúmenes diarios de horas"
+
+    def handle(self, *args, **options):
+        created = rebuild_client_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes de clientes generados: {created}"))
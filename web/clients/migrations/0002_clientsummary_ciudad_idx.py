@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:09
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientSummary',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='clients.client')),
+                ('active_orders', models.PositiveIntegerField(default=0)),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('hours', models.DurationField(default=datetime.timedelta)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('last_activity', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Cliente',
+                'verbose_name_plural': 'Resúmenes de Clientes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['ciudad'], name='client_ciudad_idx'),
+        ),
+    ]
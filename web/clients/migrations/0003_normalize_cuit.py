@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def normalize_cuit(apps, schema_editor):
+    """Quita guiones y espacios de los CUIT cargados antes de normalizarlos en ClientForm"""
+    Client = apps.get_model('clients', 'Client')
+    taken = set(Client.objects.values_list('cuit', flat=True))
+    for client in Client.objects.filter(cuit__regex=r'[- ]').only('id', 'cuit').iterator():
+        normalized = client.cuit.replace('-', '').replace(' ', '')
+        # Si ya existe el mismo CUIT sin guiones es un duplicado: se deja como está para revisarlo a mano
+        if normalized in taken:
+            continue
+        taken.discard(client.cuit)
+        taken.add(normalized)
+        client.cuit = normalized
+        client.save(update_fields=['cuit'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_clientsummary_ciudad_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_cuit, migrations.RunPython.noop),
+    ]
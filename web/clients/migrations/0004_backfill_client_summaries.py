@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+INACTIVE_STATES = ('cerrada', 'cancelada')
+
+
+def backfill_client_summaries(apps, schema_editor):
+    """
+    Llena ClientSummary para todos los clientes (misma cuenta que
+    rebuild_client_summaries, con los modelos históricos). Va después de
+    llenar WorkLogDailyRollup, de donde salen las horas.
+    """
+    Client = apps.get_model('clients', 'Client')
+    ClientSummary = apps.get_model('clients', 'ClientSummary')
+    WorkOrder = apps.get_model('work_order', 'WorkOrder')
+    WorkLogDailyRollup = apps.get_model('worklog', 'WorkLogDailyRollup')
+
+    orders = {
+        row['cliente']: row
+        for row in (
+            WorkOrder.objects.values('cliente')
+            .annotate(
+                total=Count('id'),
+                active=Count('id', filter=~Q(estado__in=INACTIVE_STATES)),
+                last_created=Max('fecha_creacion'),
+            )
+            .order_by()
+        )
+    }
+    hours = {
+        row['work_order_ref__cliente']: row
+        for row in (
+            WorkLogDailyRollup.objects.values('work_order_ref__cliente')
+            .annotate(duration=Sum('duration'), entries=Sum('entries'), last_day=Max('day'))
+            .order_by()
+        )
+    }
+
+    summaries = []
+    for client_id in Client.objects.values_list('id', flat=True):
+        orders_row = orders.get(client_id, {})
+        hours_row = hours.get(client_id, {})
+        days = [day for day in (
+            hours_row.get('last_day'),
+            orders_row.get('last_created') and timezone.localdate(orders_row['last_created']),
+        ) if day]
+        summaries.append(ClientSummary(
+            client_id=client_id,
+            active_orders=orders_row.get('active', 0),
+            total_orders=orders_row.get('total', 0),
+            hours=hours_row.get('duration') or timedelta(),
+            entries=hours_row.get('entries') or 0,
+            last_activity=max(days) if days else None,
+        ))
+    ClientSummary.objects.all().delete()
+    ClientSummary.objects.bulk_create(summaries, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_normalize_cuit'),
+        ('work_order', '0004_workorderattachment_nombre_original'),
+        ('worklog', '0012_backfill_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_client_summaries, migrations.RunPython.noop),
+    ]
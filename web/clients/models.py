@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.db import models
 
 class Client(models.Model):
@@ -15,6 +17,35 @@ class Client(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['razon_social'] # Ordenar por razón social por defecto
+        indexes = [
+            # Búsqueda por prefijo del directorio (razon_social y cuit ya tienen índice único)
+            models.Index(fields=['ciudad'], name='client_ciudad_idx'),
+        ]
+
+    def __str__(self):
+        return self.razon_social
+
+
+class ClientSummary(models.Model):
+    """
+    Cifras por cliente para el directorio y el detalle: órdenes activas, horas
+    cargadas y última actividad. Se mantiene incrementalmente al guardar o borrar
+    órdenes y tareas; ver clients/summary.py.
+    """
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    active_orders = models.PositiveIntegerField(default=0)
+    total_orders = models.PositiveIntegerField(default=0)
+    hours = models.DurationField(default=timedelta)
+    entries = models.PositiveIntegerField(default=0)
+    last_activity = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de Cliente"
+        verbose_name_plural = "Resúmenes de Clientes"
+
+    def total_hours(self):
+        return round(self.hours.total_seconds() / 3600, 2)
 
     def __str__(self):
-        return self.razon_social
\ No newline at end of file
+        return f"{self.client}: {self.active_orders} órdenes activas, {self.total_hours()} hs"
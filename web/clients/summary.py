@@ -0,0 +1,114 @@
+"""
+Resúmenes por cliente (ClientSummary) para el directorio de clientes.
+
+Cada fila guarda, para un cliente, cuántas órdenes tiene (y cuántas siguen
+activas), las horas cargadas a esas órdenes y el día de la última actividad
+(última tarea o alta de orden). Las horas salen de WorkLogDailyRollup, no de
+recorrer las tareas. Se recalculan solo los clientes afectados:
+
+- refresh_daily_rollups() avisa los clientes de las órdenes cuyos días cambiaron,
+  así que cubre altas, ediciones y bajas de tareas (también las masivas).
+- Las señales de WorkOrder cubren alta, cambio de estado o de cliente y baja.
+
+rebuild_client_summaries() rehace la tabla completa después de cargas masivas.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import Client, ClientSummary
+
+# Las mismas que no se ofrecen al cargar tareas
+INACTIVE_STATES = ('cerrada', 'cancelada')
+
+
+def _summaries(client_ids):
+    """Arma los ClientSummary de los clientes indicados con dos consultas agrupadas"""
+    from work_order.models import WorkOrder
+    from worklog.models import WorkLogDailyRollup
+
+    orders = WorkOrder.objects.all()
+    rollups = WorkLogDailyRollup.objects.all()
+    if client_ids is not None:
+        orders = orders.filter(cliente_id__in=client_ids)
+        rollups = rollups.filter(work_order_ref__cliente_id__in=client_ids)
+
+    by_client = {
+        row['cliente']: row
+        for row in (
+            orders.values('cliente')
+            .annotate(
+                total=Count('id'),
+                active=Count('id', filter=~Q(estado__in=INACTIVE_STATES)),
+                last_created=Max('fecha_creacion'),
+            )
+            .order_by()
+        )
+    }
+    hours = {
+        row['work_order_ref__cliente']: row
+        for row in (
+            rollups.values('work_order_ref__cliente')
+            .annotate(duration=Sum('duration'), entries=Sum('entries'), last_day=Max('day'))
+            .order_by()
+        )
+    }
+
+    summaries = []
+    for client_id in (client_ids if client_ids is not None else Client.objects.values_list('id', flat=True)):
+        orders_row = by_client.get(client_id, {})
+        hours_row = hours.get(client_id, {})
+        days = [day for day in (
+            hours_row.get('last_day'),
+            orders_row.get('last_created') and timezone.localdate(orders_row['last_created']),
+        ) if day]
+        summaries.append(ClientSummary(
+            client_id=client_id,
+            active_orders=orders_row.get('active', 0),
+            total_orders=orders_row.get('total', 0),
+            hours=hours_row.get('duration') or timedelta(),
+            entries=hours_row.get('entries') or 0,
+            last_activity=max(days) if days else None,
+        ))
+    return summaries
+
+
+def refresh_client_summaries(client_ids):
+    """Recalcula los resúmenes de los clientes indicados"""
+    client_ids = {client_id for client_id in client_ids if client_id is not None}
+    if not client_ids:
+        return
+
+    with transaction.atomic():
+        # Bloquear los clientes (en orden) antes de agregar, para que dos recálculos
+        # concurrentes no se pisen con datos viejos; un cliente borrado no vuelve a
+        # tener fila (CASCADE ya la quitó)
+        client_ids = set(
+            Client.objects.select_for_update().filter(id__in=client_ids)
+            .order_by('id').values_list('id', flat=True)
+        )
+        summaries = _summaries(client_ids)
+        ClientSummary.objects.filter(client_id__in=client_ids).delete()
+        ClientSummary.objects.bulk_create(summaries)
+
+
+def refresh_for_work_orders(work_order_ids):
+    """Recalcula los clientes de las órdenes indicadas"""
+    from work_order.models import WorkOrder
+
+    work_order_ids = {work_order_id for work_order_id in work_order_ids if work_order_id is not None}
+    if work_order_ids:
+        refresh_client_summaries(
+            WorkOrder.objects.filter(id__in=work_order_ids).values_list('cliente_id', flat=True).distinct()
+        )
+
+
+def rebuild_client_summaries(batch_size=2000):
+    """Reconstruye la tabla completa; va después de rebuild_daily_rollups()"""
+    with transaction.atomic():
+        summaries = _summaries(None)
+        ClientSummary.objects.all().delete()
+        ClientSummary.objects.bulk_create(summaries, batch_size=batch_size)
+    return len(summaries)
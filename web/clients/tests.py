@@ -1,3 +1,131 @@
+from datetime import datetime, timedelta
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from work_order.models import WorkOrder
+from worklog.models import WorkLog
+
+from .forms import ClientForm
+from .models import Client, ClientSummary
+from .summary import rebuild_client_summaries
+from .views import search_clients
+
+
+def make_client(razon_social, cuit, ciudad='Rosario'):
+    return Client.objects.create(razon_social=razon_social, cuit=cuit, ciudad=ciudad, provincia='Santa Fe')
+
+
+class SearchClientsTests(TestCase):
+    def setUp(self):
+        self.acme = make_client('Acme SA', '30712345678')
+        self.beta = make_client('Beta SRL', '20123456782', ciudad='Funes')
+
+    def search(self, query):
+        return set(search_clients(Client.objects.all(), query))
+
+    def test_undashed_cuit_prefix(self):
+        self.assertEqual(self.search('3071234'), {self.acme})
+
+    def test_dashed_cuit(self):
+        self.assertEqual(self.search('30-71234567-8'), {self.acme})
+        self.assertEqual(self.search('20-1234'), {self.beta})
+
+    def test_terms_combine_name_and_city(self):
+        self.assertEqual(self.search('beta fun'), {self.beta})
+        self.assertEqual(self.search('acme fun'), set())
+
+
+class ClientFormCuitTests(TestCase):
+    def data(self, cuit):
+        return {'razon_social': 'Gamma SA', 'cuit': cuit, 'ciudad': 'Rosario', 'provincia': 'Santa Fe'}
+
+    def test_cuit_is_stored_without_dashes(self):
+        form = ClientForm(data=self.data('30-71234567-8'))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().cuit, '30712345678')
+
+    def test_dashed_duplicate_is_rejected(self):
+        make_client('Acme SA', '30712345678')
+        form = ClientForm(data=self.data('30-71234567-8'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('cuit', form.errors)
+
+
+class NormalizeCuitMigrationTests(TestCase):
+    def test_strips_dashes_and_keeps_duplicates(self):
+        dashed = make_client('Acme SA', '30-71234567-8')
+        plain = make_client('Beta SRL', '20123456782')
+        duplicate = make_client('Beta SRL (dup)', '20-12345678-2')
+
+        migration = import_module('clients.migrations.0003_normalize_cuit')
+        migration.normalize_cuit(apps, None)
+
+        for client in (dashed, plain, duplicate):
+            client.refresh_from_db()
+        self.assertEqual(dashed.cuit, '30712345678')
+        self.assertEqual(plain.cuit, '20123456782')
+        self.assertEqual(duplicate.cuit, '20-12345678-2')
+
+
+class ClientSummaryTests(TestCase):
+    def setUp(self):
+        self.tecnico = get_user_model().objects.create_user('tecnico', password='x', user_type='tecnico')
+        self.acme = make_client('Acme SA', '30712345678')
+        self.beta = make_client('Beta SRL', '20123456782')
+        self.start = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+        self.abierta = self.order('OT-1', self.acme)
+        self.cerrada = self.order('OT-2', self.acme, estado='cerrada')
+
+    def order(self, numero, cliente, **extra):
+        return WorkOrder.objects.create(numero=numero, cliente=cliente, titulo='Prueba', **extra)
+
+    def task(self, order, start, hours):
+        return WorkLog.objects.create(
+            technician=self.tecnico, start=start, end=start + timedelta(hours=hours),
+            task_type='Taller', description='Prueba', work_order_ref=order,
+            status=order.estado,  # sin cambiar el estado de la orden
+        )
+
+    def summary(self, client):
+        row = ClientSummary.objects.filter(client=client).first()
+        if row is None:  # cliente sin órdenes todavía
+            return 0, 0, timedelta(), 0, None
+        return row.active_orders, row.total_orders, row.hours, row.entries, row.last_activity
+
+    def test_counts_orders_and_hours(self):
+        self.task(self.abierta, self.start, 2)
+        self.task(self.cerrada, self.start + timedelta(days=1), 1)
+        self.assertEqual(
+            self.summary(self.acme),
+            (1, 2, timedelta(hours=3), 2, max(timezone.localdate(), self.start.date() + timedelta(days=1))),
+        )
+        self.assertEqual(self.summary(self.beta)[:4], (0, 0, timedelta(), 0))
+
+    def test_deleting_a_task_subtracts_its_hours(self):
+        self.task(self.abierta, self.start, 2)
+        self.task(self.abierta, self.start + timedelta(hours=3), 1).delete()
+        self.assertEqual(self.summary(self.acme)[2:4], (timedelta(hours=2), 1))
+
+    def test_order_moved_to_another_client_takes_its_hours(self):
+        self.task(self.abierta, self.start, 2)
+        self.task(self.cerrada, self.start, 1)
+        self.abierta.cliente = self.beta
+        self.abierta.save()
+        self.assertEqual(self.summary(self.acme)[:4], (0, 1, timedelta(hours=1), 1))
+        self.assertEqual(self.summary(self.beta)[:4], (1, 1, timedelta(hours=2), 1))
+
+    def test_migration_backfills_every_client(self):
+        self.task(self.abierta, self.start, 2)
+        expected = {client.pk: self.summary(client) for client in (self.acme, self.beta)}
+        ClientSummary.objects.all().delete()
 
-# Create your tests here.
+        migration = import_module('clients.migrations.0004_backfill_client_summaries')
+        migration.backfill_client_summaries(apps, None)
+        self.assertEqual(ClientSummary.objects.count(), 2)
+        self.assertEqual({client.pk: self.summary(client) for client in (self.acme, self.beta)}, expected)
+        self.assertEqual(rebuild_client_summaries(), 2)
+        self.assertEqual({client.pk: self.summary(client) for client in (self.acme, self.beta)}, expected)
@@ -2,35 +2,61 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 
 from .models import Client
 from .forms import ClientForm
+from .summary import INACTIVE_STATES
+from core.autocomplete import MAX_QUERY_LENGTH
+from core.db import read_only_view
 
 # Importa CustomUser para acceder a los tipos de usuario
 from accounts.models import CustomUser 
+from accounts.roles import get_roles
+
+ACTIVE_ORDERS_SHOWN = 10  # órdenes activas que se listan en el detalle del cliente
 
 # --- Funciones de ayuda para permisos ---
 def can_manage_clients(user):
     # Administrador, Supervisor, Operador pueden crear/editar
-    return user.user_type in ['admin', 'supervisor', 'operador']
+    return get_roles(user).can_manage_clients
 
 def can_delete_client(user):
     # Solo Administrador puede eliminar
-    return user.user_type == 'admin'
+    return get_roles(user).can_delete_clients
 
 # --- Vistas del CRUD de Clientes ---
 
+def search_clients(queryset, query):
+    """
+    Cada palabra tiene que ser prefijo de la razón social, el CUIT o la ciudad
+    (LIKE 'q%', que usa el índice de cada columna, igual que core/autocomplete.py)
+    """
+    for term in query.split()[:3]:
+        condition = Q(razon_social__istartswith=term) | Q(ciudad__istartswith=term)
+        # El CUIT se guarda sin guiones (ClientForm.clean_cuit y la migración 0003)
+        digits = term.replace('-', '')
+        if digits.isdigit():
+            condition |= Q(cuit__startswith=digits)
+        queryset = queryset.filter(condition)
+    return queryset
+
+
 @login_required
+@read_only_view
 def client_list(request):
-    clients = Client.objects.all().order_by('razon_social')
+    query = request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    # Las cifras de cada cliente vienen de ClientSummary (un LEFT JOIN), no de agregar órdenes y tareas
+    clients = search_clients(Client.objects.select_related('summary'), query).order_by('razon_social')
     paginator = Paginator(clients, 10) # 10 clientes por página
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    return render(request, 'clients/client_list.html', {'page_obj': page_obj})
+    return render(request, 'clients/client_list.html', {'page_obj': page_obj, 'query': query})
 
 @login_required
+@read_only_view
 def dashboard(request):
     context = {
         'client_count': Client.objects.count(),
@@ -54,8 +80,13 @@ def client_create(request):
     return render(request, 'clients/client_form.html', {'form': form, 'title': 'Crear Nuevo Cliente'})
 
 @login_required
+@read_only_view
 def client_detail(request, client_id):
-    client = get_object_or_404(Client, id=client_id)
+    client = get_object_or_404(Client.objects.select_related('summary'), id=client_id)
+    active_orders = (
+        client.ordenes.exclude(estado__in=INACTIVE_STATES)
+        .select_related('asignado_a').order_by('-fecha_creacion')[:ACTIVE_ORDERS_SHOWN]
+    )
     # Para la vista de detalle, el formulario será de solo lectura si el usuario no puede editar
     if not can_manage_clients(request.user):
         form = ClientForm(instance=client)
@@ -67,6 +98,8 @@ def client_detail(request, client_id):
         
     return render(request, 'clients/client_detail.html', {
         'client': client,
+        'summary': getattr(client, 'summary', None),
+        'active_orders': active_orders,
         'form': form,
         'can_edit': can_manage_clients(request.user), # Pasa el permiso para mostrar botones
         'title': f'Detalle del Cliente: {client.razon_social}'
@@ -0,0 +1,139 @@
+"""
+Autocompletado de los selectores de órdenes, clientes y usuarios.
+
+Los <select> con AutocompleteSelect solo traen del servidor la opción elegida;
+las demás se buscan en /core/autocomplete/<fuente>/?q= a medida que se escribe
+(core/static/core/autocomplete.js). Cada palabra buscada tiene que ser prefijo
+de alguna de las columnas de la fuente (LIKE 'q%', que usa el índice de cada
+columna) y las respuestas se cachean AUTOCOMPLETE_CACHE_SECONDS.
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Callable
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+
+from .db import read_only_view
+
+LIMIT = 20
+MAX_QUERY_LENGTH = 60
+
+
+def _work_orders():
+    from work_order.models import WorkOrder
+    return WorkOrder.objects.all()
+
+
+def _active_work_orders():
+    # Las mismas que ofrecen los formularios de tareas
+    return _work_orders().exclude(estado__in=['cerrada', 'cancelada'])
+
+
+def _clients():
+    from clients.models import Client
+    return Client.objects.all()
+
+
+def _users():
+    return get_user_model().objects.all()
+
+
+def _technicians():
+    return _users().filter(user_type='tecnico')
+
+
+@dataclass(frozen=True)
+class Source:
+    queryset: Callable
+    fields: tuple  # columnas con índice en las que se busca por prefijo
+    ordering: tuple
+    label_fields: tuple  # las que usa __str__ del modelo
+
+    def search(self, query):
+        queryset = self.queryset()
+        for term in query.split()[:3]:
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__istartswith': term})
+            queryset = queryset.filter(condition)
+        rows = list(queryset.order_by(*self.ordering).only('pk', *self.label_fields)[:LIMIT + 1])
+        return {
+            'results': [{'id': row.pk, 'text': str(row)} for row in rows[:LIMIT]],
+            'more': len(rows) > LIMIT,
+        }
+
+
+_WORK_ORDER = dict(fields=('numero', 'titulo'), ordering=('-fecha_creacion',), label_fields=('numero', 'titulo'))
+_USER = dict(
+    fields=('username', 'first_name', 'last_name'), ordering=('first_name', 'last_name', 'username'),
+    label_fields=('username', 'user_type'),
+)
+
+SOURCES = {
+    'ordenes': Source(_work_orders, **_WORK_ORDER),
+    'ordenes-activas': Source(_active_work_orders, **_WORK_ORDER),
+    'clientes': Source(_clients, fields=('razon_social', 'cuit'), ordering=('razon_social',), label_fields=('razon_social',)),
+    'usuarios': Source(_users, **_USER),
+    'tecnicos': Source(_technicians, **_USER),
+}
+
+
+@login_required
+@read_only_view
+def autocomplete(request, source):
+    if source not in SOURCES:
+        raise Http404("Fuente de autocompletado desconocida.")
+    query = request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    seconds = getattr(settings, 'AUTOCOMPLETE_CACHE_SECONDS', 30)
+
+    key = f"autocomplete:{source}:{hashlib.md5(query.lower().encode()).hexdigest()}"
+    data = cache.get(key)
+    if data is None:
+        data = SOURCES[source].search(query)
+        cache.set(key, data, seconds)
+
+    response = JsonResponse(data)
+    patch_cache_control(response, private=True, max_age=seconds)
+    return response
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select de un ModelChoiceField que renderiza solo la opción vacía y la
+    elegida, en lugar de recorrer todo el queryset; las demás opciones las
+    carga autocomplete.js desde la fuente indicada.
+    """
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs={'class': 'form-select', **(attrs or {})})
+        self.source = source
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('autocomplete', args=[self.source])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = getattr(self.choices, 'field', None)
+        if field is None:
+            return super().optgroups(name, value, attrs)
+
+        selected = [v for v in value if v not in ('', None)]
+        options = [('', field.empty_label)] if field.empty_label is not None else []
+        if selected:
+            key = field.to_field_name or 'pk'
+            options += [self.choices.choice(obj) for obj in field.queryset.filter(**{f'{key}__in': selected})]
+
+        all_choices, self.choices = self.choices, options
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
@@ -0,0 +1,227 @@
+"""
+Casos de benchmark de los caminos más usados de la web, la API y el bot.
+
+Cada caso se ejecuta en proceso (cliente de pruebas de Django o el handler del
+bot con objetos de Telegram simulados) y se mide tiempo y cantidad de consultas.
+Los usuarios y datos salen de seed_benchmark_data; ver run_benchmarks para la
+ejecución y el formato del JSON de resultados.
+"""
+import asyncio
+import importlib
+import statistics
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from .middleware import QueryRecorder
+
+SEED_PREFIX = 'bench_'
+SUPERVISOR_USERNAME = f'{SEED_PREFIX}supervisor'
+TECHNICIAN_USERNAME = f'{SEED_PREFIX}tec_000'
+
+
+@dataclass
+class Case:
+    name: str
+    description: str
+    run: Callable  # run(context) -> dict con datos extra (status, bytes, etc.)
+
+
+def _track_queries(stack, recorder):
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(recorder))
+
+
+def _measure(func, context):
+    recorder = QueryRecorder(slow_query_seconds=float('inf'))
+    # Los casos que corren dentro de un event loop lo necesitan (ver _run_in_loop)
+    context['recorder'] = recorder
+    with ExitStack() as stack:
+        _track_queries(stack, recorder)
+        started = time.perf_counter()
+        extra = func(context) or {}
+        elapsed = time.perf_counter() - started
+    return elapsed, recorder, extra
+
+
+def run_case(case, context, repeat):
+    """Ejecuta el caso una vez para calentar y luego 'repeat' veces midiendo"""
+    _measure(case.run, context)
+    timings, queries, duplicates, extra = [], [], [], {}
+    for _ in range(repeat):
+        elapsed, recorder, extra = _measure(case.run, context)
+        timings.append(elapsed * 1000)
+        queries.append(recorder.count)
+        duplicates.append(recorder.duplicates)
+    timings.sort()
+    return {
+        'description': case.description,
+        'repeat': repeat,
+        'ms': {
+            'min': round(timings[0], 2),
+            'median': round(statistics.median(timings), 2),
+            'p95': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            'max': round(timings[-1], 2),
+        },
+        'queries': max(queries),
+        'duplicate_queries': max(duplicates),
+        **extra,
+    }
+
+
+# ----------------------------
+# Web y API
+# ----------------------------
+
+def _client_for(user):
+    # Un error 500 se registra como resultado del caso en lugar de cortar la corrida
+    client = Client(raise_request_exception=False)
+    client.force_login(user)
+    return client
+
+
+def _get(client_key, url_builder):
+    def run(context):
+        response = context[client_key].get(url_builder(context))
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return {'status': response.status_code, 'bytes': len(body)}
+    return run
+
+
+def _week_query(context):
+    return f"?week={context['week_start'].isoformat()}"
+
+
+# ----------------------------
+# Bot (handlers reales con Update/CallbackQuery simulados)
+# ----------------------------
+
+class _FakeChat:
+    def __init__(self, chat_id):
+        self.id = chat_id
+
+
+class _FakeMessage:
+    def __init__(self, chat_id):
+        self.chat = _FakeChat(chat_id)
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append((text, kwargs.get('reply_markup')))
+
+
+class _FakeUpdate:
+    def __init__(self, chat_id):
+        self.effective_chat = _FakeChat(chat_id)
+        self.message = _FakeMessage(chat_id)
+
+
+class _FakeCallbackQuery:
+    def __init__(self, chat_id, data=''):
+        self.message = _FakeMessage(chat_id)
+        self.data = data
+        self.edits = []
+
+    async def edit_message_text(self, text, **kwargs):
+        self.edits.append((text, kwargs.get('reply_markup')))
+
+
+def _buttons(markup):
+    return sum(len(row) for row in markup.inline_keyboard) if markup else 0
+
+
+def _run_in_loop(context, coro):
+    """
+    Dentro del event loop Django usa otras conexiones (asgiref.Local), así que
+    el registro de consultas se vuelve a instalar ahí.
+    """
+    async def run():
+        with ExitStack() as stack:
+            _track_queries(stack, context['recorder'])
+            return await coro
+    return asyncio.run(run())
+
+
+def _bot_command(handler_name):
+    def run(context):
+        update = _FakeUpdate(context['chat_id'])
+        _run_in_loop(context, getattr(context['bot'], handler_name)(update, None))
+        text, markup = update.message.replies[-1]
+        return {'reply': text[:60], 'buttons': _buttons(markup)}
+    return run
+
+
+def _bot_callback(handler_name, data=None):
+    def run(context):
+        query = _FakeCallbackQuery(context['chat_id'], data(context) if data else '')
+        _run_in_loop(context, getattr(context['bot'], handler_name)(query, None))
+        text, markup = query.edits[-1]
+        return {'reply': text[:60], 'buttons': _buttons(markup)}
+    return run
+
+
+WEB_CASES = [
+    Case('worklog_list_tecnico', 'WorkLogListView sin filtros (técnico)',
+         _get('tech_client', lambda c: reverse('worklog-list'))),
+    Case('worklog_list_supervisor_semana', 'WorkLogListView ?week= (supervisor)',
+         _get('supervisor_client', lambda c: reverse('worklog-list') + _week_query(c))),
+    Case('orden_list_supervisor', 'OrdenListView primera página (supervisor)',
+         _get('supervisor_client', lambda c: reverse('work_order:list'))),
+    Case('orden_list_tecnico', 'OrdenListView primera página (técnico)',
+         _get('tech_client', lambda c: reverse('work_order:list'))),
+    Case('orden_detail', 'OrdenDetailView de la orden con más tareas (supervisor)',
+         _get('supervisor_client', lambda c: reverse('work_order:detail', args=[c['busiest_order_id']]))),
+    Case('export_excel_supervisor_semana', 'export_worklogs_excel ?week= (supervisor)',
+         _get('supervisor_client', lambda c: reverse('worklog-export') + _week_query(c))),
+    Case('workorder_api_list', 'WorkOrderViewSet list (supervisor)',
+         _get('supervisor_client', lambda c: reverse('work_order:workorder-list'))),
+]
+
+BOT_CASES = [
+    Case('bot_tareas', '/tareas del bot (técnico)', _bot_command('tareas')),
+    Case('bot_ver_ots', '/ver_OTs del bot (técnico)', _bot_command('ver_OTs')),
+    Case('bot_volver_tareas', 'Callback volver a tareas (técnico)', _bot_callback('volver_tareas_callback')),
+    Case('bot_volver_ordenes', 'Callback volver a órdenes (técnico)', _bot_callback('volver_ordenes_callback')),
+    Case('bot_ver_tarea', 'Callback detalle de la última tarea (técnico)',
+         _bot_callback('show_task_detail', lambda c: c['bot'].encode(c['bot'].VER_TAREA, c['last_task_id']))),
+    Case('bot_ver_orden', 'Callback detalle de la orden con más tareas (técnico)',
+         _bot_callback('show_work_order_detail', lambda c: c['bot'].encode(c['bot'].VER_ORDEN, c['busiest_order_id']))),
+]
+
+
+def build_context(supervisor, technician):
+    """Datos compartidos por los casos: clientes autenticados, semana de referencia, etc."""
+    from django.db.models import Count, Max
+    from django.utils import timezone
+    from worklog.models import WorkLog
+    from work_order.models import WorkOrder
+
+    last_start = WorkLog.objects.aggregate(last=Max('start'))['last'] or timezone.now()
+    last_day = timezone.localdate(last_start)
+    busiest = (
+        WorkOrder.objects.filter(asignado_a=technician)
+        .annotate(n=Count('worklogs')).order_by('-n').values_list('id', flat=True).first()
+    ) or WorkOrder.objects.values_list('id', flat=True).first()
+    last_task = WorkLog.objects.filter(technician=technician).order_by('-start').values_list('id', flat=True).first()
+
+    context = {
+        'supervisor_client': _client_for(supervisor),
+        'tech_client': _client_for(technician),
+        'week_start': last_day - timedelta(days=last_day.weekday()),
+        'busiest_order_id': busiest,
+        'last_task_id': last_task,
+        'chat_id': int(technician.telegram_chat_id or 0),
+        'bot': None,
+        'bot_error': None,
+    }
+    try:
+        context['bot'] = importlib.import_module('bot')
+    except Exception as e:  # faster-whisper o telegram no instalados
+        context['bot_error'] = f"{type(e).__name__}: {e}"
+    return context
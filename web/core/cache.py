@@ -0,0 +1,16 @@
+"""
+Utilidades sobre la caché de Django.
+"""
+from django.conf import settings
+
+# Backends que guardan los datos en la memoria de cada proceso
+PER_PROCESS_BACKENDS = ('LocMemCache', 'DummyCache')
+
+
+def is_shared(alias='default'):
+    """
+    True si todos los procesos ven la misma caché (redis, memcached, base de datos...).
+    Con la caché en memoria cada worker de gunicorn tiene la suya: borrar una clave
+    en uno no la borra en los demás y los contadores se reparten entre workers.
+    """
+    return not settings.CACHES[alias]['BACKEND'].endswith(PER_PROCESS_BACKENDS)
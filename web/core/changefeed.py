@@ -0,0 +1,103 @@
+"""
+Feed incremental de cambios sobre órdenes de trabajo y tareas.
+
+Los cambios se registran con transaction.on_commit, así que solo quedan en el
+feed las transacciones confirmadas y el id de cada entrada sigue el orden de
+commit. Las operaciones masivas que no pasan por save() (bulk_create, update)
+deben llamar a record_changes explícitamente. También quedan registrados los
+cambios que hace la base por las claves foráneas: las tareas que quedan sin
+orden al borrarla (work_order/signals.py) y las tareas borradas en cascada o
+sin colaborador al borrar un usuario (worklog/signals.py). Un cambio que no
+pase por ninguno de estos caminos (SQL a mano, un update() en la consola)
+no llega a los clientes hasta que vuelvan a sincronizar desde cero (sin cursor).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChangeLogEntry
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def record_change(instance, action, technician_id=None):
+    """Registra un cambio de una instancia al confirmarse la transacción actual"""
+    model, object_id = _label(type(instance)), instance.pk
+    transaction.on_commit(
+        lambda: ChangeLogEntry.objects.create(
+            model=model, object_id=object_id, action=action, technician_id=technician_id
+        )
+    )
+
+
+def record_changes(model, object_ids, action, technician_ids=None):
+    """
+    Versión masiva de record_change para bulk_create/bulk_update.
+    technician_ids: {pk: técnico} para las tareas.
+    """
+    label = _label(model)
+    technician_ids = technician_ids or {}
+    entries = [
+        ChangeLogEntry(model=label, object_id=pk, action=action, technician_id=technician_ids.get(pk))
+        for pk in object_ids if pk is not None
+    ]
+    if entries:
+        transaction.on_commit(lambda: ChangeLogEntry.objects.bulk_create(entries, batch_size=1000))
+
+
+def _settled_entries():
+    """Entradas más viejas que CHANGE_FEED_SAFETY_LAG_SECONDS (las únicas que se entregan)"""
+    lag = getattr(settings, 'CHANGE_FEED_SAFETY_LAG_SECONDS', 1)
+    queryset = ChangeLogEntry.objects.all()
+    if lag:
+        queryset = queryset.filter(timestamp__lte=timezone.now() - timedelta(seconds=lag))
+    return queryset
+
+
+def feed_position():
+    """
+    Cursor actual del feed, para tomarlo antes de leer una foto completa de los datos:
+    lo que cambie después se obtiene con read_feed(after=feed_position()).
+    """
+    last = _settled_entries().order_by('-id').values_list('id', flat=True).first()
+    return last or 0
+
+
+def read_feed(after=0, limit=DEFAULT_LIMIT, models=None, technician_id=None):
+    """
+    Devuelve (entradas, siguiente_cursor, hay_más) con las entradas posteriores a 'after'.
+    Las entradas más nuevas que CHANGE_FEED_SAFETY_LAG_SECONDS se retienen para no
+    saltear ids asignados por inserciones concurrentes que todavía no son visibles.
+    Con technician_id, solo las de ese técnico (y las anteriores a registrar el técnico).
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    queryset = _settled_entries().filter(id__gt=after)
+    if models:
+        queryset = queryset.filter(model__in=models)
+    if technician_id is not None:
+        queryset = queryset.filter(Q(technician_id=technician_id) | Q(technician_id__isnull=True))
+
+    entries = list(queryset.order_by('id')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    next_cursor = entries[-1].id if entries else after
+    return entries, next_cursor, has_more
+
+
+def serialize_entry(entry):
+    return {
+        'seq': entry.id,
+        'model': entry.model,
+        'object_id': entry.object_id,
+        'action': entry.action,
+        'timestamp': entry.timestamp.isoformat(),
+    }
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+from .cache import is_shared as cache_is_shared
+
+SESSION_BACKENDS = ('db', 'cached_db', 'signed_cookies')
+
+
+@register()
+def check_session_backend(app_configs, **kwargs):
+    backend = getattr(settings, 'SESSION_BACKEND', 'db')
+    if backend not in SESSION_BACKENDS:
+        return [Error(
+            f"SESSION_BACKEND='{backend}' no es válido.",
+            hint=f"Usar uno de: {', '.join(SESSION_BACKENDS)}.",
+            id='core.E001',
+        )]
+    if backend == 'cached_db' and not cache_is_shared():
+        # Cada worker tendría su copia: una sesión cerrada en uno sigue viva en la caché de otro
+        return [Warning(
+            'SESSION_BACKEND=cached_db con la caché en memoria del proceso.',
+            hint='Definir CACHE_URL con una caché compartida (redis://...) antes de usarlo con varios workers.',
+            id='core.W001',
+        )]
+    return []
+
+
+@register()
+def check_login_throttle_cache(app_configs, **kwargs):
+    limits = (settings.LOGIN_THROTTLE_ATTEMPTS, settings.LOGIN_THROTTLE_IP_ATTEMPTS)
+    if settings.DEBUG or not any(limits) or cache_is_shared():
+        return []
+    # Cada worker cuenta sus propios fallos y uno reciclado arranca de cero
+    return [Warning(
+        'Los intentos fallidos de login se cuentan en la caché en memoria del proceso.',
+        hint='El límite real queda multiplicado por los workers de gunicorn. Definir CACHE_URL con una '
+             'caché compartida (dbcache://django_cache o redis://...).',
+        id='core.W002',
+    )]
@@ -0,0 +1,90 @@
+"""
+Ruteo de lecturas a la réplica de MariaDB.
+
+Las vistas de solo lectura (listados, detalles, exportaciones, dashboards) se
+marcan con @read_only_view: no abren la transacción de ATOMIC_REQUESTS y, si
+hay una réplica configurada (DB_REPLICA_HOST), sus consultas GET se leen de
+ella. El resto de las vistas, el bot y los comandos siguen usando 'default'.
+
+Después de un request que escribe (POST/PUT/PATCH/DELETE) el navegador queda
+"fijado" al primario unos segundos (cookie), para que la redirección al
+listado no muestre datos desactualizados por el retraso de replicación.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_enabled():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def read_only_view(view):
+    """
+    Marca una vista de solo lectura: sin transacción por request y con lecturas
+    desde la réplica. Para vistas basadas en clases usar
+    @method_decorator(read_only_view, name='dispatch').
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return view(*args, **kwargs)
+
+    wrapper = transaction.non_atomic_requests(wrapper)
+    wrapper.use_replica = True
+    return wrapper
+
+
+class ReplicaRouter:
+    """Lecturas a la réplica solo dentro de vistas marcadas; escrituras y migraciones al primario"""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_enabled():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica tiene los mismos datos que el primario
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                _use_replica.reset(request._replica_token)
+
+        if request.method not in SAFE_METHODS and replica_enabled():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'DB_REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (getattr(view_func, 'use_replica', False)
+                and request.method in SAFE_METHODS
+                and PIN_COOKIE not in request.COOKIES):
+            request._replica_token = _use_replica.set(True)
+        return None
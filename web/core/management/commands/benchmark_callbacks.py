@@ -0,0 +1,72 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+import bot_callbacks
+from bot_callbacks import ACTIONS, BOOL, ID, NONE, CallbackRouter, decode, encode
+
+# Cadena de startswith del router anterior, en el mismo orden, como referencia
+LEGACY_PREFIXES = [
+    ("ver_tarea:", False), ("ver_orden:", False), ("nueva_tarea_bot", True), ("work_order:", False),
+    ("task_type:", False), ("general_ops_subtype:", False), ("warranty:", False), ("status_direct:", False),
+    ("colaborador_direct:", False), ("colaborador_select:", False), ("save_task_direct", True),
+    ("edit_transcription", True), ("edit_transcription_text", True), ("edit_transcription_audio", True),
+    ("volver_tareas", True), ("volver_ordenes", True), ("cancelar", True),
+]
+LEGACY_SAMPLES = [
+    "ver_tarea:223074", "ver_orden:1680", "work_order:1680", "task_type:Operaciones generales",
+    "general_ops_subtype:Movimiento de vehiculos", "status_direct:en_espera_repuestos",
+    "colaborador_select:4312", "cancelar",
+]
+
+
+def legacy_route(data):
+    for prefix, exact in LEGACY_PREFIXES:
+        if (data == prefix) if exact else data.startswith(prefix):
+            return prefix, (None if exact else data.split(":")[1])
+    return None
+
+
+def _sample_value(action):
+    if action.kind == NONE:
+        return None
+    if action.kind == ID:
+        return 223074
+    if action.kind == BOOL:
+        return True
+    return max(action.kind, key=len)
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark del router de callbacks del bot (bot_callbacks.py) contra la cadena de startswith anterior"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=200_000, help="Resoluciones por medición")
+
+    def handle(self, *args, **options):
+        number = options["number"]
+        router = CallbackRouter()
+        for action in ACTIONS.values():
+            router.register(action, action.name)
+
+        samples = [encode(action, _sample_value(action)) for action in ACTIONS.values()]
+        longest = max(samples, key=len)
+        self.stdout.write(f"versión {bot_callbacks.VERSION}: {len(ACTIONS)} acciones, payload más largo {len(longest.encode())} bytes ({longest})")
+        legacy_longest = max(LEGACY_SAMPLES, key=len)
+        self.stdout.write(f"formato anterior: payload más largo {len(legacy_longest.encode())} bytes ({legacy_longest})")
+
+        def cold():
+            decode.cache_clear()
+            for data in samples:
+                router.resolve(data)
+
+        self.measure("cadena startswith (anterior)", lambda: [legacy_route(data) for data in LEGACY_SAMPLES], LEGACY_SAMPLES, number)
+        self.measure("router, decode en frío", cold, samples, number // 10)
+        self.measure("router, decode cacheado", lambda: [router.resolve(data) for data in samples], samples, number)
+        self.measure("botón viejo rechazado", lambda: [router.resolve(data) for data in LEGACY_SAMPLES], LEGACY_SAMPLES, number)
+        self.measure("encode", lambda: [encode(action, _sample_value(action)) for action in ACTIONS.values()], samples, number)
+
+    def measure(self, label, run, samples, number):
+        repeats = max(1, number // len(samples))
+        best = min(timeit.repeat(run, number=repeats, repeat=5))
+        self.stdout.write(f"{label:<30} {best / (repeats * len(samples)) * 1e9:8.0f} ns por callback")
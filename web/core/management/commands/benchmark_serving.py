@@ -0,0 +1,82 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import override_settings
+
+User = get_user_model()
+
+STARTUP_SNIPPET = (
+    "import time; t = time.perf_counter(); "
+    "from web.wsgi import application; "
+    "print(time.perf_counter() - t)"
+)
+
+
+class Command(BaseCommand):
+    help = "Mide el tiempo de arranque de la aplicación WSGI y el costo por request con DEBUG activado y desactivado"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", action="append", help="URL a medir (repetible). Por defecto: login y dashboard")
+        parser.add_argument("--username", help="Usuario autenticado para las URLs protegidas")
+        parser.add_argument("--requests", type=int, default=200, help="Requests por URL y modo")
+        parser.add_argument("--startup-runs", type=int, default=3, help="Arranques en frío a promediar")
+
+    def handle(self, *args, **options):
+        self.measure_startup(options["startup_runs"])
+
+        user = None
+        if options["username"]:
+            user = User.objects.filter(username=options["username"]).first()
+            if not user:
+                raise CommandError(f"Usuario '{options['username']}' no encontrado.")
+        urls = options["url"] or ["/accounts/login/", "/dashboard/"]
+
+        for debug in (True, False):
+            # El host del cliente de pruebas tiene que estar permitido también con DEBUG=False
+            with override_settings(DEBUG=debug, ALLOWED_HOSTS=["*"]):
+                client = Client()
+                if user:
+                    client.force_login(user)
+                for url in urls:
+                    self.measure_url(client, url, options["requests"], debug)
+
+    def measure_startup(self, runs):
+        timings = []
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, "-c", STARTUP_SNIPPET],
+                cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                raise CommandError(f"No se pudo cargar web.wsgi: {result.stderr.strip()}")
+            timings.append(float(result.stdout.strip().splitlines()[-1]))
+        self.stdout.write(
+            f"arranque WSGI: media {statistics.mean(timings) * 1000:.0f} ms "
+            f"(mín {min(timings) * 1000:.0f} ms, {runs} corridas)"
+        )
+
+    def measure_url(self, client, url, count, debug):
+        client.get(url)  # calentar caches y conexión
+        reset_queries()
+        timings = []
+        status_code = None
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+            status_code = response.status_code
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f"DEBUG={str(debug):<5} {url:<25} [{status_code}] "
+            f"media {statistics.mean(timings) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms, "
+            f"consultas guardadas en connection.queries: {len(connection.queries_log)}"
+        )
@@ -0,0 +1,92 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from core.benchmarks import SUPERVISOR_USERNAME
+from core.checks import SESSION_BACKENDS
+
+User = get_user_model()
+
+
+class TableCounter:
+    """execute_wrapper que cuenta consultas totales, a django_session y a los dispositivos OTP"""
+
+    def __init__(self):
+        self.total = self.session = self.otp = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        self.session += "django_session" in sql
+        self.otp += "otp_totp" in sql
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el costo por request autenticado con cada SESSION_BACKEND (db, cached_db, signed_cookies), "
+        "con y sin la sesión verificada por 2FA que resuelve OTPMiddleware"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default=SUPERVISOR_USERNAME, help="Usuario autenticado")
+        parser.add_argument("--url", default="/dashboard/", help="URL a medir")
+        parser.add_argument("--requests", type=int, default=200, help="Requests por combinación")
+        parser.add_argument("--backend", action="append", choices=SESSION_BACKENDS, help="Motores a medir (repetible; por defecto todos)")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["username"]).first()
+        if not user:
+            raise CommandError(f"Usuario '{options['username']}' no encontrado.")
+        device = TOTPDevice.objects.filter(user=user, confirmed=True).first()
+        if device is None:
+            self.stdout.write(self.style.WARNING(f"{user.username} no tiene 2FA confirmado: se mide solo sin dispositivo."))
+
+        self.stdout.write(f"caché: {settings.CACHES['default']['BACKEND']} — {options['url']}, {options['requests']} requests")
+        for backend in options["backend"] or SESSION_BACKENDS:
+            engine = f"django.contrib.sessions.backends.{backend}"
+            with override_settings(SESSION_ENGINE=engine, ALLOWED_HOSTS=["*"]):
+                for otp_device in (None, device) if device else (None,):
+                    client = self.login(user, otp_device)
+                    self.measure(client, backend, otp_device is not None, options["url"], options["requests"])
+
+    def login(self, user, device):
+        client = Client()
+        client.force_login(user)
+        if device is not None:
+            # Lo mismo que guarda django_otp.login() al verificar el código
+            session = client.session
+            session[DEVICE_ID_SESSION_KEY] = device.persistent_id
+            session.save()
+            # Con signed_cookies la clave es el contenido firmado: cambia al guardar
+            client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        return client
+
+    def measure(self, client, backend, otp, url, count):
+        response = client.get(url)  # calentar caché de sesión y conexión
+        if response.status_code != 200:
+            raise CommandError(f"{url} respondió {response.status_code} con SESSION_BACKEND={backend}")
+        counter = TableCounter()
+        timings = []
+        with connection.execute_wrapper(counter):
+            for _ in range(count):
+                started = time.perf_counter()
+                client.get(url)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        cookie = client.cookies.get(settings.SESSION_COOKIE_NAME)
+        self.stdout.write(
+            f"{backend:<15} 2FA={'sí' if otp else 'no':<3} "
+            f"media {statistics.mean(timings) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms, "
+            f"{counter.total / count:.1f} consultas/request "
+            f"({counter.session / count:.1f} django_session, {counter.otp / count:.1f} otp), "
+            f"cookie {len(cookie.value) if cookie else 0} bytes"
+        )
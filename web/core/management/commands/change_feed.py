@@ -0,0 +1,30 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.changefeed import DEFAULT_LIMIT, read_feed, serialize_entry
+
+
+class Command(BaseCommand):
+    help = "Imprime el feed de cambios (JSON por línea) a partir de un cursor; con --follow sigue esperando cambios nuevos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--after", type=int, default=0, help="Último seq ya procesado")
+        parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Entradas por lectura")
+        parser.add_argument("--model", action="append", help="Filtrar por modelo (p.ej. worklog.worklog); repetible")
+        parser.add_argument("--follow", action="store_true", help="Seguir leyendo cambios nuevos")
+        parser.add_argument("--interval", type=float, default=2.0, help="Segundos entre lecturas con --follow")
+
+    def handle(self, *args, **options):
+        cursor = options["after"]
+        while True:
+            entries, cursor, has_more = read_feed(after=cursor, limit=options["limit"], models=options["model"])
+            for entry in entries:
+                self.stdout.write(json.dumps(serialize_entry(entry)))
+            if has_more:
+                continue
+            if not options["follow"]:
+                break
+            time.sleep(options["interval"])
+        self.stderr.write(f"cursor={cursor}")
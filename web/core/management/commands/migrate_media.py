@@ -0,0 +1,77 @@
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand
+
+from core.changefeed import record_changes
+from core.storage import file_fields, is_content_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia los archivos subidos antes del almacenamiento por contenido (audios y adjuntos) "
+        "desde un directorio local al storage configurado y actualiza las filas con el nombre nuevo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", help="Directorio de origen (por defecto MEDIA_ROOT)")
+        parser.add_argument("--delete-source", action="store_true", help="Borrar el archivo de origen ya copiado")
+        parser.add_argument("--dry-run", action="store_true", help="Solo informar qué se copiaría")
+
+    def handle(self, *args, **options):
+        source = FileSystemStorage(location=Path(options["source"] or settings.MEDIA_ROOT))
+        copied = missing = 0
+        migrated = {}  # nombre de origen -> nombre nuevo (varias filas pueden compartir archivo)
+        updated = defaultdict(list)  # modelo -> pks con el nombre cambiado
+        for model, field in file_fields():
+            rows = (
+                model._default_manager.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                .values_list("pk", field).iterator(chunk_size=500)
+            )
+            for pk, name in rows:
+                if is_content_name(name):
+                    continue
+                if name in migrated:
+                    model._default_manager.filter(pk=pk).update(**{field: migrated[name]})
+                    updated[model].append(pk)
+                    continue
+                # Registros viejos guardaban la ruta con el prefijo media/
+                original = name if source.exists(name) else name.replace("media/", "", 1)
+                if not source.exists(original):
+                    missing += 1
+                    self.stdout.write(self.style.WARNING(f"{model._meta.label} {pk}: no existe {name}"))
+                    continue
+                if options["dry_run"]:
+                    self.stdout.write(f"{model._meta.label} {pk}: {name}")
+                    copied += 1
+                    continue
+                with source.open(original, "rb") as content:
+                    new_name = default_storage.save(original, content)
+                migrated[name] = new_name
+                # update(): sin pasar por save() (ni sus efectos sobre la orden y los resúmenes);
+                # el cambio de nombre se registra en el feed al final
+                model._default_manager.filter(pk=pk).update(**{field: new_name})
+                updated[model].append(pk)
+                if options["delete_source"]:
+                    source.delete(original)
+                copied += 1
+
+        self.record_changes(updated)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'A copiar' if options['dry_run'] else 'Copiados'}: {copied}, sin archivo: {missing}"
+        ))
+
+    def record_changes(self, updated):
+        """Los clientes sincronizados vuelven a leer las tareas y órdenes con archivos renombrados"""
+        from work_order.models import WorkOrder, WorkOrderAttachment
+        from worklog.models import WorkLog
+
+        for model, pks in updated.items():
+            if model is WorkLog:
+                owners = dict(WorkLog.objects.filter(pk__in=pks).values_list('id', 'technician_id'))
+                record_changes(WorkLog, pks, 'updated', technician_ids=owners)
+            elif model is WorkOrderAttachment:
+                orders = set(WorkOrderAttachment.objects.filter(pk__in=pks).values_list('orden_id', flat=True))
+                record_changes(WorkOrder, sorted(orders), 'updated')
@@ -0,0 +1,84 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from core.models import PendingFileDeletion
+from core.storage import purge_deleted_files
+
+
+def delete_in_chunks(queryset, pk_name, chunk, pause):
+    """Borra de a 'chunk' filas por clave primaria, cada tanda en su propia transacción corta"""
+    deleted = 0
+    while True:
+        keys = list(queryset.order_by().values_list(pk_name, flat=True)[:chunk])
+        if not keys:
+            return deleted
+        queryset.model._default_manager.filter(**{f"{pk_name}__in": keys}).delete()
+        deleted += len(keys)
+        if len(keys) < chunk:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra en tandas las sesiones vencidas de django_session y los dispositivos 2FA que nunca se "
+        "confirmaron, y elimina los archivos subidos que ya ninguna fila usa. Con --every queda corriendo "
+        "y repite la limpieza cada tantos segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=1000, help="Filas por DELETE")
+        parser.add_argument("--pause", type=float, default=0.1, help="Segundos de espera entre tandas, para no acaparar la base")
+        parser.add_argument(
+            "--otp-days", type=int, default=settings.OTP_UNCONFIRMED_DEVICE_DAYS,
+            help="Antigüedad en días de un dispositivo 2FA sin confirmar para borrarlo",
+        )
+        parser.add_argument(
+            "--media-grace", type=int, default=settings.MEDIA_DELETE_GRACE_SECONDS,
+            help="Segundos desde que un archivo quedó sin uso para borrarlo",
+        )
+        parser.add_argument("--every", type=float, help="Repetir cada tantos segundos (para el servicio de mantenimiento)")
+        parser.add_argument("--dry-run", action="store_true", help="Solo contar lo que se borraría")
+
+    def handle(self, *args, **options):
+        while True:
+            self.purge(options)
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
+
+    def purge(self, options):
+        now = timezone.now()
+        # Con signed_cookies la tabla solo tiene lo que quedó de antes del cambio; con cached_db
+        # las entradas de la caché vencen solas
+        sessions = Session.objects.filter(expire_date__lt=now)
+        # created_at es nulo en dispositivos anteriores a que django-otp lo registrara
+        devices = TOTPDevice.objects.filter(confirmed=False).filter(
+            Q(created_at__lt=now - timedelta(days=options["otp_days"])) | Q(created_at__isnull=True)
+        )
+        if options["dry_run"]:
+            files = PendingFileDeletion.objects.filter(requested_at__lt=now - timedelta(seconds=options["media_grace"]))
+            self.stdout.write(
+                f"{sessions.count()} sesiones vencidas, {devices.count()} dispositivos 2FA sin confirmar, "
+                f"{files.count()} archivos sin uso por revisar"
+            )
+            return
+
+        started = time.perf_counter()
+        chunk = max(1, options["chunk"])
+        removed_sessions = delete_in_chunks(sessions, "session_key", chunk, options["pause"])
+        removed_devices = delete_in_chunks(devices, "id", chunk, options["pause"])
+        removed_files = purge_deleted_files(options["media_grace"])
+        self.stdout.write(
+            f"{timezone.localtime(now):%Y-%m-%d %H:%M} {removed_sessions} sesiones vencidas, "
+            f"{removed_devices} dispositivos 2FA sin confirmar y {removed_files} archivos sin uso "
+            f"borrados en {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,143 @@
+import json
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.benchmarks import (
+    BOT_CASES, SUPERVISOR_USERNAME, TECHNICIAN_USERNAME, WEB_CASES, build_context, run_case,
+)
+
+User = get_user_model()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "desconocido"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide los caminos calientes (listados, detalle, exportación, API y handlers del bot) "
+        "sobre los datos de seed_benchmark_data y guarda los resultados en JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Mediciones por caso (después de una de calentamiento)")
+        parser.add_argument("--only", action="append", help="Ejecutar solo estos casos (repetible)")
+        parser.add_argument("--skip", action="append", default=[], help="Omitir estos casos (repetible)")
+        parser.add_argument("--supervisor", default=SUPERVISOR_USERNAME, help="Usuario supervisor")
+        parser.add_argument("--technician", default=TECHNICIAN_USERNAME, help="Usuario técnico (con telegram_chat_id)")
+        parser.add_argument("--output", help="Archivo JSON de salida (por defecto benchmarks/<fecha>-<commit>.json)")
+        parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+        parser.add_argument("--threshold", type=float, default=10.0, help="%% de empeoramiento de la mediana que cuenta como regresión")
+        parser.add_argument("--fail-on-regression", action="store_true", help="Salir con error si hay regresiones")
+        parser.add_argument("--list", action="store_true", help="Listar los casos disponibles")
+
+    def handle(self, *args, **options):
+        cases = WEB_CASES + BOT_CASES
+        if options["list"]:
+            for case in cases:
+                self.stdout.write(f"{case.name:<32} {case.description}")
+            return
+
+        selected = [
+            case for case in cases
+            if (not options["only"] or case.name in options["only"]) and case.name not in options["skip"]
+        ]
+        if not selected:
+            raise CommandError("No hay casos para ejecutar (ver --list).")
+
+        supervisor = User.objects.filter(username=options["supervisor"]).first()
+        technician = User.objects.filter(username=options["technician"]).first()
+        if not supervisor or not technician:
+            raise CommandError("Usuarios de benchmark no encontrados; correr antes seed_benchmark_data.")
+
+        # El cliente de pruebas usa el host 'testserver'
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            context = build_context(supervisor, technician)
+            results = {}
+            for case in selected:
+                if case in BOT_CASES and context["bot"] is None:
+                    results[case.name] = {"description": case.description, "skipped": context["bot_error"]}
+                    self.stdout.write(self.style.WARNING(f"{case.name:<32} omitido: {context['bot_error']}"))
+                    continue
+                try:
+                    result = run_case(case, context, options["repeat"])
+                except Exception as e:
+                    results[case.name] = {"description": case.description, "error": f"{type(e).__name__}: {e}"}
+                    self.stdout.write(self.style.ERROR(f"{case.name:<32} error: {e}"))
+                    continue
+                results[case.name] = result
+                self.stdout.write(
+                    f"{case.name:<32} mediana {result['ms']['median']:>9.2f} ms  p95 {result['ms']['p95']:>9.2f} ms  "
+                    f"{result['queries']:>6} consultas ({result['duplicate_queries']} repetidas)"
+                    + (f"  [HTTP {result['status']}]" if result.get('status', 200) >= 400 else "")
+                )
+
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "dataset": self._dataset_counts(),
+            "cases": results,
+        }
+        output = Path(options["output"]) if options["output"] else (
+            Path(settings.BASE_DIR).parent / "benchmarks"
+            / f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_commit']}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {output}"))
+
+        if options["compare"]:
+            regressions = self._compare(Path(options["compare"]), results, options["threshold"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{regressions} casos con regresión.")
+
+    def _dataset_counts(self):
+        from clients.models import Client
+        from work_order.models import WorkOrder
+        from worklog.models import WorkLog, WorkLogHistory
+        return {
+            "users": User.objects.count(),
+            "clients": Client.objects.count(),
+            "work_orders": WorkOrder.objects.count(),
+            "worklogs": WorkLog.objects.count(),
+            "worklog_history": WorkLogHistory.objects.count(),
+        }
+
+    def _compare(self, path, results, threshold):
+        try:
+            previous = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer {path}: {e}")
+
+        self.stdout.write(f"\nComparación contra {path.name} (commit {previous.get('git_commit')}):")
+        regressions = 0
+        for name, result in results.items():
+            before = previous.get("cases", {}).get(name)
+            if not before or "ms" not in before or "ms" not in result:
+                continue
+            old, new = before["ms"]["median"], result["ms"]["median"]
+            change = ((new - old) / old * 100) if old else 0.0
+            queries = f"{before['queries']} → {result['queries']} consultas"
+            line = f"  {name:<32} {old:>9.2f} → {new:>9.2f} ms ({change:+.1f}%), {queries}"
+            if change > threshold or result["queries"] > before["queries"]:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line + "  REGRESIÓN"))
+            else:
+                self.stdout.write(line)
+        return regressions
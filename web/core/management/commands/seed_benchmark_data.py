@@ -0,0 +1,259 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from clients.models import Client, ClientSummary
+from clients.summary import rebuild_client_summaries
+from core.benchmarks import SEED_PREFIX, SUPERVISOR_USERNAME
+from work_order.models import WorkOrder, WorkOrderAttachment
+from worklog.models import TranscriptSegment, WorkLog, WorkLogDailyRollup, WorkLogHistory
+from worklog.rollups import rebuild_daily_rollups
+
+User = get_user_model()
+
+CLIENT_PREFIX = "Bench "
+ORDER_PREFIX = "BENCH-"
+CHAT_ID_BASE = 9_000_000_000
+CITIES = ["Córdoba", "Rosario", "Mendoza", "San Luis", "Villa María", "Río Cuarto", "Santa Fe", "Paraná"]
+TASK_TYPES = ["Taller", "Taller", "Campo", "Diligencia", "Operaciones generales", "Otros"]
+GENERAL_OPS = [value for value, _ in WorkLog.GENERAL_OPS_SUBTYPES]
+STATUSES = [value for value, _ in WorkLog.STATUS_CHOICES]
+ORDER_STATES = [value for value, _ in WorkOrder.Estado.choices]
+PRIORITIES = [value for value, _ in WorkOrder.Prioridad.choices]
+HISTORY_FIELDS = ["status", "description", "end", "task_type", "work_order"]
+
+
+@contextmanager
+def _manual_timestamps(model, field_name):
+    """Permite asignar a mano un campo auto_now_add durante la carga masiva"""
+    field = model._meta.get_field(field_name)
+    original = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = original
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga un set de datos sintético grande para run_benchmarks "
+        "(por defecto 200 técnicos, 50k órdenes, 2M tareas y 5M filas de historial)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--technicians", type=int, default=200)
+        parser.add_argument("--clients", type=int, default=2000)
+        parser.add_argument("--work-orders", type=int, default=50_000)
+        parser.add_argument("--worklogs", type=int, default=2_000_000)
+        parser.add_argument("--history", type=int, default=5_000_000)
+        parser.add_argument("--days", type=int, default=365, help="Días hacia atrás que cubren las tareas")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42, help="Semilla para resultados reproducibles")
+        parser.add_argument("--clear", action="store_true", help="Borrar antes los datos de una carga anterior")
+        parser.add_argument("--skip-rollups", action="store_true", help="No reconstruir los resúmenes diarios ni los de clientes al final")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        if options["clear"]:
+            self.clear()
+        elif User.objects.filter(username__startswith=SEED_PREFIX).exists():
+            raise CommandError("Ya hay datos de benchmark cargados; usar --clear para regenerarlos.")
+
+        started = time.perf_counter()
+        technicians, supervisor = self.seed_users(options["technicians"])
+        client_ids = self.seed_clients(options["clients"])
+        orders = self.seed_work_orders(options["work_orders"], client_ids, technicians, supervisor, options["days"])
+        first_id, last_id = self.seed_worklogs(options["worklogs"], technicians, orders, options["days"])
+        self.seed_history(options["history"], first_id, last_id, technicians)
+        if not options["skip_rollups"]:
+            self.step("Reconstruyendo resúmenes diarios", rebuild_daily_rollups)
+            self.step("Reconstruyendo resúmenes de clientes", rebuild_client_summaries)
+        self.stdout.write(self.style.SUCCESS(f"Carga completa en {time.perf_counter() - started:.0f}s"))
+
+    def step(self, label, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f"{label}: {time.perf_counter() - started:.1f}s")
+        return result
+
+    def clear(self):
+        def run():
+            users = User.objects.filter(username__startswith=SEED_PREFIX)
+            orders = WorkOrder.objects.filter(numero__startswith=ORDER_PREFIX)
+            worklogs = WorkLog.objects.filter(technician__in=users.values("id"))
+            # Un DELETE por tabla: sin cargar las filas ni disparar las señales de cada orden (feed,
+            # resúmenes), que recalcularían uno por uno resúmenes que igual se borran. Los de los datos
+            # de benchmark se van con ellos; el resto no depende de estos datos
+            with transaction.atomic():
+                for queryset in (
+                    TranscriptSegment.objects.filter(worklog__in=worklogs.values("id")),
+                    WorkLogHistory.objects.filter(worklog__in=worklogs.values("id")),
+                    WorkLogDailyRollup.objects.filter(technician__in=users.values("id")),
+                    worklogs,
+                    WorkOrderAttachment.objects.filter(orden__in=orders.values("id")),
+                    orders,
+                    ClientSummary.objects.filter(client__razon_social__startswith=CLIENT_PREFIX),
+                    Client.objects.filter(razon_social__startswith=CLIENT_PREFIX),
+                ):
+                    queryset._raw_delete(queryset.db)
+                users.delete()
+        self.step("Borrando datos de benchmark anteriores", run)
+
+    def bulk(self, model, rows, total, label):
+        """bulk_create por lotes desde un generador, con progreso"""
+        started = time.perf_counter()
+        batch, done = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                done += len(batch)
+                batch = []
+                if done % (self.batch_size * 20) == 0:
+                    rate = done / (time.perf_counter() - started)
+                    self.stdout.write(f"  {label}: {done:,}/{total:,} ({rate:,.0f}/s)")
+        if batch:
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            done += len(batch)
+        self.stdout.write(f"{label}: {done:,} en {time.perf_counter() - started:.1f}s")
+
+    def seed_users(self, count):
+        password = make_password(None)  # inutilizable; se entra con force_login
+        users = [
+            User(username=SUPERVISOR_USERNAME, first_name="Supervisor", last_name="Benchmark",
+                 user_type="supervisor", password=password)
+        ] + [
+            User(username=f"{SEED_PREFIX}tec_{i:03d}", first_name=f"Técnico {i:03d}", last_name="Benchmark",
+                 user_type="tecnico", password=password, telegram_chat_id=str(CHAT_ID_BASE + i))
+            for i in range(count)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+        technicians = list(User.objects.filter(username__startswith=f"{SEED_PREFIX}tec_").order_by("username"))
+        supervisor = User.objects.get(username=SUPERVISOR_USERNAME)
+        self.stdout.write(f"Usuarios: {len(technicians)} técnicos + 1 supervisor")
+        return technicians, supervisor
+
+    def seed_clients(self, count):
+        rows = (
+            Client(
+                razon_social=f"{CLIENT_PREFIX}{i:05d} S.A.",
+                cuit=f"30{i:09d}",
+                ciudad=self.rng.choice(CITIES),
+                provincia="Córdoba",
+            )
+            for i in range(count)
+        )
+        self.bulk(Client, rows, count, "Clientes")
+        return list(Client.objects.filter(razon_social__startswith=CLIENT_PREFIX).values_list("id", flat=True))
+
+    def seed_work_orders(self, count, client_ids, technicians, supervisor, days):
+        now = timezone.now()
+        rng = self.rng
+
+        def rows():
+            for i in range(count):
+                created = now - timedelta(days=days * (count - i) / count, minutes=rng.randint(0, 600))
+                estado = rng.choice(ORDER_STATES)
+                yield WorkOrder(
+                    numero=f"{ORDER_PREFIX}{i:06d}",
+                    cliente_id=rng.choice(client_ids),
+                    titulo=f"Orden de benchmark {i}",
+                    descripcion="Equipo con falla intermitente, revisar y presupuestar.",
+                    prioridad=rng.choice(PRIORITIES),
+                    estado=estado,
+                    asignado_a=rng.choice(technicians),
+                    fecha_creacion=created,
+                    fecha_limite=created + timedelta(days=rng.randint(3, 30)),
+                    fecha_cierre=created + timedelta(days=rng.randint(1, 20)) if estado == "cerrada" else None,
+                    creado_por=supervisor,
+                )
+
+        with _manual_timestamps(WorkOrder, "fecha_creacion"):
+            self.bulk(WorkOrder, rows(), count, "Órdenes de trabajo")
+        return list(
+            WorkOrder.objects.filter(numero__startswith=ORDER_PREFIX).values_list("id", "numero", "asignado_a_id")
+        )
+
+    def seed_worklogs(self, count, technicians, orders, days):
+        rng = self.rng
+        now = timezone.now()
+        per_technician = max(1, count // len(technicians))
+        orders_by_tech = {}
+        for order_id, numero, tech_id in orders:
+            orders_by_tech.setdefault(tech_id, []).append((order_id, numero))
+
+        def rows():
+            created = 0
+            for technician in technicians:
+                own_orders = orders_by_tech.get(technician.id) or [(None, None)]
+                # Tareas consecutivas hacia atrás desde ahora, sin superponerse
+                cursor = now - timedelta(minutes=rng.randint(0, 120))
+                step = timedelta(days=days) / per_technician
+                for _ in range(per_technician):
+                    if created >= count:
+                        return
+                    duration = timedelta(minutes=rng.randint(20, 240))
+                    end = cursor
+                    start = end - min(duration, step * 0.9)
+                    cursor = cursor - step
+                    task_type = rng.choice(TASK_TYPES)
+                    order_id, numero = rng.choice(own_orders) if rng.random() < 0.6 else (None, None)
+                    collaborator = rng.choice(technicians) if rng.random() < 0.1 else None
+                    yield WorkLog(
+                        technician=technician,
+                        collaborator=collaborator if collaborator != technician else None,
+                        start=start,
+                        end=end,
+                        task_type=task_type,
+                        other_task_type="Capacitación" if task_type == "Otros" else None,
+                        general_ops_subtype=rng.choice(GENERAL_OPS) if task_type == "Operaciones generales" else None,
+                        warranty=task_type in ("Taller", "Campo") and rng.random() < 0.2,
+                        field_city=rng.choice(CITIES) if task_type == "Campo" else None,
+                        field_km_one_way=rng.randint(5, 250) if task_type == "Campo" else None,
+                        description="Revisión y prueba del equipo; se reemplazan componentes dañados.",
+                        work_order=numero,
+                        work_order_ref_id=order_id,
+                        status=rng.choice(STATUSES),
+                        created_by=technician,
+                    )
+                    created += 1
+
+        total = min(count, per_technician * len(technicians))
+        self.bulk(WorkLog, rows(), total, "Tareas")
+        bounds = WorkLog.objects.filter(technician__username__startswith=SEED_PREFIX).aggregate(
+            first=Min("id"), last=Max("id")
+        )
+        return bounds["first"], bounds["last"]
+
+    def seed_history(self, count, first_id, last_id, technicians):
+        if not count or first_id is None:
+            return
+        rng = self.rng
+
+        def rows():
+            for i in range(count):
+                field_name = rng.choice(HISTORY_FIELDS) if i % 5 else None
+                yield WorkLogHistory(
+                    worklog_id=rng.randint(first_id, last_id),
+                    user=rng.choice(technicians),
+                    action="updated" if field_name else "created",
+                    field_name=field_name,
+                    old_value="pendiente" if field_name else None,
+                    new_value="en_proceso" if field_name else None,
+                    ip_address="10.0.0.1",
+                    user_agent="benchmark",
+                )
+
+        self.bulk(WorkLogHistory, rows(), count, "Historial")
@@ -0,0 +1,302 @@
+"""
+Registro de métricas en memoria con salida en formato de texto de Prometheus.
+
+Cada proceso acumula sus valores en memoria. Con METRICS_DIR configurado (lo
+hace gunicorn.conf.py) cada proceso vuelca además su registro a un archivo
+propio de ese directorio, como mucho cada FLUSH_SECONDS, y render() suma los
+archivos de todos: el endpoint /core/metrics/ muestra el total de los workers
+aunque el request lo atienda uno solo. Cuando un worker termina, el master de
+gunicorn suma su archivo al de los workers retirados (retire()), así los
+contadores no retroceden y el directorio no crece con cada reciclado; se vacía
+al arrancar gunicorn. Sin METRICS_DIR se expone solo el proceso actual.
+
+Cualquier módulo puede registrar sus métricas con counter() / histogram() y
+quedan publicadas en el mismo endpoint.
+"""
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_metrics = {}
+# Proceso dueño de los valores en memoria y su archivo en METRICS_DIR
+_process = {'pid': None, 'directory': None, 'path': None, 'flushed': 0.0}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_SECONDS = 5
+RETIRED_FILE = 'retired.json'
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + body + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type_name = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            _check_process()
+            self.values[key] = self.values.get(key, 0) + amount
+        _maybe_flush()
+
+    def merge(self, values):
+        """Suma valores de otro proceso (mismo formato que self.values)"""
+        for key, value in values.items():
+            self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, key, (), value
+
+
+class Histogram:
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}  # key -> [conteos por bucket..., suma, total]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            _check_process()
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+        _maybe_flush()
+
+    def merge(self, values):
+        """Suma valores de otro proceso (mismo formato que self.values)"""
+        for key, data in values.items():
+            current = self.values.setdefault(key, [0] * len(data))
+            for index, amount in enumerate(data):
+                current[index] += amount
+
+    def samples(self):
+        for key, data in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                yield f'{self.name}_bucket', key, (('le', _format_value(float(bound))),), cumulative
+            yield f'{self.name}_bucket', key, (('le', '+Inf'),), data[-1]
+            yield f'{self.name}_sum', key, (), data[-2]
+            yield f'{self.name}_count', key, (), data[-1]
+
+
+def _register(cls, name, documentation, **kwargs):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, documentation, **kwargs)
+    return metric
+
+
+def counter(name, documentation):
+    return _register(Counter, name, documentation)
+
+
+def histogram(name, documentation, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, documentation, buckets=buckets)
+
+
+def _directory():
+    return getattr(settings, 'METRICS_DIR', '')
+
+
+def _check_process():
+    """
+    Con _lock tomado. En un proceso recién forkeado (gunicorn con preload) los valores
+    heredados son del padre y ya están en su archivo: se descartan y se usa un archivo nuevo.
+    """
+    pid, directory = os.getpid(), _directory()
+    if _process['pid'] == pid and _process['directory'] == directory:
+        return
+    if _process['pid'] not in (None, pid):
+        for metric in _metrics.values():
+            metric.values = {}
+    _process.update(
+        pid=pid,
+        directory=directory,
+        path=Path(directory) / f'{pid}-{time.time_ns()}.json' if directory else None,
+        flushed=0.0,
+    )
+
+
+def _maybe_flush():
+    if _process['path'] is not None and time.monotonic() - _process['flushed'] >= FLUSH_SECONDS:
+        flush(wait=False)
+
+
+def flush(wait=True):
+    """Vuelca el registro del proceso a su archivo de METRICS_DIR (no hace nada sin directorio)"""
+    if not _flush_lock.acquire(blocking=wait):
+        return  # otro hilo ya está escribiendo el mismo archivo
+    try:
+        with _lock:
+            _check_process()
+            path = _process['path']
+            if path is None:
+                return
+            _process['flushed'] = time.monotonic()
+            data = {
+                name: [
+                    [[[label, str(label_value)] for label, label_value in key], values]
+                    for key, values in metric.values.items()
+                ]
+                for name, metric in _metrics.items()
+            }
+        tmp = path.with_suffix('.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception("No se pudieron guardar las métricas en %s", path)
+    finally:
+        _flush_lock.release()
+
+
+def _empty_like(metric):
+    if isinstance(metric, Histogram):
+        return Histogram(metric.name, metric.documentation, buckets=metric.buckets)
+    return Counter(metric.name, metric.documentation)
+
+
+@contextmanager
+def _directory_lock(directory, exclusive=False):
+    """flock sobre el directorio: render() no lee a mitad de un retire()"""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    with open(Path(directory) / '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read(file):
+    """{métrica: {clave de labels: valores}} de un archivo de METRICS_DIR"""
+    data = json.loads(file.read_text())
+    return {
+        name: {tuple(tuple(pair) for pair in key): value for key, value in rows}
+        for name, rows in data.items()
+    }
+
+
+def _load_all(path):
+    """Copia del registro con la suma de los archivos de todos los procesos"""
+    with _lock:
+        merged = {name: _empty_like(metric) for name, metric in _metrics.items()}
+    with _directory_lock(path):
+        for file in Path(path).glob('*.json'):
+            try:
+                data = _read(file)
+            except (OSError, ValueError):
+                continue  # archivo dañado o que se está reemplazando
+            for name, values in data.items():
+                if name in merged:
+                    merged[name].merge(values)
+    return merged
+
+
+def retire(directory, pid):
+    """
+    Suma los archivos del proceso pid (ya terminado) a RETIRED_FILE y los borra. Lo llama
+    el master de gunicorn al salir cada worker; no usa settings porque el master puede no
+    tener Django cargado.
+    """
+    directory = Path(directory)
+    files = list(directory.glob(f'{pid}-*.json'))
+    if not files:
+        return
+    with _directory_lock(directory, exclusive=True):
+        retired_path = directory / RETIRED_FILE
+        try:
+            retired = _read(retired_path) if retired_path.exists() else {}
+        except (OSError, ValueError):
+            logger.exception("Métricas retiradas dañadas en %s; se empieza de cero", retired_path)
+            retired = {}
+        for file in files:
+            try:
+                data = _read(file)
+            except (OSError, ValueError):
+                continue
+            for name, values in data.items():
+                totals = retired.setdefault(name, {})
+                for key, value in values.items():
+                    if key not in totals:
+                        totals[key] = value
+                    elif isinstance(value, list):  # histograma: conteos por bucket, suma, total
+                        totals[key] = [current + amount for current, amount in zip(totals[key], value)]
+                    else:
+                        totals[key] += value
+        tmp = retired_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            name: [[[list(pair) for pair in key], value] for key, value in values.items()]
+            for name, values in retired.items()
+        }))
+        os.replace(tmp, retired_path)
+        for file in files + list(directory.glob(f'{pid}-*.tmp')):
+            file.unlink(missing_ok=True)
+
+
+def render():
+    """Todas las métricas registradas en formato de exposición de Prometheus"""
+    lines = []
+    directory = _directory()
+    if directory:
+        flush()
+        registry, lock = _load_all(directory), nullcontext()
+    else:
+        registry, lock = _metrics, _lock
+    with lock:
+        metrics = [registry[name] for name in sorted(registry)]
+        snapshot = [(metric, list(metric.samples())) for metric in metrics]
+    for metric, samples in snapshot:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type_name}')
+        for sample_name, key, extra, value in samples:
+            lines.append(f'{sample_name}{_format_labels(key, extra)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,166 @@
+"""
+Perfilado de consultas SQL por request.
+
+Se activa con QUERY_PROFILING_ENABLED. Por cada request mide la cantidad de
+consultas, el tiempo total en SQL, las consultas repetidas (misma sentencia
+con distintos parámetros: el patrón típico de N+1) y el tiempo de la vista.
+Los valores se publican en la cabecera Server-Timing y en las métricas de
+core/metrics.py. Los requests lentos se registran (muestreados) en el logger
+'core.profiling' con las consultas más costosas y la pila de la más repetida.
+"""
+import logging
+import random
+import sys
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('core.profiling')
+
+REQUESTS = metrics.counter('http_requests_total', 'Requests atendidos por vista, método y estado')
+REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'Duración total del request por vista')
+QUERIES = metrics.histogram(
+    'db_queries_per_request', 'Consultas SQL por request y vista',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+SQL_SECONDS = metrics.counter('db_query_seconds_total', 'Tiempo acumulado en SQL por vista')
+DUPLICATES = metrics.counter('db_duplicate_queries_total', 'Consultas repetidas (misma sentencia) por vista')
+SLOW_REQUESTS = metrics.counter('http_slow_requests_total', 'Requests por encima del umbral de lentitud por vista')
+
+STACK_DEPTH = 8
+
+
+# Middlewares y decoradores propios que envuelven todas las vistas: no aportan a la pila
+_WRAPPER_FILES = ('core/middleware.py', 'core/db.py')
+
+
+def _project_stack():
+    """
+    Pila recortada a los archivos del proyecto (sin Django ni los envoltorios)
+    más la línea de plantilla que se estaba renderizando, donde suelen estar los N+1.
+    """
+    base_dir = str(settings.BASE_DIR)
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if code.co_name == 'render_annotated' and filename.endswith('django/template/base.py'):
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                location = f"{origin.template_name}:{token.lineno} (plantilla)"
+                if not frames or frames[-1] != location:
+                    frames.append(location)
+        elif (filename.startswith(base_dir) and 'site-packages' not in filename
+                and not filename.endswith(_WRAPPER_FILES)):
+            frames.append(f"{filename[len(base_dir) + 1:]}:{frame.f_lineno} en {code.co_name}")
+        frame = frame.f_back
+    # De la llamada más externa a la más interna, como un traceback
+    return list(reversed(frames[:STACK_DEPTH]))
+
+
+class QueryRecorder:
+    """execute_wrapper que acumula tiempos y detecta sentencias repetidas"""
+
+    def __init__(self, slow_query_seconds):
+        self.slow_query_seconds = slow_query_seconds
+        self.count = 0
+        self.total = 0.0
+        self.by_sql = {}  # sql -> [veces, segundos, pila de la primera repetición]
+        self.slow = []  # (segundos, sql, pila)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.total += elapsed
+            entry = self.by_sql.get(sql)
+            if entry is None:
+                self.by_sql[sql] = [1, elapsed, None]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if entry[2] is None:
+                    # La pila solo se toma al repetirse: es donde está el N+1
+                    entry[2] = _project_stack()
+            if elapsed >= self.slow_query_seconds:
+                self.slow.append((elapsed, sql, _project_stack()))
+
+    @property
+    def duplicates(self):
+        return sum(times - 1 for times, _, _ in self.by_sql.values() if times > 1)
+
+    def most_repeated(self):
+        if not self.by_sql:
+            return None
+        sql, (times, seconds, stack) = max(self.by_sql.items(), key=lambda item: item[1][0])
+        return (sql, times, seconds, stack) if times > 1 else None
+
+
+class QueryProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_request_seconds = getattr(settings, 'QUERY_PROFILING_SLOW_REQUEST_MS', 500) / 1000
+        self.slow_query_seconds = getattr(settings, 'QUERY_PROFILING_SLOW_QUERY_MS', 100) / 1000
+        self.sample_rate = getattr(settings, 'QUERY_PROFILING_SAMPLE_RATE', 1.0)
+        self.server_timing = getattr(settings, 'QUERY_PROFILING_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(self.slow_query_seconds)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else 'sin_ruta'
+
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        REQUEST_SECONDS.observe(elapsed, view=view)
+        QUERIES.observe(recorder.count, view=view)
+        SQL_SECONDS.inc(recorder.total, view=view)
+        if recorder.duplicates:
+            DUPLICATES.inc(recorder.duplicates, view=view)
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'sql;dur={recorder.total * 1000:.1f};desc="{recorder.count} consultas, '
+                f'{recorder.duplicates} repetidas", '
+                f'app;dur={(elapsed - recorder.total) * 1000:.1f}, total;dur={elapsed * 1000:.1f}'
+            )
+
+        if elapsed >= self.slow_request_seconds:
+            SLOW_REQUESTS.inc(view=view)
+            if random.random() < self.sample_rate:
+                self.log_slow_request(request, view, elapsed, recorder)
+        return response
+
+    def log_slow_request(self, request, view, elapsed, recorder):
+        lines = [
+            f"Request lento {request.method} {request.get_full_path()} ({view}): "
+            f"{elapsed * 1000:.0f} ms, {recorder.count} consultas en {recorder.total * 1000:.0f} ms, "
+            f"{recorder.duplicates} repetidas"
+        ]
+        repeated = recorder.most_repeated()
+        if repeated:
+            sql, times, seconds, stack = repeated
+            lines.append(f"  Más repetida ({times} veces, {seconds * 1000:.0f} ms): {sql}")
+            lines.extend(f"    {frame}" for frame in stack or [])
+        for seconds, sql, stack in sorted(recorder.slow, key=lambda item: item[0], reverse=True)[:3]:
+            lines.append(f"  Consulta lenta ({seconds * 1000:.0f} ms): {sql}")
+            lines.extend(f"    {frame}" for frame in stack)
+        logger.warning("\n".join(lines))
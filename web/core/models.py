@@ -0,0 +1,49 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Registro append-only de altas, modificaciones y bajas de órdenes y tareas.
+    El id autoincremental es el cursor del feed: los consumidores piden "todo lo
+    posterior a N" y el índice de la clave primaria resuelve la lectura.
+    """
+    ACTIONS = [
+        ('created', 'Creado'),
+        ('updated', 'Actualizado'),
+        ('deleted', 'Eliminado'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=50)  # p.ej. 'worklog.worklog'
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    # Técnico dueño de la tarea en ese momento: el feed de un técnico solo incluye lo suyo
+    # (y la baja o el pase a otro técnico de lo que era suyo)
+    technician_id = models.BigIntegerField(null=True, blank=True)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Cambio registrado'
+        verbose_name_plural = 'Cambios registrados'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.model}:{self.object_id}"
+
+
+class PendingFileDeletion(models.Model):
+    """
+    Archivo subido que dejó de estar referenciado. purge_sessions lo borra del
+    storage pasado MEDIA_DELETE_GRACE_SECONDS si sigue sin usarse; volver a subir
+    el mismo contenido cancela el borrado (core/storage.py).
+    """
+    name = models.CharField(max_length=255, unique=True)
+    requested_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Archivo a eliminar'
+        verbose_name_plural = 'Archivos a eliminar'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,76 @@
+// Autocompletado de los <select data-autocomplete-url> (core/autocomplete.py):
+// agrega un campo de búsqueda arriba del select y carga las opciones a demanda.
+(function () {
+    "use strict";
+
+    function init(select) {
+        const url = select.dataset.autocompleteUrl;
+        const search = document.createElement("input");
+        search.type = "search";
+        search.className = "form-control form-control-sm mb-1";
+        search.placeholder = "Buscar…";
+        search.autocomplete = "off";
+        search.setAttribute("aria-label", "Buscar opciones");
+        select.parentNode.insertBefore(search, select);
+
+        let timer = null;
+        let controller = null;
+        let loaded = false;
+
+        async function load(query) {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            try {
+                const response = await fetch(url + "?q=" + encodeURIComponent(query), {
+                    signal: controller.signal,
+                    headers: {"Accept": "application/json"},
+                    credentials: "same-origin",
+                });
+                if (response.ok) {
+                    render(await response.json());
+                }
+            } catch (error) {
+                if (error.name !== "AbortError") {
+                    console.error("autocomplete:", error);
+                }
+            }
+        }
+
+        function render(data) {
+            // Se conservan la opción vacía y la elegida
+            const keep = Array.from(select.options).filter(
+                (option) => (option.value === "" && !option.disabled) || option.selected
+            );
+            const present = new Set(keep.map((option) => option.value));
+            select.replaceChildren(...keep);
+            data.results.forEach((item) => {
+                if (!present.has(String(item.id))) {
+                    select.add(new Option(item.text, item.id));
+                }
+            });
+            if (data.more) {
+                const more = new Option("… seguir escribiendo para ver más", "");
+                more.disabled = true;
+                select.add(more);
+            }
+        }
+
+        search.addEventListener("input", () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => load(search.value.trim()), 250);
+        });
+        // Primeras opciones al entrar al select sin haber buscado
+        select.addEventListener("focus", () => {
+            if (!loaded && !search.value) {
+                loaded = true;
+                load("");
+            }
+        });
+    }
+
+    document.addEventListener("DOMContentLoaded", () => {
+        document.querySelectorAll("select[data-autocomplete-url]").forEach(init);
+    });
+})();
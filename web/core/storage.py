@@ -0,0 +1,130 @@
+"""
+Almacenamiento de los archivos subidos (audios de tareas y adjuntos de órdenes).
+
+El backend se elige con MEDIA_STORAGE: 'local' (MEDIA_ROOT) o 's3' (S3 o un
+servicio compatible como MinIO, ver core/storage_s3.py). En los dos casos los
+archivos se nombran por su contenido (sha256 dentro del directorio de
+upload_to): subir dos veces el mismo audio o adjunto guarda una sola copia y la
+web y el bot pueden compartir los archivos sin un volumen en común.
+
+Como un mismo archivo puede estar referenciado por varias filas, solo se borra
+cuando ya ninguna lo usa. Al borrar una fila el archivo queda anotado
+(delete_file_later) y purge_deleted_files lo elimina pasado un margen: una
+subida del mismo contenido puede haber encontrado el archivo y estar por
+guardar su fila. save() cancela el borrado pendiente antes de mirar si el
+archivo existe, y la purga vuelve a comprobar con la anotación bloqueada, así
+que una de las dos siempre ve a la otra.
+"""
+import hashlib
+import logging
+import os
+import re
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import models, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CONTENT_NAME = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$")
+
+
+def content_name(name, digest):
+    """'worklog_audios/x.ogg' -> 'worklog_audios/ab/abcd….ogg'"""
+    directory, filename = os.path.split(name)
+    extension = os.path.splitext(filename)[1].lower()
+    return "/".join(part for part in (directory, digest[:2], digest + extension) if part)
+
+
+def is_content_name(name):
+    return bool(CONTENT_NAME.search(name or ""))
+
+
+class ContentAddressedMixin:
+    """
+    Storage que guarda cada archivo con el hash de su contenido como nombre. El
+    hash se calcula leyendo por bloques, sin cargar el archivo entero en memoria;
+    si ya existe un archivo con ese contenido no se vuelve a escribir.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        name = content_name(name, digest.hexdigest())
+        # Si la purga está borrando este archivo, el DELETE espera a que termine y exists() lo ve
+        from .models import PendingFileDeletion
+        PendingFileDeletion.objects.filter(name=name).delete()
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedMixin, FileSystemStorage):
+    pass
+
+
+def file_fields():
+    """(modelo, nombre del campo) de todos los FileField del proyecto"""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def file_in_use(name):
+    return any(
+        model._default_manager.filter(**{field: name}).exists() for model, field in file_fields()
+    )
+
+
+def delete_file_later(name):
+    """
+    Anota el archivo para borrarlo al confirmarse la transacción actual; la
+    purga lo elimina después si ninguna fila lo referencia.
+    """
+    if not name:
+        return
+    from .models import PendingFileDeletion
+
+    transaction.on_commit(lambda: PendingFileDeletion.objects.update_or_create(
+        name=name, defaults={"requested_at": timezone.now()},
+    ))
+
+
+def purge_deleted_files(grace_seconds, storage=None):
+    """Borra los archivos anotados hace más de grace_seconds que siguen sin uso; devuelve cuántos"""
+    from .models import PendingFileDeletion
+
+    storage = storage or default_storage
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    deleted = 0
+    for pending_id in PendingFileDeletion.objects.filter(requested_at__lt=cutoff).values_list("id", flat=True):
+        with transaction.atomic():
+            # Un save() del mismo contenido que llegó antes borró la anotación; uno que llegue
+            # ahora espera este bloqueo
+            pending = PendingFileDeletion.objects.select_for_update().filter(id=pending_id).first()
+            if pending is None:
+                continue
+            if file_in_use(pending.name):
+                logger.info(f"Archivo {pending.name} sigue en uso; no se elimina")
+            else:
+                try:
+                    storage.delete(pending.name)
+                except Exception as e:
+                    # Queda anotado para la próxima purga
+                    logger.error(f"Error al eliminar el archivo {pending.name}: {e}")
+                    continue
+                logger.info(f"Archivo eliminado: {pending.name}")
+                deleted += 1
+            pending.delete()
+    return deleted
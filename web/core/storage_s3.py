@@ -0,0 +1,13 @@
+"""
+Backend S3 (o compatible: MinIO, Ceph, ...) para MEDIA_STORAGE=s3.
+
+Requiere django-storages[s3]; se importa solo cuando está configurado, así que
+con almacenamiento local no hace falta instalarlo.
+"""
+from storages.backends.s3 import S3Storage
+
+from .storage import ContentAddressedMixin
+
+
+class ContentAddressedS3Storage(ContentAddressedMixin, S3Storage):
+    pass
@@ -1,3 +1,249 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from clients.models import Client, ClientSummary
+from work_order.models import WorkOrder
+from worklog.models import WorkLog, WorkLogDailyRollup
+
+from . import metrics
+from .changefeed import feed_position, read_feed, record_changes
+from .management.commands.seed_benchmark_data import Command as SeedBenchmarkCommand
+from .models import ChangeLogEntry, PendingFileDeletion
+from .storage import ContentAddressedFileSystemStorage, delete_file_later, purge_deleted_files
+
+
+class SharedMetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.counter = metrics.counter('test_shared_total', 'Prueba')
+        self.histogram = metrics.histogram('test_shared_seconds', 'Prueba', buckets=(1, 5))
+
+    def test_render_sums_every_process(self):
+        with override_settings(METRICS_DIR=self.directory.name):
+            self.counter.inc(2, view='a')
+            self.histogram.observe(3, view='a')
+            # Archivo de otro worker
+            Path(self.directory.name, '999-1.json').write_text(json.dumps({
+                'test_shared_total': [[[['view', 'a']], 5], [[['view', 'b']], 1]],
+                'test_shared_seconds': [[[['view', 'a']], [1, 0, 0.5, 1]]],
+            }))
+            output = metrics.render()
+
+        self.assertIn('test_shared_total{view="a"} 7', output)
+        self.assertIn('test_shared_total{view="b"} 1', output)
+        self.assertIn('test_shared_seconds_bucket{view="a",le="1.0"} 1', output)
+        self.assertIn('test_shared_seconds_bucket{view="a",le="5.0"} 2', output)
+        self.assertIn('test_shared_seconds_count{view="a"} 2', output)
+
+    def test_damaged_file_is_skipped(self):
+        with override_settings(METRICS_DIR=self.directory.name):
+            self.counter.inc(view='c')
+            Path(self.directory.name, '999-2.json').write_text('{')
+            self.assertIn('test_shared_total{view="c"}', metrics.render())
+
+    def test_retired_worker_files_are_folded(self):
+        directory = Path(self.directory.name)
+        for name, total, buckets in (('998-1', 5, [1, 0, 0.5, 1]), ('998-2', 3, [0, 1, 2.0, 1]), ('999-1', 1, [0, 0, 7.0, 1])):
+            (directory / f'{name}.json').write_text(json.dumps({
+                'test_shared_total': [[[['view', 'd']], total]],
+                'test_shared_seconds': [[[['view', 'd']], buckets]],
+            }))
+        with override_settings(METRICS_DIR=self.directory.name):
+            before = metrics.render()
+            metrics.retire(directory, 998)
+            self.assertEqual(sorted(p.name for p in directory.glob('99*')), ['999-1.json'])
+            self.assertEqual(metrics.render(), before)
+            # Un segundo worker retirado se suma al mismo archivo
+            metrics.retire(directory, 999)
+            self.assertFalse(list(directory.glob('99*')))
+            self.assertEqual(metrics.render(), before)
+
+        self.assertIn('test_shared_total{view="d"} 9', before)
+        self.assertIn('test_shared_seconds_bucket{view="d",le="5.0"} 2', before)
+        self.assertIn('test_shared_seconds_sum{view="d"} 9.5', before)
+
+
+class DeferredFileDeletionTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.storage = ContentAddressedFileSystemStorage(location=self.tmp.name)
+        self.name = self.storage.save('worklog_audios/nota.ogg', ContentFile(b'audio'))
+
+    def mark_deleted(self, age=timedelta(hours=2)):
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_file_later(self.name)
+        PendingFileDeletion.objects.filter(name=self.name).update(requested_at=timezone.now() - age)
+
+    def purge(self):
+        return purge_deleted_files(3600, storage=self.storage)
+
+    def test_unused_file_is_deleted_after_the_grace_period(self):
+        self.mark_deleted(age=timedelta(minutes=5))
+        self.assertEqual(self.purge(), 0)
+        self.assertTrue(self.storage.exists(self.name))
+
+        self.mark_deleted()
+        self.assertEqual(self.purge(), 1)
+        self.assertFalse(self.storage.exists(self.name))
+        self.assertFalse(PendingFileDeletion.objects.exists())
+
+    def test_upload_of_the_same_content_cancels_the_deletion(self):
+        self.mark_deleted()
+        # Otra subida encuentra el archivo y todavía no guardó su fila
+        self.assertEqual(self.storage.save('worklog_audios/otra.ogg', ContentFile(b'audio')), self.name)
+        self.assertEqual(self.purge(), 0)
+        self.assertTrue(self.storage.exists(self.name))
+
+    def test_referenced_file_is_kept(self):
+        tecnico = get_user_model().objects.create_user('tecnico', password='x', user_type='tecnico')
+        start = timezone.now()
+        WorkLog.objects.create(
+            technician=tecnico, start=start, end=start + timedelta(hours=1),
+            task_type='Taller', description='Prueba', audio_file=self.name,
+        )
+        self.mark_deleted()
+        self.assertEqual(self.purge(), 0)
+        self.assertTrue(self.storage.exists(self.name))
+        self.assertFalse(PendingFileDeletion.objects.exists())
+
+
+@override_settings(CHANGE_FEED_SAFETY_LAG_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.tecnico = User.objects.create_user('tecnico', password='x', user_type='tecnico')
+        self.otro = User.objects.create_user('otro', password='x', user_type='tecnico')
+        self.cliente = Client.objects.create(razon_social='Acme SA', cuit='30712345678', ciudad='Rosario', provincia='Santa Fe')
+        self.start = timezone.now()
+
+    def task(self, technician=None, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return WorkLog.objects.create(
+                technician=technician or self.tecnico, start=self.start, end=self.start + timedelta(hours=1),
+                task_type='Taller', description='Prueba', **extra,
+            )
+
+    def record(self, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_changes(*args, **kwargs)
+
+    def changes(self, after):
+        entries, _, _ = read_feed(after=after)
+        return [(entry.model, entry.object_id, entry.action, entry.technician_id) for entry in entries]
+
+    def test_pages_by_cursor(self):
+        self.record(WorkOrder, [1, 2, 3], 'updated')
+        entries, cursor, has_more = read_feed(limit=2)
+        self.assertEqual([entry.object_id for entry in entries], [1, 2])
+        self.assertTrue(has_more)
+        entries, cursor, has_more = read_feed(after=cursor, limit=2)
+        self.assertEqual([entry.object_id for entry in entries], [3])
+        self.assertFalse(has_more)
+        self.assertEqual(cursor, feed_position())
+        self.assertEqual(read_feed(after=cursor), ([], cursor, False))
+
+    def test_filters_by_model_and_technician(self):
+        self.record(WorkOrder, [1], 'updated')
+        self.record(WorkLog, [1, 2], 'updated', technician_ids={1: self.tecnico.pk, 2: self.otro.pk})
+        entries, _, _ = read_feed(models=['worklog.worklog'], technician_id=self.tecnico.pk)
+        self.assertEqual([(entry.model, entry.object_id) for entry in entries], [('worklog.worklog', 1)])
+        # Las entradas sin técnico (órdenes, registros viejos) son de todos
+        entries, _, _ = read_feed(technician_id=self.otro.pk)
+        self.assertEqual([(entry.model, entry.object_id) for entry in entries], [('work_order.workorder', 1), ('worklog.worklog', 2)])
+
+    @override_settings(CHANGE_FEED_SAFETY_LAG_SECONDS=60)
+    def test_recent_entries_are_held_back(self):
+        self.record(WorkOrder, [1], 'updated')
+        self.assertEqual(read_feed(), ([], 0, False))
+        ChangeLogEntry.objects.update(timestamp=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(len(read_feed()[0]), 1)
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        with transaction.atomic():
+            record_changes(WorkOrder, [1], 'updated')
+            transaction.set_rollback(True)
+        self.assertFalse(ChangeLogEntry.objects.exists())
+
+    def test_deleting_an_order_updates_its_tasks(self):
+        orden = WorkOrder.objects.create(numero='OT-1', cliente=self.cliente, titulo='Prueba')
+        task = self.task(work_order_ref=orden, status=orden.estado)
+        position, orden_id = feed_position(), orden.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            orden.delete()
+        self.assertEqual(self.changes(position), [
+            ('work_order.workorder', orden_id, 'deleted', None),
+            ('worklog.worklog', task.pk, 'updated', self.tecnico.pk),
+        ])
+
+    def test_deleting_a_user_records_cascaded_tasks(self):
+        own = self.task()
+        created_for_other = self.task(technician=self.otro, created_by=self.tecnico)
+        collaboration = self.task(technician=self.otro, collaborator=self.tecnico)
+        orden = WorkOrder.objects.create(numero='OT-1', cliente=self.cliente, titulo='Prueba', asignado_a=self.tecnico)
+        position = feed_position()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tecnico.delete()
+        self.assertCountEqual(self.changes(position), [
+            ('worklog.worklog', own.pk, 'deleted', own.technician_id),
+            ('worklog.worklog', created_for_other.pk, 'deleted', self.otro.pk),
+            ('worklog.worklog', collaboration.pk, 'updated', self.otro.pk),
+            ('work_order.workorder', orden.pk, 'updated', None),
+        ])
+        # Los resúmenes del otro técnico ya no cuentan la tarea borrada
+        self.assertEqual(self.otro.daily_rollups.get().entries, 1)
+
+    def test_migrate_media_records_renamed_files(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            Path(media, 'worklog_audios').mkdir()
+            Path(media, 'worklog_audios', 'nota.ogg').write_bytes(b'audio')
+            task = self.task(audio_file='worklog_audios/nota.ogg')
+            position = feed_position()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('migrate_media', stdout=StringIO())
+        task.refresh_from_db()
+        self.assertNotEqual(task.audio_file.name, 'worklog_audios/nota.ogg')
+        self.assertEqual(self.changes(position), [('worklog.worklog', task.pk, 'updated', self.tecnico.pk)])
+
+
+class SeedBenchmarkDataTests(TestCase):
+    sizes = ['--technicians', '3', '--clients', '4', '--work-orders', '10', '--worklogs', '60', '--history', '30', '--days', '10']
+
+    def seed(self, *args):
+        call_command('seed_benchmark_data', *self.sizes, *args, stdout=StringIO())
+
+    def test_clear_replaces_only_the_benchmark_data(self):
+        tecnico = get_user_model().objects.create_user('tecnico', password='x', user_type='tecnico')
+        cliente = Client.objects.create(razon_social='Acme SA', cuit='30712345678', ciudad='Rosario', provincia='Santa Fe')
+        orden = WorkOrder.objects.create(numero='OT-1', cliente=cliente, titulo='Prueba')
+        start = timezone.now()
+        WorkLog.objects.create(
+            technician=tecnico, start=start, end=start + timedelta(hours=1), task_type='Taller',
+            description='Prueba', work_order_ref=orden, status=orden.estado,
+        )
+        own = (WorkLog.objects.count(), WorkLogDailyRollup.objects.count(), ClientSummary.objects.count())
+
+        self.seed()
+        seeded = (WorkLog.objects.count(), WorkLogDailyRollup.objects.count(), ClientSummary.objects.count())
+        self.seed('--clear')
+        self.assertEqual(
+            (WorkLog.objects.count(), WorkLogDailyRollup.objects.count(), ClientSummary.objects.count()), seeded,
+        )
+
+        self.seed('--clear', '--skip-rollups')
+        SeedBenchmarkCommand(stdout=StringIO()).clear()
+        self.assertEqual(
+            (WorkLog.objects.count(), WorkLogDailyRollup.objects.count(), ClientSummary.objects.count()), own,
+        )
+        self.assertFalse(get_user_model().objects.filter(username__startswith='bench_').exists())
@@ -0,0 +1,9 @@
+from django.urls import path
+from .autocomplete import autocomplete
+from .views import change_feed, metrics
+
+urlpatterns = [
+    path('api/changes/', change_feed, name='change-feed'),
+    path('metrics/', metrics, name='metrics'),
+    path('autocomplete/<slug:source>/', autocomplete, name='autocomplete'),
+]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from accounts.roles import get_roles
+
+from . import metrics as metrics_registry
+from .changefeed import DEFAULT_LIMIT, read_feed, serialize_entry
+
+
+class IsAdminOrSupervisor(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return get_roles(request.user).is_manager
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrSupervisor])
+def change_feed(request):
+    """
+    Feed de cambios por cursor: ?after=<seq>&limit=<n>&model=worklog.worklog
+    Devuelve las entradas y el cursor para la siguiente llamada.
+    """
+    try:
+        after = int(request.query_params.get('after', 0))
+        limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return Response({'detail': 'Parámetros after/limit inválidos.'}, status=400)
+
+    models = request.query_params.getlist('model') or None
+    entries, next_cursor, has_more = read_feed(after=after, limit=limit, models=models)
+    return Response({
+        'results': [serialize_entry(entry) for entry in entries],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    })
+
+
+def metrics(request):
+    """
+    Métricas del proceso en formato de texto de Prometheus.
+    Acceso para administradores/supervisores o con 'Authorization: Bearer <METRICS_TOKEN>'.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = bool(token) and constant_time_compare(header, f'Bearer {token}')
+    if not authorized and not IsAdminOrSupervisor().has_permission(request, None):
+        return HttpResponse(status=403)
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,72 @@
+"""
+Configuración de gunicorn para servir web.wsgi en producción.
+
+Los valores se pueden ajustar por variables de entorno sin reconstruir la imagen.
+Workers gthread: las vistas pasan la mayor parte del tiempo esperando a MariaDB,
+así que unos pocos procesos con varios hilos rinden más que muchos procesos sync.
+"""
+import multiprocessing
+import os
+import shutil
+import time
+
+_boot_started = time.perf_counter()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Cargar Django una sola vez en el master; los workers se forkean ya inicializados
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Las exportaciones a Excel grandes pueden tardar; el resto responde en milisegundos
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers periódicamente para acotar el crecimiento de memoria
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+# Cada worker guarda sus métricas en este directorio y /core/metrics/ las suma (core/metrics.py);
+# se define antes de cargar Django para que lo tome settings.METRICS_DIR
+_metrics_dir = os.environ.setdefault("METRICS_DIR", "/tmp/lcc-ot-metrics")
+
+
+def on_starting(server):
+    # Los archivos de una ejecución anterior sumarían contadores de procesos que ya no existen
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    server.log.info(
+        "Servidor listo en %.2fs (%s workers x %s hilos)",
+        time.perf_counter() - _boot_started, server.cfg.workers, server.cfg.threads,
+    )
+
+
+def worker_exit(server, worker):
+    # Último volcado de métricas del worker que se recicla (max_requests) o se detiene
+    from core import metrics
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    # En el master: el archivo del worker terminado se suma al de los retirados y se borra
+    from core import metrics
+    metrics.retire(_metrics_dir, worker.pid)
+
+
+def post_fork(server, worker):
+    # Las conexiones heredadas del master (preload) no se comparten entre procesos
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    for conn in connections.all(initialized_only=True):
+        conn.close()
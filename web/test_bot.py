@@ -0,0 +1,235 @@
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from telegram.error import RetryAfter
+
+import bot_callbacks
+from bot_callbacks import (
+    CANCELAR, COLABORADOR, ESTADO, GARANTIA, MAX_BYTES, ORDEN, TIPO, VER_TAREA, VERSION,
+    CallbackRouter, decode, encode,
+)
+from bot_cards import order_card
+from bot_outbound import OutboundRateLimiter
+from bot_state import DraftStore, Step, TaskDraft, Transcription
+from clients.models import Client
+from work_order.models import WorkOrder
+from worklog.models import WorkLog
+
+
+class CallbackProtocolTests(SimpleTestCase):
+    def test_round_trip(self):
+        cases = [
+            (CANCELAR, None),
+            (VER_TAREA, 12),
+            (VER_TAREA, 10 ** 12),
+            (ORDEN, None),
+            (GARANTIA, True),
+            (COLABORADOR, False),
+            (TIPO, 'Operaciones generales'),
+            (ESTADO, 'en_espera_repuestos'),
+        ]
+        for action, value in cases:
+            with self.subTest(action=action.name, value=value):
+                data = encode(action, value)
+                self.assertTrue(data.startswith(f'{VERSION}.'))
+                self.assertLessEqual(len(data.encode()), MAX_BYTES)
+                callback = decode(data)
+                self.assertEqual((callback.action, callback.value), (action, value))
+
+    def test_invalid_values_are_rejected_on_encode(self):
+        with self.assertRaises(ValueError):
+            encode(CANCELAR, 1)
+        with self.assertRaises(ValueError):
+            encode(TIPO, 'Inexistente')
+
+    def test_legacy_and_foreign_data_is_rejected(self):
+        for data in (
+            'ver_tarea:12', 'orden_12', 'tipo_Taller', 'cancelar', '', None,
+            'k00.t.c',  # otra versión del protocolo
+            f'{VERSION}.?.1',  # acción desconocida
+            f'{VERSION}.t',  # falta el valor
+            f'{VERSION}.z.1',  # sobra el valor
+            f'{VERSION}.y.zz',  # índice fuera de las opciones
+            f'{VERSION}.r.2',
+        ):
+            with self.subTest(data=data):
+                self.assertIsNone(decode(data))
+
+    def test_router_ignores_legacy_buttons(self):
+        router = CallbackRouter()
+        handler = object()
+        router.register(VER_TAREA, handler)
+        self.assertIsNone(router.resolve('ver_tarea:12'))
+        self.assertIsNone(router.resolve(encode(CANCELAR)))
+        resolved_handler, callback = router.resolve(encode(VER_TAREA, 12))
+        self.assertIs(resolved_handler, handler)
+        self.assertEqual(callback.value, 12)
+
+    def test_pattern_matches_current_version_only(self):
+        regex = bot_callbacks.pattern(VER_TAREA, CANCELAR)
+        self.assertRegex(encode(VER_TAREA, 3), regex)
+        self.assertRegex(encode(CANCELAR), regex)
+        self.assertNotRegex(encode(ORDEN, 3), regex)
+        self.assertNotRegex('ver_tarea:3', regex)
+
+
+class OrderCardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tecnico = get_user_model().objects.create_user('tecnico', password='x', user_type='tecnico')
+        cliente = Client.objects.create(razon_social='Acme SA', cuit='30712345678', ciudad='Rosario', provincia='Santa Fe')
+        self.order = WorkOrder.objects.create(numero='OT-1', cliente=cliente, titulo='Prueba', asignado_a=tecnico)
+        start = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+        self.task = WorkLog.objects.create(
+            technician=tecnico, start=start, end=start + timedelta(hours=1),
+            task_type='Taller', description='Cambio de filtro', work_order_ref=self.order,
+        )
+
+    def test_task_buttons_use_the_callback_protocol(self):
+        card = order_card(self.order.pk)
+        self.assertEqual(len(card.buttons), 1)
+        callback = decode(card.buttons[0][1])
+        self.assertEqual((callback.action, callback.value), (VER_TAREA, self.task.pk))
+
+
+class DraftStoreTests(SimpleTestCase):
+    ttl = 3600
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = DraftStore(Path(tmp.name) / 'drafts.sqlite3', self.ttl)
+        self.addCleanup(lambda: self.store._conn and self.store._conn.close())
+
+    def later(self, seconds):
+        return mock.patch('bot_state.time.time', return_value=time.time() + seconds)
+
+    def test_round_trip_survives_a_new_store(self):
+        draft = TaskDraft(chat_id=1, technician_id=7, step=Step.DESCRIPTION, segments=[[0.0, 1.5, 'hola']])
+        self.store.save(draft)
+        reopened = DraftStore(self.store.path, self.ttl)
+        self.addCleanup(lambda: reopened._conn.close())
+        self.assertEqual(reopened.get(1), draft)
+
+    def test_drafts_expire_after_the_ttl(self):
+        for chat_id in (1, 2, 3):
+            self.store.save(TaskDraft(chat_id=chat_id, technician_id=7))
+        with self.later(self.ttl - 60):
+            self.assertIsNotNone(self.store.get(1))
+            self.assertEqual(self.store.purge_expired(), 0)
+        with self.later(self.ttl + 60):
+            # Leer o actualizar uno vencido lo borra
+            self.assertIsNone(self.store.get(1))
+            self.assertIsNone(self.store.update(2, description='tarde'))
+            self.assertEqual(self.store.purge_expired(), 1)
+        self.assertIsNone(self.store.get(3))
+
+    def test_update_changes_only_the_given_fields(self):
+        self.store.save(TaskDraft(chat_id=1, technician_id=7, step=Step.STATUS))
+        # La transcripción en segundo plano guarda mientras el handler esperaba
+        self.store.update(1, description='texto transcripto', transcription=Transcription.DONE)
+        draft = self.store.update(1, step=Step.DURATION)
+        self.assertEqual((draft.step, draft.description), (Step.DURATION, 'texto transcripto'))
+        self.assertIsNone(self.store.update(99, step=Step.SUMMARY))
+
+    def test_update_when_guard(self):
+        self.store.save(TaskDraft(chat_id=1, technician_id=7, transcription=Transcription.PENDING))
+        # El técnico escribió la descripción a mano: el resultado del audio no la pisa
+        self.store.update(1, description='a mano', transcription=Transcription.NONE)
+        still_pending = lambda draft: draft.transcribing  # noqa: E731
+        self.assertIsNone(self.store.update(1, when=still_pending, description='transcripto'))
+        self.assertEqual(self.store.get(1).description, 'a mano')
+
+        self.store.update(1, transcription=Transcription.PENDING)
+        draft = self.store.update(1, when=still_pending, description='transcripto', transcription=Transcription.DONE)
+        self.assertEqual(draft.description, 'transcripto')
+
+    def test_pending_transcriptions(self):
+        self.store.save(TaskDraft(chat_id=1, technician_id=7, transcription=Transcription.PENDING, audio_file='a.ogg'))
+        self.store.save(TaskDraft(chat_id=2, technician_id=7, transcription=Transcription.PENDING))
+        self.store.save(TaskDraft(chat_id=3, technician_id=7, transcription=Transcription.DONE, audio_file='b.ogg'))
+        self.assertEqual([draft.chat_id for draft in self.store.pending_transcriptions()], [1])
+        with self.later(self.ttl + 60):
+            self.assertEqual(self.store.pending_transcriptions(), [])
+
+    def test_unknown_fields_from_older_versions_are_ignored(self):
+        draft = TaskDraft.from_json('{"chat_id": 1, "technician_id": 7, "step": "summary", "waiting_for_km": true}')
+        self.assertEqual((draft.step, draft.transcription), (Step.SUMMARY, Transcription.NONE))
+
+
+class FakeBotApi:
+    """Callback de python-telegram-bot que registra los envíos"""
+
+    def __init__(self):
+        self.calls = []
+        self.failures = {}  # texto -> RetryAfter a lanzar una vez
+
+    def request(self, limiter, endpoint, chat_id, text, message_id=None):
+        data = {'chat_id': chat_id, 'text': text}
+        if message_id:
+            data['message_id'] = message_id
+        return limiter.process_request(self.send, (endpoint, text), {}, endpoint, data, None)
+
+    async def send(self, endpoint, text):
+        error = self.failures.pop(text, None)
+        if error:
+            raise error
+        self.calls.append((endpoint, text, time.monotonic()))
+        return text
+
+
+class OutboundRateLimiterTests(SimpleTestCase):
+    def limiter(self, **kwargs):
+        return OutboundRateLimiter(**{'chat_per_second': 1000, 'chat_burst': 10, 'stats_seconds': 0, **kwargs})
+
+    async def test_queued_edits_of_a_message_are_coalesced(self):
+        # Sin ráfaga: después del primer envío cada pedido del chat espera 50 ms en la cola
+        limiter, api = self.limiter(chat_per_second=20, chat_burst=1), FakeBotApi()
+        first = api.request(limiter, 'sendMessage', 1, 'procesando')
+        edits = [api.request(limiter, 'editMessageText', 1, f'{i}%', message_id=5) for i in (10, 50, 100)]
+        other_message = api.request(limiter, 'editMessageText', 1, 'otro', message_id=6)
+
+        results = await asyncio.gather(first, *edits, other_message)
+        self.assertEqual(results, ['procesando', True, True, '100%', 'otro'])
+        self.assertEqual([text for _, text, _ in api.calls], ['procesando', '100%', 'otro'])
+        self.assertEqual(limiter.stats.coalesced, 2)
+        self.assertEqual(limiter._edits, {})
+
+    async def test_messages_of_a_chat_go_out_in_order(self):
+        limiter, api = self.limiter(chat_per_second=200, chat_burst=1), FakeBotApi()
+        sends = [api.request(limiter, 'sendMessage', 1, str(i)) for i in range(5)]
+        sends.append(api.request(limiter, 'sendMessage', 2, 'otro chat'))
+        await asyncio.gather(*sends)
+        self.assertEqual([text for _, text, _ in api.calls if text != 'otro chat'], ['0', '1', '2', '3', '4'])
+        # El otro chat no espera a que se vacíe la cola del primero
+        self.assertLess([text for _, text, _ in api.calls].index('otro chat'), 5)
+
+    async def test_retry_after_pauses_every_chat(self):
+        limiter, api = self.limiter(), FakeBotApi()
+        api.failures['uno'] = RetryAfter(timedelta(milliseconds=200))
+        started = time.monotonic()
+        first = asyncio.create_task(api.request(limiter, 'sendMessage', 1, 'uno'))
+        await asyncio.sleep(0.05)  # ya recibió el RetryAfter
+        second = await api.request(limiter, 'sendMessage', 2, 'dos')
+        await first
+
+        self.assertEqual(second, 'dos')
+        sent_at = {text: at - started for _, text, at in api.calls}
+        self.assertGreaterEqual(sent_at['uno'], 0.19)
+        self.assertGreaterEqual(sent_at['dos'], 0.19)
+        self.assertEqual((limiter.stats.retry_after, limiter.stats.sent, limiter.stats.errors), (1, 2, 0))
+
+    async def test_gives_up_after_max_retries(self):
+        limiter, api = self.limiter(max_retries=0), FakeBotApi()
+        api.failures['uno'] = RetryAfter(timedelta(milliseconds=10))
+        with self.assertRaises(RetryAfter):
+            await api.request(limiter, 'sendMessage', 1, 'uno')
+        self.assertEqual(limiter.stats.errors, 1)
@@ -18,12 +18,14 @@ environ.Env.read_env(os.path.join(BASE_DIR, '../.env'))
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-qaldz7)v6sm7sruf@r%*wah$c5n5%&rj)y8#9(l)c4+8(k^k!y'
+SECRET_KEY = env('DJANGO_SECRET_KEY', default='django-insecure-qaldz7)v6sm7sruf@r%*wah$c5n5%&rj)y8#9(l)c4+8(k^k!y')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Con DEBUG activo Django guarda en memoria cada consulta SQL; en producción DJANGO_DEBUG=False
+DEBUG = env.bool('DJANGO_DEBUG', default=False)
 
-ALLOWED_HOSTS = ['*']
+ALLOWED_HOSTS = env.list('DJANGO_ALLOWED_HOSTS', default=['*'])
+CSRF_TRUSTED_ORIGINS = env.list('DJANGO_CSRF_TRUSTED_ORIGINS', default=[])
 
 
 # Application definition
@@ -48,13 +50,18 @@ INSTALLED_APPS = [
 ]
 
 AUTH_USER_MODEL = 'accounts.CustomUser'  # Usar el modelo de usuario personalizado
+# Trae el dispositivo TOTP confirmado junto con el usuario en una sola consulta
+AUTHENTICATION_BACKENDS = ['accounts.backends.LoginBackend']
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # Archivos estáticos sin pasar por runserver/nginx
+    'core.middleware.QueryProfilingMiddleware',  # Solo activo con QUERY_PROFILING_ENABLED
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db.ReplicaRoutingMiddleware',
     'django_otp.middleware.OTPMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -99,16 +106,47 @@ DATABASES = {
             'charset': 'utf8mb4',
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
-        'CONN_MAX_AGE': 60,  # Mantener conexiones vivas por 60 segundos
-        'ATOMIC_REQUESTS': True,  # Transacciones automáticas
+        # Conexiones persistentes por hilo (Django no trae pool para MySQL): cada hilo de
+        # gunicorn y el bot reutilizan su conexión y la validan antes de usarla
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=300),
+        'CONN_HEALTH_CHECKS': True,
+        'ATOMIC_REQUESTS': True,  # Transacciones automáticas (salvo vistas @read_only_view)
     }
 }
 
+# Réplica de solo lectura opcional para listados, detalles, exportaciones y dashboards (core/db.py)
+if env('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env('DB_REPLICA_HOST'),
+        'PORT': env('DB_REPLICA_PORT', default=env('DB_PORT')),
+        'USER': env('DB_REPLICA_USER', default=env('DB_USER')),
+        'PASSWORD': env('DB_REPLICA_PASSWORD', default=env('DB_PASSWORD')),
+        'ATOMIC_REQUESTS': False,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+# Segundos que un navegador lee del primario después de escribir
+DB_REPLICA_PIN_SECONDS = env.int('DB_REPLICA_PIN_SECONDS', default=5)
+
 # Configuración de conexión a la base de datos
 DB_CONNECTION_TIMEOUT = 20
 DB_READ_TIMEOUT = 30
 DB_WRITE_TIMEOUT = 30
 
+# Caché compartida (dbcache://django_cache, creada por createcachetable, o redis://redis:6379/1,
+# requiere el paquete redis). Por defecto queda en la memoria de cada proceso: sirve en desarrollo,
+# pero cada worker de gunicorn ve la suya (ver core/checks.py)
+CACHES = {'default': env.cache_url('CACHE_URL', default='locmemcache://')}
+
+# Sesiones: db (una consulta a django_session por request autenticado), cached_db (se lee de la
+# caché y se escribe en ambas; necesita CACHE_URL compartida) o signed_cookies (sin estado en el
+# servidor; cerrar sesión no invalida una cookie ya copiada). Limpieza: purge_sessions
+SESSION_BACKEND = env.str('SESSION_BACKEND', default='db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+SESSION_COOKIE_AGE = env.int('SESSION_COOKIE_AGE', default=14 * 24 * 3600)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -147,6 +185,38 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Archivos subidos (audios de tareas, adjuntos de órdenes), nombrados por contenido (core/storage.py):
+# 'local' en MEDIA_ROOT o 's3' en un bucket S3/compatible (requiere django-storages[s3])
+MEDIA_STORAGE = env('MEDIA_STORAGE', default='local')
+if MEDIA_STORAGE == 's3':
+    MEDIA_STORAGE_BACKEND = {
+        'BACKEND': 'core.storage_s3.ContentAddressedS3Storage',
+        'OPTIONS': {
+            'bucket_name': env('S3_BUCKET'),
+            'endpoint_url': env('S3_ENDPOINT_URL', default=None),  # MinIO u otro compatible; vacío = AWS
+            'access_key': env('S3_ACCESS_KEY', default=None),
+            'secret_key': env('S3_SECRET_KEY', default=None),
+            'region_name': env('S3_REGION', default=None),
+            'location': env('S3_PREFIX', default='media'),
+            'default_acl': None,
+            'querystring_auth': True,
+        },
+    }
+else:
+    MEDIA_STORAGE_BACKEND = {'BACKEND': 'core.storage.ContentAddressedFileSystemStorage'}
+# Segundos que un archivo sin referencias espera antes de que purge_sessions lo borre: una subida
+# del mismo contenido en curso (request o borrador del bot) lo vuelve a usar
+MEDIA_DELETE_GRACE_SECONDS = env.int('MEDIA_DELETE_GRACE_SECONDS', default=3600)
+
+# WhiteNoise sirve los estáticos con nombre hasheado como inmutables (Cache-Control de 10 años)
+# y con versiones comprimidas; requiere correr collectstatic antes de levantar la web
+STORAGES = {
+    'default': MEDIA_STORAGE_BACKEND,
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -157,4 +227,81 @@ LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 # OTP Settings
 OTP_TOTP_ISSUER = 'LCC OT' # Nombre del emisor para la aplicación 2FA
-OTP_LOGIN_URL = '/accounts/login/' # URL de login para OTP
\ No newline at end of file
+OTP_LOGIN_URL = '/accounts/login/' # URL de login para OTP
+
+# Feed de cambios: segundos que se retienen las entradas más nuevas para no
+# saltear ids de inserciones concurrentes todavía no visibles
+CHANGE_FEED_SAFETY_LAG_SECONDS = 1
+
+# Huecos entre tareas del mismo día (en minutos) a partir de los cuales se avisa
+WORKLOG_GAP_WARNING_MINUTES = env.int('WORKLOG_GAP_WARNING_MINUTES', default=60)
+
+# Perfilado de consultas por request (core/middleware.py) y métricas (/core/metrics/)
+QUERY_PROFILING_ENABLED = env.bool('QUERY_PROFILING_ENABLED', default=False)
+QUERY_PROFILING_SLOW_REQUEST_MS = env.int('QUERY_PROFILING_SLOW_REQUEST_MS', default=500)
+QUERY_PROFILING_SLOW_QUERY_MS = env.int('QUERY_PROFILING_SLOW_QUERY_MS', default=100)
+QUERY_PROFILING_SAMPLE_RATE = env.float('QUERY_PROFILING_SAMPLE_RATE', default=1.0)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+# Directorio donde cada worker vuelca sus métricas para sumarlas en /core/metrics/
+# (gunicorn.conf.py lo define; vacío = solo las del proceso que atiende el request)
+METRICS_DIR = env('METRICS_DIR', default='')
+
+# Transcripción de audios (worklog/transcription.py); comparar configuraciones con benchmark_transcription
+WHISPER_MODEL = env('WHISPER_MODEL', default='medium')
+WHISPER_DEVICE = env('WHISPER_DEVICE', default='cpu')
+WHISPER_COMPUTE_TYPE = env('WHISPER_COMPUTE_TYPE', default='int8')
+WHISPER_BEAM_SIZE = env.int('WHISPER_BEAM_SIZE', default=1)
+WHISPER_CPU_THREADS = env.int('WHISPER_CPU_THREADS', default=0)  # 0 = todos los núcleos
+WHISPER_NUM_WORKERS = env.int('WHISPER_NUM_WORKERS', default=1)
+WHISPER_VAD_FILTER = env.bool('WHISPER_VAD_FILTER', default=True)
+WHISPER_LANGUAGE = env('WHISPER_LANGUAGE', default='es')
+# Tiempos por palabra en la transcripción (detalle de la tarea: saltar en el audio a cada palabra)
+WHISPER_WORD_TIMESTAMPS = env.bool('WHISPER_WORD_TIMESTAMPS', default=True)
+# Directorio persistente de modelos (vacío = caché de Hugging Face del contenedor)
+WHISPER_CACHE_DIR = env('WHISPER_CACHE_DIR', default='')
+# Carga del modelo en el bot: background (atiende updates mientras carga), eager (carga antes de arrancar) o lazy (con el primer audio)
+WHISPER_LOAD_MODE = env('WHISPER_LOAD_MODE', default='background')
+
+# Borradores de tareas del bot (bot_state.py): SQLite local y horas sin cambios hasta que vencen
+BOT_DRAFT_DB = env('BOT_DRAFT_DB', default=str(BASE_DIR / 'bot_drafts.sqlite3'))
+BOT_DRAFT_TTL_HOURS = env.int('BOT_DRAFT_TTL_HOURS', default=24)
+
+# Salida de mensajes del bot (bot_outbound.py): límites por debajo de los de Telegram
+BOT_RATE_GLOBAL_PER_SECOND = env.int('BOT_RATE_GLOBAL_PER_SECOND', default=25)
+BOT_RATE_CHAT_PER_SECOND = env.float('BOT_RATE_CHAT_PER_SECOND', default=1.0)
+BOT_RATE_CHAT_BURST = env.int('BOT_RATE_CHAT_BURST', default=3)
+BOT_RATE_GROUP_PER_MINUTE = env.int('BOT_RATE_GROUP_PER_MINUTE', default=20)
+BOT_RATE_MAX_RETRIES = env.int('BOT_RATE_MAX_RETRIES', default=3)
+BOT_SEND_STATS_SECONDS = env.int('BOT_SEND_STATS_SECONDS', default=60)  # 0 = no registrar
+# Cliente HTTP del bot (API y descarga de audios): conexiones reutilizables y timeout de lectura en segundos
+BOT_HTTP_POOL_SIZE = env.int('BOT_HTTP_POOL_SIZE', default=64)
+BOT_HTTP_READ_TIMEOUT = env.float('BOT_HTTP_READ_TIMEOUT', default=20.0)
+# Tarjetas de detalle de tarea y orden (bot_cards.py); la clave cambia con cada modificación
+BOT_CARD_CACHE_SECONDS = env.int('BOT_CARD_CACHE_SECONDS', default=600)
+
+# Respuestas de los selectores con autocompletado (core/autocomplete.py)
+AUTOCOMPLETE_CACHE_SECONDS = env.int('AUTOCOMPLETE_CACHE_SECONDS', default=30)
+
+# Intentos fallidos de login (accounts/throttle.py): por usuario, por IP y ventana en segundos
+LOGIN_THROTTLE_ATTEMPTS = env.int('LOGIN_THROTTLE_ATTEMPTS', default=5)
+LOGIN_THROTTLE_IP_ATTEMPTS = env.int('LOGIN_THROTTLE_IP_ATTEMPTS', default=30)
+LOGIN_THROTTLE_SECONDS = env.int('LOGIN_THROTTLE_SECONDS', default=300)
+# Proxies propios delante de gunicorn que agregan X-Forwarded-For (0 = gunicorn expuesto
+# directo: la IP del cliente es REMOTE_ADDR y el encabezado se ignora)
+TRUSTED_PROXY_COUNT = env.int('TRUSTED_PROXY_COUNT', default=0)
+# Dispositivos 2FA que nunca se confirmaron (setup abandonado): días antes de que purge_sessions los borre
+OTP_UNCONFIRMED_DEVICE_DAYS = env.int('OTP_UNCONFIRMED_DEVICE_DAYS', default=7)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '[{asctime}] {levelname} {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -10,4 +10,5 @@ class WorkOrderAdmin(admin.ModelAdmin):
 
 @admin.register(WorkOrderAttachment)
 class WorkOrderAttachmentAdmin(admin.ModelAdmin):
-    list_display = ("orden", "descripcion", "subido_por", "subido_en")
+    list_display = ("orden", "nombre_original", "descripcion", "subido_por", "subido_en")
+    readonly_fields = ("nombre_original",)
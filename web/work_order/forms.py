@@ -1,6 +1,7 @@
 from django import forms
 from .models import WorkOrder
 from django.contrib.auth import get_user_model
+from core.autocomplete import AutocompleteSelect
 
 User = get_user_model()
 
@@ -8,7 +9,12 @@ class WorkOrderForm(forms.ModelForm):
     class Meta:
         model = WorkOrder
         fields = ["numero","cliente","titulo","descripcion","prioridad","estado","asignado_a","fecha_limite"]
-        widgets = {"fecha_limite": forms.DateTimeInput(attrs={"type": "datetime-local"})}
+        widgets = {
+            "fecha_limite": forms.DateTimeInput(attrs={"type": "datetime-local"}),
+            # Clientes y usuarios se buscan a demanda en lugar de listarlos todos
+            "cliente": AutocompleteSelect("clientes"),
+            "asignado_a": AutocompleteSelect("usuarios"),
+        }
 
 class WorkOrderFilterForm(forms.Form):
     # Búsqueda general
@@ -78,7 +84,7 @@ class WorkOrderFilterForm(forms.Form):
         required=False,
         label="Asignado a",
         empty_label="---------",
-        widget=forms.Select(attrs={'class': 'form-select'})
+        widget=AutocompleteSelect('tecnicos')
     )
     
     # Ordenamiento
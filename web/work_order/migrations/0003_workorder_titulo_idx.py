@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('work_order', '0002_alter_workorder_estado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['titulo'], name='workorder_titulo_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:17
+
+import os
+
+from django.db import migrations, models
+
+
+def backfill_nombre_original(apps, schema_editor):
+    """Los adjuntos existentes toman el nombre que tienen hoy (los ya migrados por hash quedan así)"""
+    WorkOrderAttachment = apps.get_model('work_order', 'WorkOrderAttachment')
+    for adjunto in WorkOrderAttachment.objects.filter(nombre_original='').exclude(archivo='').iterator():
+        adjunto.nombre_original = os.path.basename(adjunto.archivo.name)[:255]
+        adjunto.save(update_fields=['nombre_original'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_order', '0003_workorder_titulo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workorderattachment',
+            name='nombre_original',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(backfill_nombre_original, migrations.RunPython.noop),
+    ]
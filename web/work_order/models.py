@@ -1,3 +1,5 @@
+import os
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -55,6 +57,10 @@ class WorkOrder(models.Model):
         verbose_name = "Orden de Trabajo"
         verbose_name_plural = "Órdenes de Trabajo"
         ordering = ["-fecha_creacion"]
+        indexes = [
+            # Autocompletado por prefijo (core/autocomplete.py); numero ya es único
+            models.Index(fields=["titulo"], name="workorder_titulo_idx"),
+        ]
 
     def __str__(self):
         return f"{self.numero} – {self.titulo}"
@@ -70,10 +76,22 @@ class WorkOrder(models.Model):
 class WorkOrderAttachment(models.Model):
     orden = models.ForeignKey(WorkOrder, on_delete=models.CASCADE, related_name="adjuntos")
     archivo = models.FileField(upload_to="workorders/")
+    # El storage guarda el archivo con el hash de su contenido (core/storage.py): el nombre que
+    # subió el usuario se conserva acá para la descarga
+    nombre_original = models.CharField(max_length=255, blank=True)
     descripcion = models.CharField(max_length=255, blank=True)
     subido_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     subido_en = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        # Antes de guardar, archivo.name todavía es el nombre del archivo subido
+        if self.archivo and not self.archivo._committed:
+            self.nombre_original = os.path.basename(self.archivo.name)[:255]
+        super().save(*args, **kwargs)
+
+    def nombre_descarga(self):
+        return self.nombre_original or os.path.basename(self.archivo.name)
+
     class Meta:
         verbose_name = "Adjunto de Orden"
         verbose_name_plural = "Adjuntos de Orden"
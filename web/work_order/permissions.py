@@ -1,5 +1,7 @@
 from django.contrib.auth.mixins import UserPassesTestMixin
 
+from accounts.roles import get_roles
+
 
 class NotTecnicoRequiredMixin(UserPassesTestMixin):
     """
@@ -8,8 +10,5 @@ class NotTecnicoRequiredMixin(UserPassesTestMixin):
     """
     
     def test_func(self):
-        user = self.request.user
-        if not user.is_authenticated:
-            return False
-        # Verificar si el usuario NO está en el grupo técnico
-        return not user.groups.filter(name__iregex="^t[eé]cnico$").exists()
+        # Rol resuelto una vez por request (accounts/roles.py), sin consultas
+        return get_roles(self.request.user).can_edit_work_orders
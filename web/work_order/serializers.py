@@ -1,11 +1,21 @@
+from django.urls import reverse
 from rest_framework import serializers
 from .models import WorkOrder, WorkOrderAttachment
 
 
 class WorkOrderAttachmentSerializer(serializers.ModelSerializer):
+    # El archivo se guarda por hash; la descarga usa el nombre original
+    descarga = serializers.SerializerMethodField()
+
     class Meta:
         model = WorkOrderAttachment
-        fields = ['id', 'archivo', 'descripcion', 'subido_por', 'subido_en']
+        fields = ['id', 'archivo', 'nombre_original', 'descarga', 'descripcion', 'subido_por', 'subido_en']
+        read_only_fields = ['nombre_original']
+
+    def get_descarga(self, obj):
+        url = reverse('work_order:adjunto-descargar', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 
 class WorkOrderSerializer(serializers.ModelSerializer):
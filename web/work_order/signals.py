@@ -1,7 +1,11 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from django.db.models import Q
 from django.utils import timezone
-from .models import WorkOrder
+from core.changefeed import record_change, record_changes
+from core.storage import delete_file_later
+from .models import WorkOrder, WorkOrderAttachment
 import logging
 
 
@@ -14,6 +18,8 @@ def work_order_pre_save(sender, instance, **kwargs):
     if instance.pk:  # Solo para actualizaciones
         try:
             old_instance = WorkOrder.objects.get(pk=instance.pk)
+            # Para actualizar el resumen del cliente solo si cambia algo que lo afecte
+            instance._summary_before = (old_instance.cliente_id, old_instance.estado)
             if old_instance.estado != instance.estado and instance.estado == WorkOrder.Estado.CERRADA:
                 instance.fecha_cierre = timezone.now()
         except WorkOrder.DoesNotExist:
@@ -33,6 +39,67 @@ def work_order_post_save(sender, instance, created, **kwargs):
         pass
 
 
+@receiver(post_save, sender=WorkOrder)
+def registrar_cambio_orden(sender, instance, created, **kwargs):
+    """
+    Registra la alta/modificación en el feed de cambios
+    """
+    record_change(instance, 'created' if created else 'updated')
+
+
+@receiver(post_save, sender=WorkOrder)
+def actualizar_resumen_cliente(sender, instance, created, **kwargs):
+    """
+    Recalcula el resumen del cliente (y del anterior, si la orden cambió de cliente)
+    """
+    before = getattr(instance, '_summary_before', None)
+    if not created and before == (instance.cliente_id, instance.estado):
+        return
+    from clients.summary import refresh_client_summaries
+    refresh_client_summaries({instance.cliente_id, before[0] if before else None})
+    instance._summary_before = (instance.cliente_id, instance.estado)
+
+
+@receiver(pre_delete, sender=WorkOrder)
+def recordar_resumenes_orden(sender, instance, **kwargs):
+    """
+    Guarda los días (técnico, fecha) con horas imputadas a la orden que se elimina
+    """
+    from worklog.models import WorkLog, WorkLogDailyRollup
+    instance._rollup_keys = set(
+        WorkLogDailyRollup.objects.filter(work_order_ref=instance).values_list('technician_id', 'day')
+    )
+    # Sus tareas quedan sin orden (SET_NULL, sin pasar por WorkLog.save())
+    instance._worklog_owners = dict(WorkLog.objects.filter(work_order_ref=instance).values_list('id', 'technician_id'))
+
+
+@receiver(post_delete, sender=WorkOrder)
+def registrar_baja_orden(sender, instance, **kwargs):
+    """
+    Registra la baja (y el cambio de sus tareas) en el feed de cambios y recalcula los
+    resúmenes diarios afectados
+    """
+    record_change(instance, 'deleted')
+    from worklog.models import WorkLog
+    owners = getattr(instance, '_worklog_owners', {})
+    record_changes(WorkLog, list(owners), 'updated', technician_ids=owners)
+
+    from worklog.rollups import refresh_daily_rollups
+    refresh_daily_rollups(getattr(instance, '_rollup_keys', set()))
+
+    from clients.summary import refresh_client_summaries
+    refresh_client_summaries({instance.cliente_id})
+
+
+@receiver(post_delete, sender=WorkOrderAttachment)
+def borrar_archivo_adjunto(sender, instance, **kwargs):
+    """
+    Elimina el archivo del adjunto (también al borrar la orden en cascada)
+    """
+    if instance.archivo:
+        delete_file_later(instance.archivo.name)
+
+
 @receiver(post_save, sender=WorkOrder)
 def notificar_bot(sender, instance: WorkOrder, created, **kwargs):
     try:
@@ -42,3 +109,23 @@ def notificar_bot(sender, instance: WorkOrder, created, **kwargs):
             logging.getLogger(__name__).info(f"[BOT] OT actualizada {instance.numero} – estado={instance.estado}")
     except Exception as e:
         logging.getLogger(__name__).error(f"No se pudo notificar: {e}")
+
+
+@receiver(pre_delete, sender=get_user_model())
+def recordar_ordenes_usuario(sender, instance, **kwargs):
+    """
+    Guarda las órdenes que pierden al usuario como asignado, creador o último editor (SET_NULL)
+    """
+    instance._nulled_work_orders = list(
+        WorkOrder.objects
+        .filter(Q(asignado_a=instance) | Q(creado_por=instance) | Q(actualizado_por=instance))
+        .values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=get_user_model())
+def registrar_ordenes_usuario(sender, instance, **kwargs):
+    """
+    Registra en el feed de cambios las órdenes modificadas por el borrado del usuario
+    """
+    record_changes(WorkOrder, getattr(instance, '_nulled_work_orders', []), 'updated')
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from .views import (
     OrdenListView, OrdenDetailView, OrdenCreateView, OrdenUpdateView,
-    WorkOrderViewSet,
+    AdjuntoDownloadView, WorkOrderViewSet,
 )
 from rest_framework.routers import DefaultRouter
 
@@ -15,5 +15,6 @@ urlpatterns = [
     path("crear/", OrdenCreateView.as_view(), name="create"),
     path("<int:pk>/", OrdenDetailView.as_view(), name="detail"),
     path("<int:pk>/editar/", OrdenUpdateView.as_view(), name="update"),
+    path("adjuntos/<int:pk>/descargar/", AdjuntoDownloadView.as_view(), name="adjunto-descargar"),
     path("api/", include(router.urls)),
 ]
@@ -1,18 +1,39 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
-from django.views.generic import ListView, DetailView, CreateView, UpdateView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, View
 from django.db.models import Prefetch, Q
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from datetime import datetime, timedelta
-from .models import WorkOrder
+from .models import WorkOrder, WorkOrderAttachment
 from .forms import WorkOrderForm, WorkOrderFilterForm
 from .permissions import NotTecnicoRequiredMixin
+from core.db import read_only_view
+from accounts.roles import get_roles
 
 try:
     from worklog.models import WorkLog
 except Exception:  # pragma: no cover
     WorkLog = None
 
+def tiene_acceso(user, orden):
+    """Un técnico solo ve las órdenes asignadas a él o en las que colaboró en alguna tarea"""
+    if not get_roles(user).is_tecnico:
+        return True
+
+    # Verificar asignación directa
+    if orden.asignado_a_id == user.pk:
+        return True
+
+    # Verificar si es colaborador en alguna tarea
+    return bool(WorkLog) and WorkLog.objects.filter(
+        work_order_ref=orden,
+        collaborator=user
+    ).exists()
+
+@method_decorator(read_only_view, name='dispatch')
 class OrdenListView(LoginRequiredMixin, ListView):
     model = WorkOrder
     paginate_by = 20
@@ -23,22 +44,20 @@ class OrdenListView(LoginRequiredMixin, ListView):
         queryset = super().get_queryset().select_related('cliente', 'asignado_a')
         
         # Si el usuario es técnico, filtrar solo las órdenes asignadas a él o donde figure como colaborador
-        if hasattr(self.request.user, 'user_type'):
-            is_tecnico = self.request.user.user_type == 'tecnico'
-            if is_tecnico:
-                # Obtener órdenes asignadas directamente al técnico
-                assigned_orders = queryset.filter(asignado_a=self.request.user)
+        if get_roles(self.request.user).is_tecnico:
+            # Obtener órdenes asignadas directamente al técnico
+            assigned_orders = queryset.filter(asignado_a=self.request.user)
+            
+            # Obtener órdenes donde el técnico aparece como colaborador en alguna tarea
+            if WorkLog:
+                collaborator_orders = queryset.filter(
+                    worklogs__collaborator=self.request.user
+                ).distinct()
                 
-                # Obtener órdenes donde el técnico aparece como colaborador en alguna tarea
-                if WorkLog:
-                    collaborator_orders = queryset.filter(
-                        worklogs__collaborator=self.request.user
-                    ).distinct()
-                    
-                    # Combinar ambos querysets usando union para evitar problemas de unicidad
-                    queryset = assigned_orders.union(collaborator_orders)
-                else:
-                    queryset = assigned_orders
+                # Combinar ambos querysets usando union para evitar problemas de unicidad
+                queryset = assigned_orders.union(collaborator_orders)
+            else:
+                queryset = assigned_orders
         
         # Aplicar filtros
         form = WorkOrderFilterForm(self.request.GET or None)
@@ -61,7 +80,8 @@ class OrdenListView(LoginRequiredMixin, ListView):
             
             cuit = form.cleaned_data.get('cuit')
             if cuit:
-                queryset = queryset.filter(cliente__cuit__icontains=cuit)
+                # El CUIT del cliente se guarda sin guiones
+                queryset = queryset.filter(cliente__cuit__icontains=cuit.replace('-', '').replace(' ', ''))
             
             numero_ot = form.cleaned_data.get('numero_ot')
             if numero_ot:
@@ -155,6 +175,7 @@ class OrdenListView(LoginRequiredMixin, ListView):
         
         return context
 
+@method_decorator(read_only_view, name='dispatch')
 class OrdenDetailView(LoginRequiredMixin, DetailView):
     model = WorkOrder
     template_name = "work_order/detail.html"
@@ -163,27 +184,8 @@ class OrdenDetailView(LoginRequiredMixin, DetailView):
         obj = super().get_object(queryset)
         
         # Si el usuario es técnico, verificar que tenga acceso a esta orden
-        if hasattr(self.request.user, 'user_type'):
-            is_tecnico = self.request.user.user_type == 'tecnico'
-            if is_tecnico:
-                # Verificar si está asignado directamente o es colaborador
-                has_access = False
-                
-                # Verificar asignación directa
-                if obj.asignado_a == self.request.user:
-                    has_access = True
-                
-                # Verificar si es colaborador en alguna tarea
-                if not has_access and WorkLog:
-                    has_access = WorkLog.objects.filter(
-                        work_order_ref=obj,
-                        collaborator=self.request.user
-                    ).exists()
-                
-                # Si no tiene acceso, lanzar error 403
-                if not has_access:
-                    from django.http import Http404
-                    raise Http404("Orden de trabajo no encontrada o acceso denegado.")
+        if not tiene_acceso(self.request.user, obj):
+            raise Http404("Orden de trabajo no encontrada o acceso denegado.")
         
         return obj
 
@@ -225,6 +227,21 @@ class OrdenDetailView(LoginRequiredMixin, DetailView):
     
     
 
+@method_decorator(read_only_view, name='dispatch')
+class AdjuntoDownloadView(LoginRequiredMixin, View):
+    """Descarga un adjunto con el nombre con el que se subió (el storage lo guarda por hash)"""
+
+    def get(self, request, pk):
+        adjunto = get_object_or_404(WorkOrderAttachment.objects.select_related('orden'), pk=pk)
+        if not tiene_acceso(request.user, adjunto.orden):
+            raise Http404("Adjunto no encontrado o acceso denegado.")
+        try:
+            archivo = adjunto.archivo.open('rb')
+        except FileNotFoundError:
+            raise Http404("El archivo del adjunto no existe.")
+        return FileResponse(archivo, as_attachment=True, filename=adjunto.nombre_descarga())
+
+
 class OrdenCreateView(LoginRequiredMixin, NotTecnicoRequiredMixin, CreateView):
     model = WorkOrder
     form_class = WorkOrderForm
@@ -250,7 +267,7 @@ class NotTecnicoWritePermission(permissions.BasePermission):
             return request.user and request.user.is_authenticated
         if not request.user or not request.user.is_authenticated:
             return False
-        return getattr(request.user, 'user_type', '') != 'tecnico'
+        return get_roles(request.user).can_edit_work_orders
 
 class WorkOrderViewSet(viewsets.ModelViewSet):
     queryset = WorkOrder.objects.all().select_related("cliente", "asignado_a")
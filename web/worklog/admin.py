@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WorkLog, WorkLogHistory
+from .models import TranscriptSegment, WorkLog, WorkLogHistory
 
 @admin.register(WorkLog)
 class WorkLogAdmin(admin.ModelAdmin):
@@ -31,6 +31,11 @@ class WorkLogAdmin(admin.ModelAdmin):
         else:  # Si se está editando
             obj.updated_by = request.user
         super().save_model(request, obj, form, change)
+
+    def delete_queryset(self, request, queryset):
+        # Una por una: WorkLog.delete() registra la baja en el feed y actualiza audio y resúmenes
+        for obj in queryset:
+            obj.delete()
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -58,3 +63,12 @@ class WorkLogHistoryAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return request.user.is_superuser
+
+
+@admin.register(TranscriptSegment)
+class TranscriptSegmentAdmin(admin.ModelAdmin):
+    list_display = ['worklog', 'start', 'end', 'text', 'avg_logprob']
+    # Búsqueda dentro de las transcripciones: cada resultado trae el segundo del audio
+    search_fields = ['text']
+    raw_id_fields = ['worklog']
+    list_select_related = ['worklog__technician']
@@ -1,14 +1,31 @@
 from django import forms
 from .models import WorkLog
+from .intervals import find_overlaps, describe_overlaps
+from accounts.roles import get_roles
+from core.autocomplete import AutocompleteSelect
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+def check_worklog_overlaps(technician_id, start, end, exclude_id=None):
+    """Rechaza tareas que se superponen con otras del mismo técnico"""
+    if not (start and end and end > start):
+        return
+    overlapping = find_overlaps(technician_id, start, end, exclude_id=exclude_id)
+    if overlapping.exists():
+        raise forms.ValidationError(
+            "El horario se superpone con otras tareas del técnico: %(tareas)s",
+            params={'tareas': describe_overlaps(overlapping)},
+        )
+
+
 class WorkLogFilterForm(forms.Form):
     technician = forms.ModelChoiceField(
         queryset=User.objects.all(),
         required=False,
-        label="Técnico"
+        label="Técnico",
+        widget=AutocompleteSelect('usuarios'),
     )
     task_type = forms.ChoiceField(
         choices=[('', '---------')] + WorkLog.TASK_TYPES,
@@ -33,7 +50,8 @@ class WorkLogForm(forms.ModelForm):
         queryset=None,  # Se establecerá en __init__
         required=False,
         empty_label="Seleccionar orden de trabajo (opcional)",
-        label="Orden de trabajo"
+        label="Orden de trabajo",
+        widget=AutocompleteSelect('ordenes-activas'),
     )
     
     class Meta:
@@ -47,6 +65,7 @@ class WorkLogForm(forms.ModelForm):
             'start': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'end': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'description': forms.Textarea(attrs={'rows': 5}),
+            'collaborator': AutocompleteSelect('usuarios'),
         }
     
     def __init__(self, *args, **kwargs):
@@ -54,15 +73,13 @@ class WorkLogForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Restringir estados para técnicos
-        if self.user and hasattr(self.user, 'groups'):
-            is_tecnico = self.user.groups.filter(name__iregex="^t[eé]cnico$").exists()
-            if is_tecnico:
-                # Los técnicos no pueden usar 'abierta' y 'cerrada'
-                restricted_choices = [
-                    choice for choice in self.fields['status'].choices 
-                    if choice[0] not in ['abierta', 'cerrada']
-                ]
-                self.fields['status'].choices = restricted_choices
+        roles = get_roles(self.user)
+        if roles.is_tecnico:
+            # Los técnicos no pueden usar 'abierta' y 'cerrada'
+            self.fields['status'].choices = [
+                choice for choice in self.fields['status'].choices
+                if roles.can_use_status(choice[0])
+            ]
         
         # Intentar importar WorkOrder y establecer el queryset
         try:
@@ -113,6 +130,9 @@ class WorkLogForm(forms.ModelForm):
             if field_km_one_way is not None and field_km_one_way < 0:
                 raise forms.ValidationError("Los kilómetros de ida deben ser un número positivo.")
 
+        # En el alta la tarea se imputa al usuario que la carga
+        check_worklog_overlaps(getattr(self.user, 'pk', None), start, end)
+
         return cleaned_data
 
 
@@ -123,7 +143,8 @@ class WorkLogEditForm(forms.ModelForm):
         queryset=None,  # Se establecerá en __init__
         required=False,
         empty_label="Seleccionar orden de trabajo (opcional)",
-        label="Orden de trabajo"
+        label="Orden de trabajo",
+        widget=AutocompleteSelect('ordenes-activas'),
     )
     
     class Meta:
@@ -137,6 +158,7 @@ class WorkLogEditForm(forms.ModelForm):
             'start': forms.DateTimeInput(attrs={'type': 'text', 'class': 'form-control'}),
             'end': forms.DateTimeInput(attrs={'type': 'text', 'class': 'form-control'}),
             'description': forms.Textarea(attrs={'rows': 5}),
+            'collaborator': AutocompleteSelect('usuarios'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -144,15 +166,13 @@ class WorkLogEditForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Restringir estados para técnicos
-        if self.user and hasattr(self.user, 'groups'):
-            is_tecnico = self.user.groups.filter(name__iregex="^t[eé]cnico$").exists()
-            if is_tecnico:
-                # Los técnicos no pueden usar 'abierta' y 'cerrada'
-                restricted_choices = [
-                    choice for choice in self.fields['status'].choices 
-                    if choice[0] not in ['abierta', 'cerrada']
-                ]
-                self.fields['status'].choices = restricted_choices
+        roles = get_roles(self.user)
+        if roles.is_tecnico:
+            # Los técnicos no pueden usar 'abierta' y 'cerrada'
+            self.fields['status'].choices = [
+                choice for choice in self.fields['status'].choices
+                if roles.can_use_status(choice[0])
+            ]
         
         # Intentar importar WorkOrder y establecer el queryset
         try:
@@ -205,4 +225,6 @@ class WorkLogEditForm(forms.ModelForm):
             if field_km_one_way is not None and field_km_one_way < 0:
                 raise forms.ValidationError("Los kilómetros de ida deben ser un número positivo.")
 
+        check_worklog_overlaps(self.instance.technician_id, start, end, exclude_id=self.instance.pk)
+
         return cleaned_data
@@ -0,0 +1,181 @@
+"""
+Control de intervalos de tiempo de las tareas (superposiciones y huecos).
+
+Las tareas de un técnico se recorren ordenadas por inicio: alcanza con comparar
+cada una contra la que termina más tarde entre las anteriores, así que una
+auditoría completa es O(n) sobre el índice (technician, start, end) en lugar de
+comparar todos los pares.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import WorkLog
+
+
+def gap_threshold():
+    """Hueco mínimo (timedelta) que se informa; configurable con WORKLOG_GAP_WARNING_MINUTES"""
+    return timedelta(minutes=getattr(settings, 'WORKLOG_GAP_WARNING_MINUTES', 60))
+
+
+def _minutes(delta):
+    return round(delta.total_seconds() / 60)
+
+
+class IntervalSweep:
+    """
+    Barrido incremental sobre tareas de un mismo técnico ordenadas por inicio.
+    push() devuelve la superposición o el hueco detectado (o None).
+    Los huecos solo se informan dentro de un mismo día local.
+    """
+
+    def __init__(self, min_gap=None):
+        self.min_gap = min_gap
+        self.latest = None  # (end, id) de la tarea que más se extiende hasta ahora
+
+    def reset(self):
+        self.latest = None
+
+    def push(self, wl_id, start, end):
+        finding = None
+        if self.latest:
+            latest_end, latest_id = self.latest
+            if start < latest_end:
+                overlap_end = min(end, latest_end)
+                finding = {
+                    'kind': 'overlap',
+                    'first_id': latest_id,
+                    'second_id': wl_id,
+                    'start': start,
+                    'end': overlap_end,
+                    'minutes': _minutes(overlap_end - start),
+                }
+            elif (self.min_gap is not None and start - latest_end >= self.min_gap
+                    and timezone.localdate(start) == timezone.localdate(latest_end)):
+                finding = {
+                    'kind': 'gap',
+                    'first_id': latest_id,
+                    'second_id': wl_id,
+                    'start': latest_end,
+                    'end': start,
+                    'minutes': _minutes(start - latest_end),
+                }
+        if self.latest is None or end > self.latest[0]:
+            self.latest = (end, wl_id)
+        return finding
+
+
+def audit_intervals(queryset=None, min_gap=None):
+    """
+    Recorre todas las tareas (o las del queryset) agrupadas por técnico y devuelve
+    un generador de hallazgos con 'technician_id' agregado.
+    """
+    queryset = WorkLog.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('technician_id', 'start', 'id').values_list('technician_id', 'id', 'start', 'end')
+
+    sweep = IntervalSweep(min_gap=min_gap)
+    current_tech = None
+    for tech_id, wl_id, start, end in rows.iterator(chunk_size=5000):
+        if tech_id != current_tech:
+            current_tech = tech_id
+            sweep.reset()
+        finding = sweep.push(wl_id, start, end)
+        if finding:
+            finding['technician_id'] = tech_id
+            yield finding
+
+
+def find_overlaps(technician_id, start, end, exclude_id=None):
+    """Tareas del técnico que se superponen con [start, end); consulta por índice"""
+    if technician_id is None or start is None or end is None:
+        return WorkLog.objects.none()
+    overlapping = WorkLog.objects.filter(technician_id=technician_id, start__lt=end, end__gt=start)
+    if exclude_id:
+        overlapping = overlapping.exclude(pk=exclude_id)
+    return overlapping.order_by('start')
+
+
+def find_batch_overlaps(technician_id, intervals):
+    """
+    Superposiciones de un lote de tareas nuevas del técnico, entre sí y con las ya guardadas.
+    intervals es una lista de (start, end); devuelve {posición: con_qué_se_superpone}, donde
+    el valor es la WorkLog guardada o la posición de otra tarea del lote.
+
+    Con todo ordenado por inicio alcanzan dos comparaciones por tarea: contra la anterior
+    que termina más tarde y contra la siguiente que empieza.
+    """
+    if not intervals:
+        return {}
+    stored = WorkLog.objects.filter(
+        technician_id=technician_id,
+        start__lt=max(end for _, end in intervals),
+        end__gt=min(start for start, _ in intervals),
+    ).only('id', 'start', 'end')
+
+    # (start, end, posición en el lote o None, WorkLog guardada o None)
+    items = [(wl.start, wl.end, None, wl) for wl in stored]
+    items += [(start, end, position, None) for position, (start, end) in enumerate(intervals)]
+    items.sort(key=lambda item: (item[0], item[1]))
+
+    def partner(item):
+        return item[3] if item[2] is None else item[2]
+
+    found = {}
+    latest = None
+    for index, item in enumerate(items):
+        start, end, position, _ = item
+        if position is not None:
+            if latest is not None and latest[1] > start:
+                found[position] = partner(latest)
+            elif index + 1 < len(items) and items[index + 1][0] < end:
+                found[position] = partner(items[index + 1])
+        if latest is None or end > latest[1]:
+            latest = item
+    return found
+
+
+def find_gaps(worklog, min_gap=None):
+    """
+    Huecos del mismo día local entre la tarea y la anterior/siguiente del técnico.
+    Devuelve una lista de (desde, hasta).
+    """
+    min_gap = gap_threshold() if min_gap is None else min_gap
+    day = timezone.localdate(worklog.start)
+    others = WorkLog.objects.filter(technician_id=worklog.technician_id).exclude(pk=worklog.pk)
+
+    gaps = []
+    previous_end = (
+        others.filter(start__lt=worklog.start, end__lte=worklog.start)
+        .order_by('-end').values_list('end', flat=True).first()
+    )
+    if previous_end and timezone.localdate(previous_end) == day and worklog.start - previous_end >= min_gap:
+        gaps.append((previous_end, worklog.start))
+
+    next_start = (
+        others.filter(start__gte=worklog.end)
+        .order_by('start').values_list('start', flat=True).first()
+    )
+    if next_start and timezone.localdate(next_start) == day and next_start - worklog.end >= min_gap:
+        gaps.append((worklog.end, next_start))
+    return gaps
+
+
+def describe_overlaps(worklogs, limit=3):
+    """Texto breve con las tareas superpuestas, para mensajes al usuario"""
+    tz = timezone.get_current_timezone()
+    worklogs = list(worklogs[:limit + 1])
+    parts = [
+        f"#{wl.pk} ({wl.start.astimezone(tz):%d/%m %H:%M}–{wl.end.astimezone(tz):%H:%M})"
+        for wl in worklogs[:limit]
+    ]
+    if len(worklogs) > limit:
+        parts.append("…")
+    return ", ".join(parts)
+
+
+def describe_batch_overlap(partner):
+    """Mensaje para una tarea de un lote según con qué se superpone (ver find_batch_overlaps)"""
+    if isinstance(partner, WorkLog):
+        return f"El horario se superpone con otras tareas del técnico: {describe_overlaps([partner])}"
+    return f"El horario se superpone con la tarea en la posición {partner} del lote."
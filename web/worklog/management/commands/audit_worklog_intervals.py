@@ -0,0 +1,76 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from worklog.intervals import audit_intervals, gap_threshold
+from worklog.models import WorkLog
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Audita todas las tareas buscando superposiciones y huecos por técnico (barrido ordenado, O(n))"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-gap", type=int, help="Hueco mínimo en minutos (por defecto WORKLOG_GAP_WARNING_MINUTES)")
+        parser.add_argument("--no-gaps", action="store_true", help="Informar solo superposiciones")
+        parser.add_argument("--technician", help="Username del técnico a auditar")
+        parser.add_argument("--since", help="Fecha inicial YYYY-MM-DD")
+        parser.add_argument("--summary", action="store_true", help="Mostrar solo los totales por técnico")
+
+    def handle(self, *args, **options):
+        queryset = WorkLog.objects.all()
+        if options["technician"]:
+            technician = User.objects.filter(username=options["technician"]).first()
+            if not technician:
+                raise CommandError(f"Usuario '{options['technician']}' no encontrado.")
+            queryset = queryset.filter(technician=technician)
+        if options["since"]:
+            try:
+                since = datetime.strptime(options["since"], "%Y-%m-%d")
+            except ValueError:
+                raise CommandError("--since debe tener el formato YYYY-MM-DD")
+            queryset = queryset.filter(start__gte=timezone.make_aware(since))
+
+        if options["no_gaps"]:
+            min_gap = None
+        elif options["min_gap"] is not None:
+            min_gap = timedelta(minutes=options["min_gap"])
+        else:
+            min_gap = gap_threshold()
+
+        names = dict(
+            (user.pk, user.get_full_name() or user.username)
+            for user in User.objects.filter(pk__in=queryset.values('technician')).only('username', 'first_name', 'last_name')
+        )
+        tz = timezone.get_current_timezone()
+        totals = Counter()
+
+        started = time.perf_counter()
+        for finding in audit_intervals(queryset, min_gap=min_gap):
+            totals[(finding['technician_id'], finding['kind'])] += 1
+            if options["summary"]:
+                continue
+            label = "SUPERPOSICIÓN" if finding['kind'] == 'overlap' else "HUECO"
+            self.stdout.write(
+                f"{label:<13} {names.get(finding['technician_id'], finding['technician_id'])}: "
+                f"#{finding['first_id']} / #{finding['second_id']} "
+                f"{finding['start'].astimezone(tz):%Y-%m-%d %H:%M} → {finding['end'].astimezone(tz):%H:%M} "
+                f"({finding['minutes']} min)"
+            )
+        elapsed = time.perf_counter() - started
+
+        for tech_id in sorted({key[0] for key in totals}, key=lambda pk: names.get(pk, '')):
+            self.stdout.write(
+                f"{names.get(tech_id, tech_id)}: {totals[(tech_id, 'overlap')]} superposiciones, "
+                f"{totals[(tech_id, 'gap')]} huecos"
+            )
+        overlaps = sum(count for (_, kind), count in totals.items() if kind == 'overlap')
+        gaps = sum(count for (_, kind), count in totals.items() if kind == 'gap')
+        self.stdout.write(self.style.SUCCESS(
+            f"Auditoría terminada en {elapsed:.2f}s: {overlaps} superposiciones, {gaps} huecos."
+        ))
@@ -0,0 +1,195 @@
+import importlib.util
+import itertools
+import json
+import logging
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from worklog.transcription import TranscriptionConfig, get_model, transcribe
+
+AUDIO_EXTENSIONS = {".ogg", ".oga", ".opus", ".mp3", ".m4a", ".wav"}
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _benchmark_config(config_kwargs, clips, repeat):
+    """
+    Corre en un proceso nuevo por configuración: la carga del modelo y el pico
+    de memoria de una configuración no se mezclan con los de otra.
+    """
+    logging.getLogger("faster_whisper").setLevel(logging.WARNING)
+    config = TranscriptionConfig(**config_kwargs)
+
+    started = time.perf_counter()
+    get_model(config)
+    load_seconds = time.perf_counter() - started
+    rss_after_load = _peak_rss_mb()
+
+    transcribe(clips[0], config)  # calentamiento
+
+    def one(clip):
+        clip_started = time.perf_counter()
+        result = transcribe(clip, config)
+        return time.perf_counter() - clip_started, result
+
+    jobs = [clip for _ in range(repeat) for clip in clips]
+    cpu_started, wall_started = _cpu_seconds(), time.perf_counter()
+    # Con num_workers > 1 el modelo atiende transcripciones en paralelo, como varios audios a la vez en el bot
+    with ThreadPoolExecutor(max_workers=config.num_workers) as pool:
+        runs = list(pool.map(one, jobs))
+    wall = time.perf_counter() - wall_started
+    cpu = _cpu_seconds() - cpu_started
+
+    latencies = sorted(latency for latency, _ in runs)
+    audio_seconds = sum(result.duration for _, result in runs)
+    throughput = audio_seconds / wall if wall else 0.0
+    return {
+        "config": config.as_dict(),
+        "label": config.label(),
+        "clips": len(clips),
+        "runs": len(runs),
+        "load_seconds": round(load_seconds, 2),
+        "audio_seconds": round(audio_seconds, 1),
+        "wall_seconds": round(wall, 2),
+        "cpu_seconds": round(cpu, 2),
+        # Tiempo de proceso / duración del audio: < 1 es más rápido que tiempo real
+        "rtf": round(sum(latencies) / audio_seconds, 3) if audio_seconds else None,
+        "latency_p50": round(statistics.median(latencies), 2),
+        "latency_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        "latency_max": round(latencies[-1], 2),
+        # Segundos de audio por segundo de reloj, total y por núcleo asignado
+        "throughput": round(throughput, 2),
+        "throughput_per_core": round(throughput / config.cores, 3),
+        "audio_per_cpu_second": round(audio_seconds / cpu, 3) if cpu else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "model_rss_mb": round(rss_after_load, 1),
+        "empty": sum(1 for _, result in runs if not result.text),
+        "vad_fallbacks": sum(1 for _, result in runs if config.vad_filter and not result.used_vad),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Transcribe un corpus fijo de audios con faster-whisper bajo distintas configuraciones "
+        "y reporta factor de tiempo real, latencia p95, pico de memoria y throughput por núcleo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corpus", help="Directorio con los audios (por defecto MEDIA_ROOT/worklog_audios)"
+        )
+        parser.add_argument("--limit", type=int, default=20, help="Máximo de audios del corpus (por nombre)")
+        parser.add_argument("--repeat", type=int, default=1, help="Pasadas sobre el corpus por configuración")
+        parser.add_argument("--model", action="append", help="Modelo(s) a probar (repetible)")
+        parser.add_argument("--compute-type", action="append", help="int8, int8_float32, float32, ... (repetible)")
+        parser.add_argument("--beam-size", type=int, action="append", help="Beam size (repetible)")
+        parser.add_argument("--cpu-threads", type=int, action="append", help="Hilos de CTranslate2 (repetible)")
+        parser.add_argument("--num-workers", type=int, action="append", help="Transcripciones en paralelo (repetible)")
+        parser.add_argument(
+            "--vad", choices=["si", "no", "ambos"], help="Filtro VAD (por defecto el de settings)"
+        )
+        parser.add_argument("--output", help="Guardar los resultados en este JSON")
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec("faster_whisper") is None:
+            raise CommandError("faster-whisper no está instalado en este entorno.")
+
+        clips = self._corpus(options)
+        configs = self._configs(options)
+        self.stdout.write(
+            f"Corpus: {len(clips)} audios, {len(configs)} configuraciones, {options['repeat']} pasada(s)"
+        )
+
+        results = []
+        # spawn: cada configuración arranca sin modelos cargados ni memoria heredada
+        context = multiprocessing.get_context("spawn")
+        for config in configs:
+            self.stdout.write(f"→ {config.label()}")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                try:
+                    result = pool.submit(
+                        _benchmark_config, config.as_dict(), [str(clip) for clip in clips], options["repeat"]
+                    ).result()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"  error: {e}"))
+                    results.append({"config": config.as_dict(), "label": config.label(), "error": str(e)})
+                    continue
+            results.append(result)
+            self.stdout.write(
+                f"  RTF {result['rtf']}  p95 {result['latency_p95']}s  "
+                f"{result['throughput']}x tiempo real ({result['throughput_per_core']}x por núcleo)  "
+                f"RSS pico {result['peak_rss_mb']} MB  carga {result['load_seconds']}s"
+            )
+
+        self._summary(results)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps({
+                "corpus": [clip.name for clip in clips],
+                "repeat": options["repeat"],
+                "results": results,
+            }, indent=2, ensure_ascii=False))
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def _corpus(self, options):
+        directory = Path(options["corpus"] or Path(settings.MEDIA_ROOT) / "worklog_audios")
+        if not directory.is_dir():
+            raise CommandError(f"No existe el directorio {directory}")
+        # Orden por nombre: el mismo corpus en cada corrida
+        # rglob: los audios nombrados por contenido están en subdirectorios (core/storage.py)
+        clips = sorted(
+            (path for path in directory.rglob("*") if path.suffix.lower() in AUDIO_EXTENSIONS and path.stat().st_size),
+            key=lambda path: path.name,
+        )[:options["limit"]]
+        if not clips:
+            raise CommandError(f"No hay audios en {directory}")
+        return clips
+
+    def _configs(self, options):
+        base = TranscriptionConfig.from_settings()
+        vad = {"si": [True], "no": [False], "ambos": [True, False]}.get(options["vad"], [base.vad_filter])
+        combinations = itertools.product(
+            options["model"] or [base.model],
+            options["compute_type"] or [base.compute_type],
+            options["beam_size"] or [base.beam_size],
+            options["cpu_threads"] or [base.cpu_threads],
+            options["num_workers"] or [base.num_workers],
+            vad,
+        )
+        # replace() conserva el resto de settings (word_timestamps, cache_dir, batch_size...), como en producción
+        return [
+            replace(
+                base, model=model, compute_type=compute_type, beam_size=beam_size,
+                cpu_threads=cpu_threads, num_workers=num_workers, vad_filter=vad_filter,
+            )
+            for model, compute_type, beam_size, cpu_threads, num_workers, vad_filter in combinations
+        ]
+
+    def _summary(self, results):
+        ok = [result for result in results if "error" not in result]
+        if len(ok) < 2:
+            return
+        self.stdout.write("\nOrdenado por throughput por núcleo:")
+        self.stdout.write(f"  {'configuración':<52} {'RTF':>6} {'p95 s':>7} {'x/núcleo':>9} {'RSS MB':>8} {'vacíos':>7}")
+        for result in sorted(ok, key=lambda item: item["throughput_per_core"], reverse=True):
+            self.stdout.write(
+                f"  {result['label']:<52} {result['rtf']:>6} {result['latency_p95']:>7} "
+                f"{result['throughput_per_core']:>9} {result['peak_rss_mb']:>8} {result['empty']:>7}"
+            )
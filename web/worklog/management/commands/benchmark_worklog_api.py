@@ -0,0 +1,92 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from worklog.views import WorkLogViewSet
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mide el throughput de la API de WorkLog: alta masiva (/bulk/) contra altas individuales"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Usuario con el que se crean las tareas")
+        parser.add_argument("--items", type=int, default=500, help="Cantidad de tareas por corrida")
+        parser.add_argument("--keep", action="store_true", help="No revertir los datos creados")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["username"]).first()
+        if not user:
+            raise CommandError(f"Usuario '{options['username']}' no encontrado.")
+
+        payload = self._build_payload(options["items"])
+        factory = APIRequestFactory()
+
+        bulk_view = WorkLogViewSet.as_view({"post": "bulk_create"})
+        single_view = WorkLogViewSet.as_view({"post": "create"})
+
+        def run_bulk():
+            request = factory.post("/worklog/api/worklogs/bulk/", payload, format="json")
+            force_authenticate(request, user=user)
+            response = bulk_view(request)
+            if response.status_code != 201:
+                raise CommandError(f"Alta masiva falló: {response.data}")
+
+        def run_single():
+            for item in payload:
+                request = factory.post("/worklog/api/worklogs/", item, format="json")
+                force_authenticate(request, user=user)
+                response = single_view(request)
+                if response.status_code != 201:
+                    raise CommandError(f"Alta individual falló: {response.data}")
+
+        for label, runner in (("bulk", run_bulk), ("individual", run_single)):
+            elapsed, queries = self._measure(runner, keep=options["keep"])
+            rate = len(payload) / elapsed if elapsed else 0
+            self.stdout.write(
+                f"{label:<10} {len(payload)} tareas en {elapsed:.3f}s "
+                f"→ {rate:,.0f} tareas/s, {queries} consultas SQL"
+            )
+
+    def _measure(self, runner, keep):
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            try:
+                with transaction.atomic():
+                    runner()
+                    if not keep:
+                        raise _Rollback()
+            except _Rollback:
+                pass
+        return time.perf_counter() - started, len(ctx.captured_queries)
+
+    def _build_payload(self, count):
+        base = timezone.now() - timedelta(days=count)
+        task_types = ["Taller", "Diligencia", "Campo"]
+        payload = []
+        for i in range(count):
+            start = base + timedelta(days=i)
+            task_type = task_types[i % len(task_types)]
+            item = {
+                "start": start.isoformat(),
+                "end": (start + timedelta(hours=2)).isoformat(),
+                "task_type": task_type,
+                "description": f"Tarea de benchmark #{i}",
+                "status": "pendiente",
+            }
+            if task_type == "Campo":
+                item["field_city"] = "Córdoba"
+                item["field_km_one_way"] = 25
+            payload.append(item)
+        return payload
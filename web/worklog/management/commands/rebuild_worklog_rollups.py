@@ -0,0 +1,27 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.summary import rebuild_client_summaries
+from worklog.rollups import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla de resúmenes diarios de horas (WorkLogDailyRollup) y los resúmenes por cliente que dependen de ella"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Reconstruir solo desde esta fecha (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("Formato de fecha inválido. Usá YYYY-MM-DD.")
+
+        created = rebuild_daily_rollups(since=since)
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes diarios generados: {created}"))
+        # La reconstrucción masiva no pasa por refresh_daily_rollups(): las horas por cliente se rehacen aparte
+        clients = rebuild_client_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes de clientes generados: {clients}"))
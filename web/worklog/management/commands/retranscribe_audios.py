@@ -0,0 +1,215 @@
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from worklog.transcription import CPU_COUNT, PLACEHOLDERS, TranscriptionConfig, decode_audio, get_model, transcribe
+
+HISTORY_USER_AGENT = "retranscribe_audios"
+
+_config = None
+
+
+def _init_worker(config_kwargs):
+    """Cada proceso carga su propio modelo una sola vez"""
+    global _config
+    logging.getLogger("faster_whisper").setLevel(logging.WARNING)
+    _config = TranscriptionConfig(**config_kwargs)
+    get_model(_config)
+
+
+def _transcribe(worklog_id, data):
+    started = time.perf_counter()
+    try:
+        result = transcribe(decode_audio(data), _config)
+    except Exception as e:
+        return worklog_id, "", [], 0.0, time.perf_counter() - started, str(e)
+    return worklog_id, result.text, result.segments, result.duration, time.perf_counter() - started, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Vuelve a transcribir los audios de tareas que quedaron sin texto o con error de transcripción, "
+        "en paralelo con un proceso (y un modelo) por grupo de núcleos. Se puede interrumpir y retomar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="Usuario al que se atribuyen los cambios en el historial (obligatorio salvo --dry-run)")
+        parser.add_argument("--threads", type=int, default=min(4, CPU_COUNT), help="Hilos de CTranslate2 por proceso")
+        parser.add_argument(
+            "--workers", type=int, default=0,
+            help="Procesos en paralelo (por defecto núcleos / --threads); cada uno carga el modelo en memoria",
+        )
+        parser.add_argument("--batch-size", type=int, default=8, help="Segmentos por lote de inferencia (0 = sin lotes)")
+        parser.add_argument("--model", help="Modelo a usar (por defecto WHISPER_MODEL)")
+        parser.add_argument("--chunk", type=int, default=25, help="Resultados por escritura en la base")
+        parser.add_argument("--limit", type=int, help="Máximo de tareas a procesar")
+        parser.add_argument(
+            "--state", default=str(Path(settings.BASE_DIR) / "retranscribe_audios.json"),
+            help="Archivo con las tareas ya intentadas sin resultado, para retomar",
+        )
+        parser.add_argument("--retry-failed", action="store_true", help="Reintentar también las que ya dieron vacío o error")
+        parser.add_argument("--dry-run", action="store_true", help="Transcribir y mostrar, sin escribir la base ni el estado")
+
+    def handle(self, *args, **options):
+        from worklog.models import WorkLog
+
+        self.dry_run = options["dry_run"]
+        self.user = None
+        if not self.dry_run:
+            if not options["username"]:
+                raise CommandError("Indicá --username (o usá --dry-run).")
+            self.user = get_user_model().objects.filter(username=options["username"]).first()
+            if self.user is None:
+                raise CommandError(f"Usuario '{options['username']}' no encontrado.")
+
+        self.state_path = Path(options["state"])
+        self.attempted = set() if options["retry_failed"] else self._load_state()
+
+        # Las que ya se resolvieron dejan de coincidir con el filtro; el estado solo guarda las que no dieron texto
+        candidates = (
+            WorkLog.objects.filter(description__in=PLACEHOLDERS)
+            .exclude(audio_file="").exclude(audio_file__isnull=True)
+            .exclude(id__in=self.attempted)
+            .order_by("id").values_list("id", "audio_file")
+        )
+        if options["limit"]:
+            candidates = candidates[:options["limit"]]
+        pending = list(candidates)
+        if not pending:
+            self.stdout.write("No hay audios para retranscribir.")
+            return
+
+        threads = max(1, options["threads"])
+        workers = options["workers"] or max(1, CPU_COUNT // threads)
+        overrides = dict(cpu_threads=threads, num_workers=1, batch_size=max(0, options["batch_size"]))
+        if options["model"]:
+            overrides["model"] = options["model"]
+        config = TranscriptionConfig.from_settings(**overrides)
+        self.stdout.write(
+            f"{len(pending)} tareas, {workers} proceso(s) × {config.label()}"
+            + (" — simulación, no se escribe nada" if self.dry_run else "")
+        )
+        self._run(pending, workers, config, options["chunk"])
+
+    def _run(self, pending, workers, config, chunk):
+        from django.core.files.storage import default_storage
+
+        self.totals = {"ok": 0, "empty": 0, "error": 0, "audio": 0.0, "busy": 0.0}
+        self.done = 0
+        self.total = len(pending)
+        buffer = []
+        started = time.perf_counter()
+
+        # spawn: los procesos no heredan conexiones a la base ni el estado de Django
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(config.as_dict(),)
+        ) as pool:
+            queue = iter(pending)
+            in_flight = set()
+            try:
+                while True:
+                    # Dos audios por proceso en vuelo: mientras uno transcribe, el siguiente ya está leído
+                    while len(in_flight) < workers * 2:
+                        item = next(queue, None)
+                        if item is None:
+                            break
+                        worklog_id, name = item
+                        try:
+                            with default_storage.open(name, "rb") as audio:
+                                data = audio.read()
+                        except Exception as e:
+                            buffer.append(self._report(worklog_id, "", [], 0.0, 0.0, f"no se pudo leer {name}: {e}"))
+                            continue
+                        in_flight.add(pool.submit(_transcribe, worklog_id, data))
+                    if not in_flight:
+                        break
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        buffer.append(self._report(*future.result()))
+                    if len(buffer) >= chunk:
+                        self._flush(buffer)
+                        buffer = []
+            finally:
+                # También si se interrumpe: lo ya transcripto no se pierde
+                self._flush(buffer)
+
+        self._summary(time.perf_counter() - started)
+
+    def _report(self, worklog_id, text, segments, duration, seconds, error):
+        self.done += 1
+        status = "error" if error else ("ok" if text else "empty")
+        self.totals[status] += 1
+        self.totals["audio"] += duration
+        self.totals["busy"] += seconds
+        rtf = f"RTF {seconds / duration:.2f}" if duration else "RTF n/a"
+        detail = {"ok": "✓", "empty": "sin texto", "error": f"error: {error}"}[status]
+        self.stdout.write(
+            f"[{self.done}/{self.total}] #{worklog_id} {duration:.1f}s de audio en {seconds:.1f}s ({rtf}) {detail}"
+        )
+        return worklog_id, text, segments
+
+    def _flush(self, results):
+        if not results or self.dry_run:
+            return
+        from core.changefeed import record_changes
+        from worklog.models import TranscriptSegment, WorkLog, WorkLogHistory
+
+        texts = {worklog_id: (text, segments) for worklog_id, text, segments in results if text}
+        now = timezone.now()
+        with transaction.atomic():
+            # Solo las que siguen con el texto provisorio: una descripción editada a mano mientras
+            # corría el comando no se pisa. El bloqueo evita que se edite entre esta lectura y el update
+            current = list(
+                WorkLog.objects.filter(id__in=texts, description__in=PLACEHOLDERS)
+                .select_for_update().order_by("id").values_list("id", "description", "technician_id")
+            )
+            updated = [WorkLog(id=worklog_id, description=texts[worklog_id][0], updated_at=now) for worklog_id, _, _ in current]
+            # bulk_update no pasa por save(): updated_at y el feed de cambios se registran a mano
+            WorkLog.objects.bulk_update(updated, ["description", "updated_at"])
+            record_changes(
+                WorkLog, [worklog.id for worklog in updated], "updated",
+                technician_ids={worklog_id: technician_id for worklog_id, _, technician_id in current},
+            )
+            TranscriptSegment.replace_for({worklog.id: texts[worklog.id][1] for worklog in updated})
+            WorkLogHistory.objects.bulk_create([
+                WorkLogHistory(
+                    worklog_id=worklog_id, user=self.user, action="updated", field_name="description",
+                    old_value=old_description, new_value=texts[worklog_id][0],
+                    user_agent=HISTORY_USER_AGENT,
+                )
+                for worklog_id, old_description, _ in current
+            ])
+        skipped = len(texts) - len(current)
+        if skipped:
+            self.stdout.write(f"{skipped} tarea(s) editadas durante la transcripción: se conserva su descripción.")
+        self.attempted.update(worklog_id for worklog_id, text, _ in results if not text)
+        self._save_state()
+
+    def _load_state(self):
+        if not self.state_path.exists():
+            return set()
+        return set(json.loads(self.state_path.read_text()).get("attempted", []))
+
+    def _save_state(self):
+        self.state_path.write_text(json.dumps({"attempted": sorted(self.attempted)}))
+
+    def _summary(self, wall):
+        totals = self.totals
+        audio = totals["audio"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo: {totals['ok']} con texto, {totals['empty']} sin texto, {totals['error']} con error en {wall:.0f}s. "
+            f"{audio:.0f}s de audio, RTF {totals['busy'] / audio if audio else 0:.2f} por proceso, "
+            f"{audio / wall if wall else 0:.1f}x tiempo real en total."
+        ))
+        if totals["empty"] or totals["error"]:
+            self.stdout.write(f"Las que no dieron texto quedan en {self.state_path}; --retry-failed las vuelve a intentar.")
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_order', '0002_alter_workorder_estado'),
+        ('worklog', '0006_worklog_field_city_worklog_field_km_one_way_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worklog',
+            index=models.Index(fields=['updated_at', 'id'], name='worklog_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_order', '0002_alter_workorder_estado'),
+        ('worklog', '0007_worklog_updated_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkLogDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('task_type', models.CharField(choices=[('Taller', 'Taller'), ('Campo', 'Campo'), ('Diligencia', 'Diligencia'), ('Operaciones generales', 'Operaciones generales'), ('Otros', 'Otros')], max_length=30)),
+                ('warranty', models.BooleanField(default=False)),
+                ('duration', models.DurationField()),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('technician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+                ('work_order_ref', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_rollups', to='work_order.workorder')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Horas',
+                'verbose_name_plural': 'Resúmenes Diarios de Horas',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'technician'], name='worklog_rollup_day_tech_idx'), models.Index(fields=['technician', 'day'], name='worklog_rollup_tech_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_order', '0002_alter_workorder_estado'),
+        ('worklog', '0008_worklogdailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worklog',
+            index=models.Index(fields=['technician', 'start', 'end'], name='worklog_tech_start_end_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worklog', '0009_worklog_tech_start_end_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.FloatField()),
+                ('end', models.FloatField()),
+                ('text', models.TextField()),
+                ('avg_logprob', models.FloatField(blank=True, null=True)),
+                ('words', models.JSONField(blank=True, default=list)),
+                ('worklog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='worklog.worklog')),
+            ],
+            options={
+                'verbose_name': 'Segmento de Transcripción',
+                'verbose_name_plural': 'Segmentos de Transcripción',
+                'ordering': ['worklog', 'start'],
+                'indexes': [models.Index(fields=['worklog', 'start'], name='worklog_segment_start_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worklog', '0010_transcriptsegment'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='worklog',
+            name='worklog_updated_id_idx',
+        ),
+    ]
@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    """
+    Llena WorkLogDailyRollup con las tareas existentes (misma agregación que
+    rebuild_daily_rollups, con los modelos históricos); después cada alta,
+    edición o baja mantiene solo sus días.
+    """
+    WorkLog = apps.get_model('worklog', 'WorkLog')
+    WorkLogDailyRollup = apps.get_model('worklog', 'WorkLogDailyRollup')
+
+    groups = (
+        WorkLog.objects
+        .annotate(day=TruncDate('start'))
+        .values('day', 'technician', 'task_type', 'work_order_ref', 'warranty')
+        .annotate(
+            duration=Sum(ExpressionWrapper(F('end') - F('start'), output_field=DurationField())),
+            entries=Count('id'),
+        )
+        .order_by()
+    )
+    WorkLogDailyRollup.objects.all().delete()
+    batch = []
+    for group in groups.iterator():
+        batch.append(WorkLogDailyRollup(
+            day=group['day'],
+            technician_id=group['technician'],
+            task_type=group['task_type'],
+            work_order_ref_id=group['work_order_ref'],
+            warranty=group['warranty'],
+            duration=group['duration'] or timedelta(),
+            entries=group['entries'],
+        ))
+        if len(batch) >= 2000:
+            WorkLogDailyRollup.objects.bulk_create(batch)
+            batch = []
+    WorkLogDailyRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worklog', '0011_remove_worklog_updated_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-import os
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -78,40 +78,68 @@ class WorkLog(models.Model):
     def __str__(self):
         return f"{self.technician} - {self.start.date()} - {self.task_type}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordar en qué día/técnico estaba imputada para actualizar los resúmenes al editar
+        if 'technician_id' in instance.__dict__ and 'start' in instance.__dict__:
+            from .rollups import rollup_key
+            instance._rollup_key = rollup_key(instance)
+        return instance
+
     def save(self, *args, **kwargs):
+        from .rollups import rollup_key, refresh_daily_rollups
+
         # Si no hay created_by, usar technician como creador
         if not self.created_by:
             self.created_by = self.technician
 
+        adding = self._state.adding
+        previous_key = None
+        if not adding:
+            if hasattr(self, '_rollup_key'):
+                previous_key = self._rollup_key
+            else:
+                previous = WorkLog.objects.filter(pk=self.pk).values_list('technician_id', 'start').first()
+                if previous:
+                    previous_key = (previous[0], timezone.localdate(previous[1]))
+
         # Guardar primero para obtener el ID
         super().save(*args, **kwargs)
 
+        # Registrar en el feed de cambios
+        from core.changefeed import record_change
+        record_change(self, 'created' if adding else 'updated', technician_id=self.technician_id)
+        if previous_key and previous_key[0] != self.technician_id:
+            # El técnico anterior tiene que enterarse de que la tarea ya no es suya
+            record_change(self, 'updated', technician_id=previous_key[0])
+
+        # Mantener los resúmenes diarios de horas
+        self._rollup_key = rollup_key(self)
+        refresh_daily_rollups({previous_key, self._rollup_key})
+
         # Actualizar el estado de la orden de trabajo asociada si existe
         self.update_work_order_status()
 
     def delete(self, *args, **kwargs):
-        """Eliminar el archivo de audio físico antes de borrar el registro"""
+        """Eliminar el archivo de audio (al confirmar el borrado y si ninguna otra tarea lo usa)"""
         if self.audio_file:
-            try:
-                # Obtener la ruta completa del archivo
-                from django.conf import settings
-                import logging
-                logger = logging.getLogger(__name__)
-                
-                file_path = os.path.join(settings.MEDIA_ROOT, str(self.audio_file))
-                
-                # Verificar si el archivo existe y eliminarlo
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.info(f"Archivo de audio eliminado: {file_path}")
-                else:
-                    logger.warning(f"Archivo de audio no encontrado: {file_path}")
-                    
-            except Exception as e:
-                logger.error(f"Error al eliminar archivo de audio: {e}")
-        
+            from core.storage import delete_file_later
+            delete_file_later(self.audio_file.name)
+
+        # Registrar en el feed de cambios (antes de perder el pk)
+        from core.changefeed import record_change
+        record_change(self, 'deleted', technician_id=self.technician_id)
+
+        from .rollups import rollup_key, refresh_daily_rollups
+        key = getattr(self, '_rollup_key', None) or rollup_key(self)
+
         # Llamar al método delete() original
-        super().delete(*args, **kwargs)
+        result = super().delete(*args, **kwargs)
+
+        # Mantener los resúmenes diarios de horas
+        refresh_daily_rollups({key})
+        return result
 
     def update_work_order_status(self):
         """Actualiza el estado de la orden de trabajo asociada basándose en el estado de esta tarea"""
@@ -137,7 +165,46 @@ class WorkLog(models.Model):
         verbose_name = 'Registro de Trabajo'
         verbose_name_plural = 'Registros de Trabajo'
         ordering = ['-start']
+        indexes = [
+            # Control de superposiciones y huecos por técnico (worklog/intervals.py)
+            models.Index(fields=['technician', 'start', 'end'], name='worklog_tech_start_end_idx'),
+        ]
+
+
+
+class WorkLogDailyRollup(models.Model):
+    """
+    Horas diarias precalculadas por técnico, tipo de tarea, orden de trabajo y garantía.
+    Se mantiene desde WorkLog.save()/delete(); ver worklog/rollups.py.
+    """
+    day = models.DateField()
+    technician = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    task_type = models.CharField(max_length=30, choices=WorkLog.TASK_TYPES)
+    work_order_ref = models.ForeignKey(
+        'work_order.WorkOrder',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_rollups'
+    )
+    warranty = models.BooleanField(default=False)
+    duration = models.DurationField()
+    entries = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        verbose_name = 'Resumen Diario de Horas'
+        verbose_name_plural = 'Resúmenes Diarios de Horas'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day', 'technician'], name='worklog_rollup_day_tech_idx'),
+            models.Index(fields=['technician', 'day'], name='worklog_rollup_tech_day_idx'),
+        ]
+
+    def hours(self):
+        return round(self.duration.total_seconds() / 3600, 2)
+
+    def __str__(self):
+        return f"{self.technician} - {self.day} - {self.task_type}: {self.hours()} hs"
 
 
 class WorkLogHistory(models.Model):
@@ -159,3 +226,41 @@ class WorkLogHistory(models.Model):
 
     def __str__(self):
         return f"{self.action} en {self.worklog} por {self.user} - {self.timestamp}"
+
+
+class TranscriptSegment(models.Model):
+    """
+    Segmento de la transcripción del audio de una tarea, con sus tiempos. El
+    detalle de la tarea los usa para saltar en el audio al momento en que se
+    dijo cada palabra; la descripción sigue siendo el texto editable.
+    """
+    worklog = models.ForeignKey(WorkLog, on_delete=models.CASCADE, related_name='segments')
+    start = models.FloatField()  # segundos desde el comienzo del audio
+    end = models.FloatField()
+    text = models.TextField()
+    avg_logprob = models.FloatField(null=True, blank=True)  # confianza del modelo en el segmento
+    words = models.JSONField(default=list, blank=True)  # [[inicio, fin, palabra], ...]
+
+    class Meta:
+        verbose_name = 'Segmento de Transcripción'
+        verbose_name_plural = 'Segmentos de Transcripción'
+        ordering = ['worklog', 'start']
+        indexes = [
+            models.Index(fields=['worklog', 'start'], name='worklog_segment_start_idx'),
+        ]
+
+    @classmethod
+    def replace_for(cls, segments_by_worklog):
+        """Reemplaza los segmentos de cada tarea por los de una transcripción (worklog_id -> [Segment])"""
+        cls.objects.filter(worklog_id__in=list(segments_by_worklog)).delete()
+        cls.objects.bulk_create([
+            cls(
+                worklog_id=worklog_id, start=segment.start, end=segment.end, text=segment.text,
+                avg_logprob=segment.avg_logprob, words=[list(word) for word in segment.words],
+            )
+            for worklog_id, segments in segments_by_worklog.items()
+            for segment in segments
+        ])
+
+    def __str__(self):
+        return f"{self.worklog_id} [{self.start:.1f}-{self.end:.1f}] {self.text[:40]}"
@@ -0,0 +1,159 @@
+"""
+Planilla de horas por técnico para liquidación de sueldos.
+
+Lee las tareas del rango con una sola consulta (tuplas, sin instanciar modelos)
+y en una pasada ordenada por técnico e inicio acumula horas diarias y semanales,
+kilómetros de campo (ida y vuelta), horas en garantía contra facturables y
+superposiciones entre tareas del mismo técnico.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .intervals import IntervalSweep
+from .models import WorkLog
+
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _new_bucket():
+    return {'hours': 0.0, 'warranty': 0.0, 'billable': 0.0, 'km': 0, 'entries': 0}
+
+
+def _add(bucket, hours, warranty, km):
+    bucket['hours'] += hours
+    bucket['warranty' if warranty else 'billable'] += hours
+    bucket['km'] += km
+    bucket['entries'] += 1
+
+
+def build_timesheet(start_date, end_date, queryset=None, technician=None):
+    """
+    Calcula la planilla para las tareas que empiezan entre start_date y end_date (inclusive).
+    'queryset' permite aplicar la misma visibilidad que el listado.
+    """
+    tz = timezone.get_current_timezone()
+    range_start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+
+    queryset = WorkLog.objects.all() if queryset is None else queryset
+    queryset = queryset.filter(start__gte=range_start, start__lt=range_end)
+    if technician:
+        # Las horas se imputan al técnico de la tarea, igual que en los resúmenes diarios
+        queryset = queryset.filter(technician=technician)
+
+    rows = queryset.order_by('technician_id', 'start', 'id').values_list(
+        'id', 'technician_id', 'technician__username', 'technician__first_name', 'technician__last_name',
+        'start', 'end', 'task_type', 'warranty', 'field_km_one_way',
+    )
+
+    names = {}
+    summary = defaultdict(_new_bucket)
+    daily = defaultdict(_new_bucket)
+    weekly = defaultdict(_new_bucket)
+    days_worked = defaultdict(set)
+    overlaps = []
+
+    current_tech = None
+    sweep = IntervalSweep()
+    for (wl_id, tech_id, username, first_name, last_name,
+         start, end, task_type, warranty, km_one_way) in rows.iterator(chunk_size=5000):
+        if tech_id != current_tech:
+            current_tech = tech_id
+            sweep.reset()
+            names[tech_id] = f"{first_name} {last_name}".strip() or username
+
+        hours = (end - start).total_seconds() / 3600
+        km = (km_one_way or 0) * 2 if task_type == 'Campo' else 0
+        day = start.astimezone(tz).date()
+
+        _add(summary[tech_id], hours, warranty, km)
+        _add(daily[(tech_id, day)], hours, warranty, km)
+        _add(weekly[(tech_id, _week_start(day))], hours, warranty, km)
+        days_worked[tech_id].add(day)
+
+        overlap = sweep.push(wl_id, start, end)
+        if overlap:
+            overlap['technician_id'] = tech_id
+            overlaps.append(overlap)
+
+    overlaps_per_tech = Counter(o['technician_id'] for o in overlaps)
+    for tech_id, bucket in summary.items():
+        bucket['days'] = len(days_worked[tech_id])
+        bucket['overlaps'] = overlaps_per_tech[tech_id]
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'names': names,
+        'summary': summary,
+        'daily': daily,
+        'weekly': weekly,
+        'overlaps': overlaps,
+    }
+
+
+def timesheet_workbook(timesheet):
+    """Arma el libro Excel (modo write_only) con una hoja por vista de la planilla"""
+    names = timesheet['names']
+    tz = timezone.get_current_timezone()
+
+    def order(key):
+        tech_id = key[0] if isinstance(key, tuple) else key
+        return (names.get(tech_id, ''),) + (key[1:] if isinstance(key, tuple) else ())
+
+    wb = Workbook(write_only=True)
+
+    ws = wb.create_sheet("Resumen")
+    ws.append([f"Planilla de horas del {timesheet['start_date']:%d/%m/%Y} al {timesheet['end_date']:%d/%m/%Y}"])
+    ws.append([
+        "Técnico", "Días trabajados", "Tareas", "Horas totales", "Horas facturables",
+        "Horas garantía", "Km campo (ida y vuelta)", "Superposiciones",
+    ])
+    for tech_id in sorted(timesheet['summary'], key=order):
+        b = timesheet['summary'][tech_id]
+        ws.append([
+            names[tech_id], b['days'], b['entries'], round(b['hours'], 2), round(b['billable'], 2),
+            round(b['warranty'], 2), b['km'], b['overlaps'],
+        ])
+
+    # Diario como tabla dinámica: una fila por técnico y una columna por día del rango
+    days = [timesheet['start_date'] + timedelta(days=i)
+            for i in range((timesheet['end_date'] - timesheet['start_date']).days + 1)]
+    daily_by_tech = defaultdict(dict)
+    for (tech_id, day), b in timesheet['daily'].items():
+        daily_by_tech[tech_id][day] = round(b['hours'], 2)
+    ws = wb.create_sheet("Diario")
+    ws.append(["Técnico"] + [day.strftime("%d/%m") for day in days] + ["Total"])
+    for tech_id in sorted(daily_by_tech, key=order):
+        hours_per_day = daily_by_tech[tech_id]
+        ws.append(
+            [names[tech_id]]
+            + [hours_per_day.get(day) for day in days]
+            + [round(timesheet['summary'][tech_id]['hours'], 2)]
+        )
+
+    ws = wb.create_sheet("Semanal")
+    ws.append(["Técnico", "Semana (lunes)", "Tareas", "Horas", "Facturables", "Garantía", "Km campo"])
+    for key in sorted(timesheet['weekly'], key=order):
+        b = timesheet['weekly'][key]
+        ws.append([
+            names[key[0]], key[1].strftime("%Y-%m-%d"), b['entries'], round(b['hours'], 2),
+            round(b['billable'], 2), round(b['warranty'], 2), b['km'],
+        ])
+
+    ws = wb.create_sheet("Superposiciones")
+    ws.append(["Técnico", "Tarea A (id)", "Tarea B (id)", "Desde", "Hasta", "Minutos superpuestos"])
+    for o in sorted(timesheet['overlaps'], key=lambda o: (names.get(o['technician_id'], ''), o['start'])):
+        ws.append([
+            names[o['technician_id']], o['first_id'], o['second_id'],
+            o['start'].astimezone(tz).strftime("%Y-%m-%d %H:%M"),
+            o['end'].astimezone(tz).strftime("%Y-%m-%d %H:%M"),
+            o['minutes'],
+        ])
+
+    return wb
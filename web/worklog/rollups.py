@@ -0,0 +1,210 @@
+"""
+Resúmenes diarios de horas (WorkLogDailyRollup).
+
+Cada fila acumula las horas de un técnico en un día para una combinación de
+tipo de tarea, orden de trabajo y garantía. Las tareas se imputan al día local
+de su inicio, igual que los filtros de fecha del listado. La tabla se mantiene
+incrementalmente: cada alta/edición/baja de una tarea recalcula solo los días
+(técnico, fecha) afectados, que son pocas filas y se leen por índice, y los
+resúmenes de los clientes de las órdenes involucradas (clients/summary.py).
+El recálculo bloquea la fila del técnico, así que las actualizaciones
+concurrentes del mismo técnico se serializan.
+"""
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.roles import get_roles
+
+from .models import WorkLog, WorkLogDailyRollup
+
+
+def duration_expression():
+    """Expresión SQL con la duración (end - start) de cada tarea"""
+    return ExpressionWrapper(F('end') - F('start'), output_field=DurationField())
+
+
+def to_hours(duration):
+    """Convierte un timedelta (o None) a horas redondeadas, como WorkLog.duration()"""
+    if not duration:
+        return 0.0
+    return round(duration.total_seconds() / 3600, 2)
+
+
+def rollup_key(worklog):
+    """Clave (técnico, día local) en la que se imputa una tarea"""
+    if worklog.technician_id is None or worklog.start is None:
+        return None
+    return (worklog.technician_id, timezone.localdate(worklog.start))
+
+
+def _day_bounds(day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    return start, start + timedelta(days=1)
+
+
+def refresh_daily_rollups(keys):
+    """Recalcula las filas de resumen de los pares (técnico, día) indicados"""
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return
+
+    from clients.summary import refresh_for_work_orders
+
+    work_order_ids = set()
+    with transaction.atomic():
+        # Bloquear a los técnicos (siempre en el mismo orden) antes de agregar: dos
+        # transacciones que tocan el mismo día se ejecutan de a una y la segunda ve
+        # las tareas que confirmó la primera, en vez de pisar el resumen con datos viejos
+        list(
+            get_user_model().objects.select_for_update()
+            .filter(pk__in={technician_id for technician_id, _ in keys})
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        for technician_id, day in sorted(keys):
+            day_start, day_end = _day_bounds(day)
+            groups = list(
+                WorkLog.objects
+                .filter(technician_id=technician_id, start__gte=day_start, start__lt=day_end)
+                .values('task_type', 'work_order_ref', 'warranty')
+                .annotate(duration=Sum(duration_expression()), entries=Count('id'))
+                .order_by()
+            )
+            previous = WorkLogDailyRollup.objects.filter(technician_id=technician_id, day=day)
+            # Órdenes que tenían o tienen horas ese día: sus clientes cambian de resumen
+            work_order_ids.update(previous.values_list('work_order_ref_id', flat=True))
+            work_order_ids.update(group['work_order_ref'] for group in groups)
+            previous.delete()
+            WorkLogDailyRollup.objects.bulk_create([
+                WorkLogDailyRollup(
+                    day=day,
+                    technician_id=technician_id,
+                    task_type=group['task_type'],
+                    work_order_ref_id=group['work_order_ref'],
+                    warranty=group['warranty'],
+                    duration=group['duration'] or timedelta(),
+                    entries=group['entries'],
+                )
+                for group in groups
+            ])
+        refresh_for_work_orders(work_order_ids)
+
+
+def rebuild_daily_rollups(since=None, batch_size=2000):
+    """
+    Reconstruye la tabla completa (o desde una fecha) con una sola agregación
+    agrupada. Se usa para la carga inicial y después de operaciones masivas que
+    no pasan por WorkLog.save().
+    """
+    worklogs = WorkLog.objects.all()
+    rollups = WorkLogDailyRollup.objects.all()
+    if since:
+        since_start, _ = _day_bounds(since)
+        worklogs = worklogs.filter(start__gte=since_start)
+        rollups = rollups.filter(day__gte=since)
+
+    groups = (
+        worklogs
+        .annotate(day=TruncDate('start'))
+        .values('day', 'technician', 'task_type', 'work_order_ref', 'warranty')
+        .annotate(duration=Sum(duration_expression()), entries=Count('id'))
+        .order_by()
+    )
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for group in groups.iterator():
+            batch.append(WorkLogDailyRollup(
+                day=group['day'],
+                technician_id=group['technician'],
+                task_type=group['task_type'],
+                work_order_ref_id=group['work_order_ref'],
+                warranty=group['warranty'],
+                duration=group['duration'] or timedelta(),
+                entries=group['entries'],
+            ))
+            if len(batch) >= batch_size:
+                WorkLogDailyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            WorkLogDailyRollup.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+def dashboard_summary(user, today=None, days=30, weeks=12):
+    """
+    Métricas del dashboard leídas solo de la tabla de resumen.
+    Administradores y supervisores ven a todos los técnicos; el resto, lo propio.
+    """
+    today = today or timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    series_start = min(today - timedelta(days=days - 1), week_start - timedelta(weeks=weeks - 1))
+
+    rollups = WorkLogDailyRollup.objects.all()
+    if not get_roles(user).is_manager:
+        rollups = rollups.filter(technician=user)
+
+    per_technician = (
+        rollups
+        .filter(day__gte=min(week_start, month_start), day__lte=today)
+        .values('technician', 'technician__username', 'technician__first_name', 'technician__last_name')
+        .annotate(
+            week=Sum('duration', filter=Q(day__gte=week_start)),
+            month=Sum('duration', filter=Q(day__gte=month_start)),
+            warranty_month=Sum('duration', filter=Q(day__gte=month_start, warranty=True)),
+        )
+        .order_by('technician__first_name', 'technician__last_name', 'technician__username')
+    )
+    technicians = [
+        {
+            'name': f"{row['technician__first_name']} {row['technician__last_name']}".strip() or row['technician__username'],
+            'week': to_hours(row['week']),
+            'month': to_hours(row['month']),
+            'warranty_month': to_hours(row['warranty_month']),
+        }
+        for row in per_technician
+    ]
+
+    by_task_type = [
+        {'task_type': row['task_type'], 'hours': to_hours(row['duration'])}
+        for row in (
+            rollups.filter(day__gte=month_start, day__lte=today)
+            .values('task_type').annotate(duration=Sum('duration')).order_by('-duration')
+        )
+    ]
+
+    daily_totals = {
+        row['day']: to_hours(row['duration'])
+        for row in (
+            rollups.filter(day__gte=series_start, day__lte=today)
+            .values('day').annotate(duration=Sum('duration')).order_by()
+        )
+    }
+    daily = [
+        {'day': (today - timedelta(days=offset)).isoformat(), 'hours': daily_totals.get(today - timedelta(days=offset), 0.0)}
+        for offset in range(days - 1, -1, -1)
+    ]
+    weekly = []
+    for offset in range(weeks - 1, -1, -1):
+        start = week_start - timedelta(weeks=offset)
+        hours = sum(daily_totals.get(start + timedelta(days=i), 0.0) for i in range(7))
+        weekly.append({'week': start.isoformat(), 'hours': round(hours, 2)})
+
+    return {
+        'week_hours': round(sum(t['week'] for t in technicians), 2),
+        'month_hours': round(sum(t['month'] for t in technicians), 2),
+        'technicians': technicians,
+        'by_task_type': by_task_type,
+        'daily': daily,
+        'weekly': weekly,
+    }
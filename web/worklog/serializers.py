@@ -0,0 +1,106 @@
+from rest_framework import serializers
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from work_order.models import WorkOrder
+from accounts.roles import get_roles
+from .models import WorkLog
+from .forms import check_worklog_overlaps
+
+User = get_user_model()
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que memoriza las búsquedas en el contexto del serializer.
+    En una carga masiva los mismos colaboradores y órdenes se repiten en cientos de
+    filas, así que se consulta la base una sola vez por id distinto.
+    """
+
+    def to_internal_value(self, data):
+        cache = self.context.setdefault('_pk_cache', {})
+        key = (self.field_name, str(data))
+        if key not in cache:
+            cache[key] = super().to_internal_value(data)
+        return cache[key]
+
+
+class WorkLogSerializer(serializers.ModelSerializer):
+    collaborator = CachedPrimaryKeyRelatedField(
+        queryset=User.objects.all(), required=False, allow_null=True
+    )
+    # Igual que en WorkLogForm: solo órdenes activas
+    work_order_ref = CachedPrimaryKeyRelatedField(
+        queryset=WorkOrder.objects.exclude(estado__in=['cerrada', 'cancelada']),
+        required=False, allow_null=True
+    )
+    technician_nombre = serializers.CharField(source='technician.get_full_name', read_only=True)
+    duration = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = WorkLog
+        fields = [
+            'id', 'technician', 'technician_nombre', 'collaborator', 'start', 'end', 'duration',
+            'task_type', 'other_task_type', 'general_ops_subtype', 'warranty',
+            'field_city', 'field_km_one_way', 'description',
+            'work_order', 'work_order_ref', 'status',
+            'created_by', 'created_at', 'updated_by', 'updated_at',
+        ]
+        read_only_fields = [
+            'id', 'technician', 'work_order', 'created_by', 'created_at',
+            'updated_by', 'updated_at',
+        ]
+
+    def validate_status(self, value):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        # Los técnicos no pueden usar 'abierta' y 'cerrada'
+        if not get_roles(user).can_use_status(value):
+            raise serializers.ValidationError("Los técnicos no pueden usar este estado.")
+        return value
+
+    def validate(self, attrs):
+        # Mismas reglas que WorkLogForm.clean; en PATCH se completan con la instancia
+        def value(name):
+            if name in attrs:
+                return attrs[name]
+            return getattr(self.instance, name, None) if self.instance else None
+
+        start = value('start')
+        end = value('end')
+        task_type = value('task_type')
+
+        if start and end and end <= start:
+            raise serializers.ValidationError("La hora de finalización debe ser posterior a la de inicio.")
+
+        if task_type == 'Otros' and not value('other_task_type'):
+            raise serializers.ValidationError("Debe especificar el tipo de tarea si eligió 'Otros'.")
+
+        if task_type == 'Operaciones generales' and not value('general_ops_subtype'):
+            raise serializers.ValidationError("Debe seleccionar un subtipo para 'Operaciones generales'.")
+
+        if task_type == 'Campo':
+            if not value('field_city'):
+                raise serializers.ValidationError("Debe especificar la ciudad para tareas de 'Campo'.")
+            if value('field_km_one_way') is None:
+                raise serializers.ValidationError("Debe especificar los kilómetros de ida para tareas de 'Campo'.")
+
+        # En la carga masiva (many=True) el lote completo se controla de una vez en la vista
+        if self.parent is None:
+            if self.instance:
+                technician_id = self.instance.technician_id
+            else:
+                technician_id = getattr(self.context.get('request'), 'user', None)
+                technician_id = getattr(technician_id, 'pk', None)
+            try:
+                check_worklog_overlaps(
+                    technician_id, start, end, exclude_id=getattr(self.instance, 'pk', None)
+                )
+            except DjangoValidationError as error:
+                raise serializers.ValidationError(error.messages)
+
+        # Mantener work_order (texto) sincronizado con work_order_ref
+        if 'work_order_ref' in attrs:
+            work_order_ref = attrs['work_order_ref']
+            attrs['work_order'] = work_order_ref.numero if work_order_ref else None
+
+        return attrs
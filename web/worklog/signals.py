@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from core.changefeed import record_changes
+from core.storage import delete_file_later
+
+from .models import WorkLog
+
+User = get_user_model()
+
+
+@receiver(pre_delete, sender=User)
+def recordar_tareas_usuario(sender, instance, **kwargs):
+    """
+    Guarda las tareas que se van con el usuario (en cascada, sin pasar por
+    WorkLog.delete()) y las que lo pierden como colaborador (SET_NULL)
+    """
+    deleted = list(
+        WorkLog.objects
+        .filter(Q(technician=instance) | Q(created_by=instance) | Q(updated_by=instance))
+        .values_list('id', 'technician_id', 'start', 'audio_file')
+    )
+    instance._deleted_worklogs = deleted
+    instance._uncollaborated_worklogs = dict(
+        WorkLog.objects.filter(collaborator=instance)
+        .exclude(id__in=[worklog_id for worklog_id, _, _, _ in deleted])
+        .values_list('id', 'technician_id')
+    )
+
+
+@receiver(post_delete, sender=User)
+def registrar_tareas_usuario(sender, instance, **kwargs):
+    """
+    Hace lo que haría WorkLog.delete() con las tareas borradas en cascada: feed de
+    cambios, archivos de audio y resúmenes diarios de los demás técnicos
+    """
+    from .rollups import refresh_daily_rollups, rollup_key
+
+    deleted = getattr(instance, '_deleted_worklogs', [])
+    record_changes(
+        WorkLog, [worklog_id for worklog_id, _, _, _ in deleted], 'deleted',
+        technician_ids={worklog_id: technician_id for worklog_id, technician_id, _, _ in deleted},
+    )
+    uncollaborated = getattr(instance, '_uncollaborated_worklogs', {})
+    record_changes(WorkLog, list(uncollaborated), 'updated', technician_ids=uncollaborated)
+
+    for _, _, _, audio_file in deleted:
+        delete_file_later(audio_file)
+    refresh_daily_rollups({
+        rollup_key(WorkLog(technician_id=technician_id, start=start))
+        for _, technician_id, start, _ in deleted
+        if technician_id != instance.pk  # los del usuario borrado se van con él
+    })
@@ -1,3 +1,427 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from core.models import ChangeLogEntry
+
+from .forms import WorkLogForm
+from .intervals import find_batch_overlaps
+from .management.commands.benchmark_transcription import Command as BenchmarkTranscriptionCommand
+from .management.commands.retranscribe_audios import Command as RetranscribeCommand
+from .models import TranscriptSegment, WorkLog, WorkLogDailyRollup, WorkLogHistory
+from .reports import build_timesheet, timesheet_workbook
+from .rollups import refresh_daily_rollups
+from .transcription import NO_TEXT_PLACEHOLDER, Segment, TranscriptionConfig
+
+User = get_user_model()
+
+
+def make_worklog(technician, start, hours=1, description='Prueba', task_type='Taller', **extra):
+    return WorkLog.objects.create(
+        technician=technician,
+        start=start,
+        end=start + timedelta(hours=hours),
+        task_type=task_type,
+        description=description,
+        **extra
+    )
+
+
+@override_settings(CHANGE_FEED_SAFETY_LAG_SECONDS=0)
+class WorkLogSyncTests(TestCase):
+    url = reverse('worklog-api-sync')
+
+    def setUp(self):
+        self.tecnico = User.objects.create_user('tecnico', password='x', user_type='tecnico')
+        self.otro = User.objects.create_user('otro', password='x', user_type='tecnico')
+        self.client = APIClient()
+        self.client.force_authenticate(self.tecnico)
+        self.start = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+
+    def create(self, technician, start, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return make_worklog(technician, start, **extra)
+
+    def test_first_load_pages_by_id_and_ends_with_feed_cursor(self):
+        ids = [self.create(self.tecnico, self.start + timedelta(hours=i)).id for i in range(3)]
+        self.create(self.otro, self.start)
+
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], ids[:2])
+        self.assertTrue(response.data['has_more'])
+        snapshot = response.data['next']['snapshot']
+        self.assertEqual(response.data['next']['after_id'], ids[1])
+
+        response = self.client.get(self.url, {'limit': 2, **response.data['next']})
+        self.assertEqual([row['id'] for row in response.data['results']], ids[2:])
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(response.data['next'], {'cursor': snapshot})
+
+    def test_cursor_returns_changes_and_tombstones(self):
+        kept = self.create(self.tecnico, self.start)
+        removed = self.create(self.tecnico, self.start + timedelta(hours=2))
+        removed_id = removed.id
+        cursor = self.client.get(self.url).data['next']['cursor']
+
+        kept.description = 'Editada'
+        with self.captureOnCommitCallbacks(execute=True):
+            kept.save()
+            removed.delete()
+        added = self.create(self.tecnico, self.start + timedelta(hours=4))
+
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual([row['id'] for row in response.data['results']], [kept.id, added.id])
+        self.assertEqual(response.data['results'][0]['description'], 'Editada')
+        self.assertEqual(response.data['deleted'], [removed_id])
+
+        response = self.client.get(self.url, response.data['next'])
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_cursor_skips_other_technicians_rows(self):
+        cursor = self.client.get(self.url).data['next']['cursor']
+        self.create(self.otro, self.start)
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_other_technicians_deletions_are_not_reported(self):
+        ajena = self.create(self.otro, self.start)
+        ajena_id = ajena.id
+        cursor = self.client.get(self.url).data['next']['cursor']
+        with self.captureOnCommitCallbacks(execute=True):
+            ajena.delete()
+
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(response.data['deleted'], [])
+
+        supervisor = User.objects.create_user('supervisor', password='x', user_type='supervisor')
+        self.client.force_authenticate(supervisor)
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(response.data['deleted'], [ajena_id])
+
+    def test_reassigned_task_is_removed_for_the_previous_technician(self):
+        tarea = self.create(self.tecnico, self.start)
+        cursor = self.client.get(self.url).data['next']['cursor']
+        tarea.technician = self.otro
+        with self.captureOnCommitCallbacks(execute=True):
+            tarea.save()
+
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['deleted'], [tarea.id])
+
+        self.client.force_authenticate(self.otro)
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual([row['id'] for row in response.data['results']], [tarea.id])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_safety_lag_holds_back_recent_changes(self):
+        cursor = self.client.get(self.url).data['next']['cursor']
+        self.create(self.tecnico, self.start)
+        with override_settings(CHANGE_FEED_SAFETY_LAG_SECONDS=60):
+            response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['next'], {'cursor': cursor})
+
+    def test_limit_is_clamped(self):
+        for i in range(2):
+            self.create(self.tecnico, self.start + timedelta(hours=i))
+        response = self.client.get(self.url, {'limit': 0})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertTrue(response.data['has_more'])
+        response = self.client.get(self.url, {'limit': -5})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_invalid_parameters(self):
+        for params in ({'limit': 'x'}, {'cursor': 'x'}, {'after_id': 'x'}, {'snapshot': 'x'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+class WorkLogOverlapTests(TestCase):
+    def setUp(self):
+        self.tecnico = User.objects.create_user('tecnico', password='x', user_type='tecnico')
+        self.client = APIClient()
+        self.client.force_authenticate(self.tecnico)
+        self.start = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+        self.existing = make_worklog(self.tecnico, self.start, hours=2)
+
+    def payload(self, start, hours=1):
+        return {
+            'start': start.isoformat(),
+            'end': (start + timedelta(hours=hours)).isoformat(),
+            'task_type': 'Taller',
+            'description': 'Prueba',
+            'status': 'pendiente',
+        }
+
+    def test_form_rejects_overlap(self):
+        data = self.payload(self.start + timedelta(hours=1))
+        data['start'] = timezone.localtime(self.start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M')
+        data['end'] = timezone.localtime(self.start + timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M')
+        form = WorkLogForm(data=data, user=self.tecnico)
+        self.assertFalse(form.is_valid())
+        self.assertIn(f'#{self.existing.pk}', form.non_field_errors()[0])
+
+        data['start'] = timezone.localtime(self.start + timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M')
+        data['end'] = timezone.localtime(self.start + timedelta(hours=3)).strftime('%Y-%m-%dT%H:%M')
+        self.assertTrue(WorkLogForm(data=data, user=self.tecnico).is_valid())
+
+    def test_api_create_rejects_overlap(self):
+        url = reverse('worklog-api-list')
+        response = self.client.post(url, self.payload(self.start + timedelta(hours=1)), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'#{self.existing.pk}', response.data['non_field_errors'][0])
+
+        response = self.client.post(url, self.payload(self.start + timedelta(hours=2)), format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_api_update_ignores_itself(self):
+        url = reverse('worklog-api-detail', args=[self.existing.pk])
+        response = self.client.patch(url, {'end': (self.start + timedelta(hours=3)).isoformat()}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        other = make_worklog(self.tecnico, self.start + timedelta(hours=4))
+        response = self.client.patch(url, {'end': (self.start + timedelta(hours=5)).isoformat()}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'#{other.pk}', response.data['non_field_errors'][0])
+
+    def test_bulk_rejects_overlap_within_batch(self):
+        response = self.client.post(reverse('worklog-api-bulk-create'), [
+            self.payload(self.start + timedelta(hours=3)),
+            self.payload(self.start + timedelta(hours=5)),
+            self.payload(self.start + timedelta(hours=3, minutes=30)),
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[1], {})
+        self.assertIn('posición', response.data[2]['non_field_errors'][0])
+        self.assertEqual(WorkLog.objects.count(), 1)
+
+    def test_bulk_rejects_overlap_with_stored_rows(self):
+        response = self.client.post(reverse('worklog-api-bulk-create'), [
+            self.payload(self.start + timedelta(hours=3)),
+            self.payload(self.start - timedelta(minutes=30)),
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn(f'#{self.existing.pk}', response.data[1]['non_field_errors'][0])
+        self.assertEqual(WorkLog.objects.count(), 1)
+
+    def test_bulk_creates_adjacent_tasks(self):
+        response = self.client.post(reverse('worklog-api-bulk-create'), [
+            self.payload(self.start + timedelta(hours=3)),
+            self.payload(self.start + timedelta(hours=2)),
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(WorkLog.objects.count(), 3)
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_history_ignores_spoofed_forwarded_for(self):
+        response = self.client.post(
+            reverse('worklog-api-bulk-create'), [self.payload(self.start + timedelta(hours=3))],
+            format='json', HTTP_X_FORWARDED_FOR='6.6.6.6', REMOTE_ADDR='10.0.0.5',
+        )
+        self.assertEqual(response.status_code, 201)
+        history = WorkLogHistory.objects.get(worklog_id=response.data[0]['id'], action='created')
+        self.assertEqual(history.ip_address, '10.0.0.5')
+
+
+class BatchOverlapTests(TestCase):
+    def test_detects_overlap_masked_by_longer_task(self):
+        tecnico = User.objects.create_user('tecnico', password='x', user_type='tecnico')
+        start = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+        long_task = make_worklog(tecnico, start, hours=4)
+        # La tarea nueva de 9 a 10 queda "tapada" por la de 8 a 12
+        found = find_batch_overlaps(tecnico.pk, [
+            (start + timedelta(hours=1), start + timedelta(hours=2)),
+            (start + timedelta(hours=5), start + timedelta(hours=6)),
+        ])
+        self.assertEqual(found, {0: long_task})
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.tecnico = User.objects.create_user('tecnico', password='x', user_type='tecnico')
+        self.start = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+        self.day = self.start.date()
+
+    def rollups(self):
+        return {
+            (row.day, row.task_type, row.duration, row.entries)
+            for row in WorkLogDailyRollup.objects.filter(technician=self.tecnico)
+        }
+
+    def test_save_adds_to_the_day(self):
+        make_worklog(self.tecnico, self.start, hours=2)
+        make_worklog(self.tecnico, self.start + timedelta(hours=3), hours=1)
+        self.assertEqual(self.rollups(), {(self.day, 'Taller', timedelta(hours=3), 2)})
+
+    def test_edit_moves_hours_between_days(self):
+        worklog = make_worklog(self.tecnico, self.start, hours=2)
+        worklog.start += timedelta(days=1)
+        worklog.end += timedelta(days=1)
+        worklog.task_type = 'Campo'
+        worklog.save()
+        self.assertEqual(self.rollups(), {(self.day + timedelta(days=1), 'Campo', timedelta(hours=2), 1)})
+
+    def test_delete_removes_hours(self):
+        kept = make_worklog(self.tecnico, self.start, hours=2)
+        make_worklog(self.tecnico, self.start + timedelta(hours=3), hours=1).delete()
+        self.assertEqual(self.rollups(), {(self.day, 'Taller', timedelta(hours=2), 1)})
+        kept.delete()
+        self.assertEqual(self.rollups(), set())
+
+    def test_migration_backfills_existing_tasks(self):
+        make_worklog(self.tecnico, self.start, hours=2)
+        make_worklog(self.tecnico, self.start + timedelta(days=1), hours=1)
+        # Las tareas existentes antes de crear la tabla no tienen resumen
+        WorkLogDailyRollup.objects.all().delete()
+
+        migration = import_module('worklog.migrations.0012_backfill_daily_rollups')
+        migration.backfill_daily_rollups(apps, None)
+        self.assertEqual(self.rollups(), {
+            (self.day, 'Taller', timedelta(hours=2), 1),
+            (self.day + timedelta(days=1), 'Taller', timedelta(hours=1), 1),
+        })
+
+    def test_refresh_recomputes_from_tasks(self):
+        make_worklog(self.tecnico, self.start, hours=2)
+        # Una actualización que no pasa por save() deja el resumen desactualizado
+        WorkLog.objects.update(end=self.start + timedelta(hours=4))
+        refresh_daily_rollups({(self.tecnico.pk, self.day)})
+        self.assertEqual(self.rollups(), {(self.day, 'Taller', timedelta(hours=4), 1)})
+
+
+class RetranscribeFlushTests(TestCase):
+    def setUp(self):
+        self.tecnico = User.objects.create_user('tecnico', password='x', user_type='tecnico')
+        self.admin = User.objects.create_user('admin', password='x', user_type='admin')
+        start = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+        self.pending = make_worklog(self.tecnico, start, description=NO_TEXT_PLACEHOLDER)
+        self.edited = make_worklog(self.tecnico, start + timedelta(hours=2), description=NO_TEXT_PLACEHOLDER)
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def command(self):
+        command = RetranscribeCommand(stdout=StringIO())
+        command.dry_run = False
+        command.user = self.admin
+        command.attempted = set()
+        command.state_path = Path(self.tmp.name) / 'state.json'
+        return command
+
+    def test_keeps_descriptions_edited_during_the_run(self):
+        # El técnico completa la descripción mientras el audio se transcribe
+        WorkLog.objects.filter(pk=self.edited.pk).update(description='Cambio de bomba')
+        segments = [Segment(0.0, 2.0, 'texto')]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.command()._flush([
+                (self.pending.pk, 'Revisión general', segments),
+                (self.edited.pk, 'Texto transcripto', segments),
+            ])
+
+        self.pending.refresh_from_db()
+        self.edited.refresh_from_db()
+        self.assertEqual(self.pending.description, 'Revisión general')
+        self.assertEqual(self.edited.description, 'Cambio de bomba')
+        self.assertEqual(set(TranscriptSegment.objects.values_list('worklog_id', flat=True)), {self.pending.pk})
+        history = WorkLogHistory.objects.filter(user=self.admin)
+        self.assertEqual(
+            list(history.values_list('worklog_id', 'old_value', 'new_value')),
+            [(self.pending.pk, NO_TEXT_PLACEHOLDER, 'Revisión general')],
+        )
+        entry = ChangeLogEntry.objects.filter(object_id=self.pending.pk).latest('id')
+        self.assertEqual(entry.technician_id, self.tecnico.pk)
+
+
+class BenchmarkTranscriptionConfigTests(SimpleTestCase):
+    def configs(self, **options):
+        defaults = {'model': None, 'compute_type': None, 'beam_size': None, 'cpu_threads': None, 'num_workers': None, 'vad': None}
+        return BenchmarkTranscriptionCommand()._configs({**defaults, **options})
+
+    @override_settings(WHISPER_MODEL='small', WHISPER_WORD_TIMESTAMPS=True)
+    def test_combinations_keep_the_other_settings(self):
+        configs = self.configs(model=['small', 'medium'], vad='ambos')
+        self.assertEqual(
+            [(config.model, config.vad_filter) for config in configs],
+            [('small', True), ('small', False), ('medium', True), ('medium', False)],
+        )
+        self.assertTrue(all(config.word_timestamps for config in configs))
+
+    @override_settings(WHISPER_CACHE_DIR='/models')
+    def test_models_load_from_the_local_cache(self):
+        # Mismo model_key que el modelo que precarga el bot: el benchmark mide la carga desde
+        # WHISPER_CACHE_DIR y no una descarga
+        (config,) = self.configs()
+        self.assertEqual(config.cache_dir, '/models')
+        self.assertEqual(config.model_key, TranscriptionConfig.from_settings().model_key)
+
+
+class TimesheetTests(TestCase):
+    def setUp(self):
+        self.ana = User.objects.create_user('ana', password='x', user_type='tecnico', first_name='Ana', last_name='Pérez')
+        self.beto = User.objects.create_user('beto', password='x', user_type='tecnico')
+        self.monday = date(2026, 3, 2)
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime(day.year, day.month, day.day, hour, minute))
+
+    def test_tasks_count_on_the_local_day_they_start(self):
+        # 23:30 a 01:30 hora local: las dos horas son del lunes
+        make_worklog(self.ana, self.at(self.monday, 23, 30), hours=2)
+        # 02:00 UTC del martes son las 23:00 del lunes en Buenos Aires
+        make_worklog(self.ana, datetime(2026, 3, 3, 2, 0, tzinfo=dt_timezone.utc), hours=1)
+        make_worklog(self.ana, self.at(self.monday + timedelta(days=1), 8), hours=1)
+
+        timesheet = build_timesheet(self.monday, self.monday + timedelta(days=6))
+        daily = {day: bucket['hours'] for (_, day), bucket in timesheet['daily'].items()}
+        self.assertEqual(daily, {self.monday: 3.0, self.monday + timedelta(days=1): 1.0})
+        self.assertEqual(timesheet['summary'][self.ana.pk]['days'], 2)
+        self.assertEqual(timesheet['weekly'][(self.ana.pk, self.monday)]['entries'], 3)
+        # La de las 23:00 se superpone media hora con la de las 23:30
+        self.assertEqual([o['minutes'] for o in timesheet['overlaps']], [30])
+
+    def test_range_uses_local_days(self):
+        make_worklog(self.ana, self.at(self.monday, 0, 30))
+        make_worklog(self.ana, self.at(self.monday - timedelta(days=1), 23, 30))
+        timesheet = build_timesheet(self.monday, self.monday)
+        self.assertEqual(timesheet['summary'][self.ana.pk]['entries'], 1)
+
+    def test_totals_by_task_type_and_warranty(self):
+        make_worklog(self.ana, self.at(self.monday, 8), hours=2, task_type='Campo', field_km_one_way=15)
+        make_worklog(self.ana, self.at(self.monday, 11), hours=1, warranty=True)
+        # Solo las tareas de campo suman kilómetros
+        make_worklog(self.ana, self.at(self.monday, 13), hours=1, field_km_one_way=40)
+
+        bucket = build_timesheet(self.monday, self.monday)['summary'][self.ana.pk]
+        self.assertEqual(
+            (bucket['hours'], bucket['billable'], bucket['warranty'], bucket['km'], bucket['entries']),
+            (4.0, 3.0, 1.0, 30, 3),
+        )
+
+    def test_daily_sheet_has_a_column_per_day(self):
+        make_worklog(self.ana, self.at(self.monday, 8), hours=2)
+        make_worklog(self.ana, self.at(self.monday + timedelta(days=2), 8), hours=1.5)
+        make_worklog(self.beto, self.at(self.monday + timedelta(days=1), 8), hours=3)
+
+        workbook = timesheet_workbook(build_timesheet(self.monday, self.monday + timedelta(days=2)))
+        buffer = BytesIO()
+        workbook.save(buffer)
+        sheet = load_workbook(buffer)['Diario']
+        rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(rows, [
+            ['Técnico', '02/03', '03/03', '04/03', 'Total'],
+            ['Ana Pérez', 2, None, 1.5, 3.5],
+            ['beto', None, 3, None, 3],
+        ])
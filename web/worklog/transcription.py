@@ -0,0 +1,260 @@
+"""
+Transcripción de notas de voz con faster-whisper (CTranslate2).
+
+La configuración (modelo, compute type, beam size, hilos y VAD) sale de los
+settings WHISPER_*; el bot y el comando benchmark_transcription usan las mismas
+funciones, así que lo que se mide es exactamente lo que corre en producción.
+faster-whisper se importa recién al cargar un modelo: el módulo se puede
+importar (y configurar) en entornos donde no está instalado.
+
+Los modelos se guardan en WHISPER_CACHE_DIR y se cargan primero sin consultar
+la red (local_files_only); solo si no están en la caché se descargan. El bot
+los carga en segundo plano con load_in_background() para aceptar updates
+mientras tanto.
+"""
+import io
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+
+logger = logging.getLogger("faster_whisper")
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Descripciones que quedan en la tarea cuando el audio no dio texto (retranscribe_audios las reprocesa)
+NO_TEXT_PLACEHOLDER = "[Audio adjunto - Sin texto detectado]"
+ERROR_PLACEHOLDER = "[Audio adjunto - Error en transcripción]"
+PLACEHOLDERS = (NO_TEXT_PLACEHOLDER, ERROR_PLACEHOLDER)
+
+
+@dataclass(frozen=True)
+class TranscriptionConfig:
+    model: str = "medium"
+    device: str = "cpu"
+    compute_type: str = "int8"
+    beam_size: int = 1
+    cpu_threads: int = CPU_COUNT
+    num_workers: int = 1
+    vad_filter: bool = True
+    language: str = "es"
+    cache_dir: str = ""  # vacío = caché de Hugging Face por defecto
+    batch_size: int = 0  # > 0: segmentos del VAD decodificados en lotes (BatchedInferencePipeline)
+    word_timestamps: bool = False  # tiempos por palabra en cada segmento
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        from django.conf import settings
+
+        config = cls(
+            model=getattr(settings, "WHISPER_MODEL", cls.model),
+            device=getattr(settings, "WHISPER_DEVICE", cls.device),
+            compute_type=getattr(settings, "WHISPER_COMPUTE_TYPE", cls.compute_type),
+            beam_size=getattr(settings, "WHISPER_BEAM_SIZE", cls.beam_size),
+            # 0 = todos los núcleos
+            cpu_threads=getattr(settings, "WHISPER_CPU_THREADS", 0) or CPU_COUNT,
+            num_workers=getattr(settings, "WHISPER_NUM_WORKERS", cls.num_workers),
+            vad_filter=getattr(settings, "WHISPER_VAD_FILTER", cls.vad_filter),
+            language=getattr(settings, "WHISPER_LANGUAGE", cls.language),
+            cache_dir=getattr(settings, "WHISPER_CACHE_DIR", cls.cache_dir),
+            word_timestamps=getattr(settings, "WHISPER_WORD_TIMESTAMPS", cls.word_timestamps),
+        )
+        return replace(config, **overrides)
+
+    @property
+    def model_key(self):
+        """Parámetros que definen la instancia del modelo (el resto es por llamada)"""
+        return (self.model, self.device, self.compute_type, self.cpu_threads, self.num_workers, self.cache_dir)
+
+    @property
+    def cores(self):
+        return min(CPU_COUNT, self.cpu_threads * self.num_workers)
+
+    def label(self):
+        return (
+            f"{self.model}/{self.compute_type} beam={self.beam_size} "
+            f"threads={self.cpu_threads}x{self.num_workers} vad={'sí' if self.vad_filter else 'no'}"
+            + (f" batch={self.batch_size}" if self.batch_size else "")
+        )
+
+    def as_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class Segment:
+    start: float  # segundos desde el comienzo del audio
+    end: float
+    text: str
+    avg_logprob: float = None
+    words: tuple = ()  # (inicio, fin, palabra) con word_timestamps
+
+    def as_list(self):
+        """Forma compacta para guardar en JSON (borradores del bot)"""
+        return [self.start, self.end, self.text, self.avg_logprob, [list(word) for word in self.words]]
+
+    @classmethod
+    def from_list(cls, data):
+        start, end, text, avg_logprob, words = data
+        return cls(start, end, text, avg_logprob, tuple(tuple(word) for word in words))
+
+
+@dataclass
+class TranscriptionResult:
+    text: str
+    duration: float  # segundos de audio
+    language: str = ""
+    used_vad: bool = True
+    segments: list = field(default_factory=list)
+
+
+_models = {}
+_pipelines = {}
+_models_lock = threading.Lock()
+
+
+def _load(config):
+    from faster_whisper import WhisperModel
+
+    kwargs = dict(
+        device=config.device,
+        compute_type=config.compute_type,
+        cpu_threads=config.cpu_threads,
+        num_workers=config.num_workers,
+        download_root=config.cache_dir or None,
+    )
+    try:
+        # Sin red: evita la consulta a Hugging Face en cada arranque
+        return WhisperModel(config.model, local_files_only=True, **kwargs)
+    except Exception:
+        logger.info("Modelo '%s' no está en la caché local; descargando…", config.model)
+        return WhisperModel(config.model, **kwargs)
+
+
+def get_model(config):
+    """Modelo compartido por configuración; la primera llamada lo carga"""
+    model = _models.get(config.model_key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(config.model_key)
+            if model is None:
+                logger.info("Cargando faster-whisper %s…", config.label())
+                started = time.perf_counter()
+                model = _models[config.model_key] = _load(config)
+                logger.info("Modelo faster-whisper cargado en %.1fs.", time.perf_counter() - started)
+    return model
+
+
+def get_batched_pipeline(config):
+    """BatchedInferencePipeline sobre el modelo compartido de la configuración"""
+    pipeline = _pipelines.get(config.model_key)
+    if pipeline is None:
+        from faster_whisper import BatchedInferencePipeline
+
+        model = get_model(config)
+        with _models_lock:
+            pipeline = _pipelines.setdefault(config.model_key, BatchedInferencePipeline(model=model))
+    return pipeline
+
+
+def model_ready(config):
+    return config.model_key in _models
+
+
+def load_in_background(config, on_done=None):
+    """
+    Carga el modelo en un hilo aparte. on_done(ok) se llama al terminar, con
+    éxito o no; si falló, la próxima transcripción reintenta la carga.
+    """
+    def run():
+        ok = False
+        try:
+            get_model(config)
+            ok = True
+        except Exception as e:
+            logger.error(f"fw: no se pudo cargar el modelo: {e}")
+        finally:
+            if on_done is not None:
+                on_done(ok)
+
+    thread = threading.Thread(target=run, name="whisper-load", daemon=True)
+    thread.start()
+    return thread
+
+
+def decode_audio(data, sampling_rate=16000):
+    """
+    Decodifica un audio en memoria (ogg/opus de Telegram) a PCM float32 mono,
+    listo para transcribe(); evita escribirlo y releerlo del disco.
+    """
+    from faster_whisper import decode_audio as fw_decode_audio
+
+    return fw_decode_audio(io.BytesIO(data), sampling_rate=sampling_rate)
+
+
+def _run(model, audio, config, vad_filter):
+    kwargs = {}
+    if config.batch_size and vad_filter:
+        # El lote se arma con los segmentos de voz que detecta el VAD
+        model, kwargs = get_batched_pipeline(config), {"batch_size": config.batch_size}
+    segments, info = model.transcribe(
+        audio,
+        language=config.language,
+        beam_size=config.beam_size,
+        vad_filter=vad_filter,
+        condition_on_previous_text=False,
+        word_timestamps=config.word_timestamps,
+        **kwargs,
+    )
+    # Los segmentos son un generador: la decodificación ocurre al recorrerlos
+    segments = [_segment(seg) for seg in segments]
+    text = " ".join(seg.text for seg in segments if seg.text)
+    return text, segments, info
+
+
+def _round(seconds):
+    return round(float(seconds), 2)
+
+
+def _segment(seg):
+    words = tuple((_round(word.start), _round(word.end), word.word.strip()) for word in (getattr(seg, "words", None) or ()))
+    avg_logprob = getattr(seg, "avg_logprob", None)
+    return Segment(
+        _round(getattr(seg, "start", 0.0)), _round(getattr(seg, "end", 0.0)), seg.text.strip(),
+        round(avg_logprob, 3) if avg_logprob is not None else None, words,
+    )
+
+
+def transcribe(audio, config=None):
+    """
+    Transcripción síncrona de una ruta, un archivo abierto o PCM ya
+    decodificado (decode_audio). Con VAD activado, si no sale texto (o falla)
+    se reintenta sin VAD. Los errores se registran y devuelven texto vacío.
+    """
+    config = config or TranscriptionConfig.from_settings()
+    model = get_model(config)
+    duration, language = 0.0, ""
+
+    if config.vad_filter:
+        try:
+            text, segments, info = _run(model, audio, config, vad_filter=True)
+            duration, language = getattr(info, "duration", 0.0), getattr(info, "language", "")
+            logger.info(f"fw: language={language or 'n/a'} duration={duration or 'n/a'}")
+            if text:
+                return TranscriptionResult(text, duration, language, used_vad=True, segments=segments)
+            logger.warning("fw: texto vacío con VAD; reintento sin VAD…")
+        except Exception as e:
+            logger.error(f"fw: error con VAD: {e}")
+
+    try:
+        text, segments, info = _run(model, audio, config, vad_filter=False)
+        if config.vad_filter:
+            logger.info("fw: reintento sin VAD completado")
+        return TranscriptionResult(
+            text, getattr(info, "duration", duration), getattr(info, "language", language), used_vad=False,
+            segments=segments,
+        )
+    except Exception as e:
+        logger.error(f"fw: error sin VAD: {e}")
+        return TranscriptionResult("", duration, language, used_vad=False)
@@ -1,8 +1,13 @@
-from django.urls import path
+from django.urls import path, include
 from .views import (
     WorkLogCreateView, WorkLogListView, WorkLogEditView, 
-    WorkLogDeleteView, export_worklogs_excel, worklog_detail, serve_audio_file
+    WorkLogDeleteView, export_worklogs_excel, export_timesheet_excel, worklog_detail, serve_audio_file,
+    WorkLogViewSet,
 )
+from rest_framework.routers import DefaultRouter
+
+router = DefaultRouter()
+router.register(r"worklogs", WorkLogViewSet, basename="worklog-api")
 
 urlpatterns = [
     path('', WorkLogListView.as_view(), name='worklog-list'),
@@ -11,5 +16,7 @@ urlpatterns = [
     path('<int:pk>/editar/', WorkLogEditView.as_view(), name='worklog-edit'),
     path('<int:pk>/eliminar/', WorkLogDeleteView.as_view(), name='worklog-delete'),
     path('exportar/', export_worklogs_excel, name='worklog-export'),
+    path('exportar/planilla/', export_timesheet_excel, name='worklog-timesheet'),
     path('<int:worklog_id>/audio/', serve_audio_file, name='worklog-audio'),
+    path('api/', include(router.urls)),
 ]
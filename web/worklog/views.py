@@ -4,20 +4,55 @@ from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404, redirect, render
 from django.db.models import Q
 from django.contrib import messages
-from django.http import HttpResponse, JsonResponse, Http404
+from django.http import FileResponse, HttpResponse, JsonResponse, Http404
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
-from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 import os
 from .models import WorkLog, WorkLogHistory
 from .forms import WorkLogForm, WorkLogFilterForm, WorkLogEditForm
+from .serializers import WorkLogSerializer
+from .rollups import rollup_key, refresh_daily_rollups
+from .reports import build_timesheet, timesheet_workbook
+from .intervals import find_gaps, find_batch_overlaps, describe_batch_overlap
+from core.changefeed import feed_position, read_feed, record_changes
+from core.db import read_only_view
+from accounts.roles import get_roles
+from accounts.throttle import client_ip
 from datetime import timedelta, date
 from openpyxl import Workbook
+from rest_framework import viewsets, permissions, status as http_status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
 import json
 
 
+# Campos que se registran en WorkLogHistory al editar una tarea
+HISTORY_TRACKED_FIELDS = [
+    'start', 'end', 'task_type', 'other_task_type', 'general_ops_subtype',
+    'warranty', 'field_city', 'field_km_one_way', 'description', 'work_order', 'status'
+]
+
+# Límites de la API
+BULK_CREATE_MAX_ITEMS = 1000
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 2000
+
+
+def warn_about_gaps(request, worklog):
+    """Avisa (sin bloquear) si quedaron huecos largos en el día alrededor de la tarea"""
+    tz = timezone.get_current_timezone()
+    for gap_start, gap_end in find_gaps(worklog):
+        messages.warning(
+            request,
+            f"Hay un hueco sin tareas registradas de {gap_start.astimezone(tz):%H:%M} a {gap_end.astimezone(tz):%H:%M}."
+        )
+
+
 class IsStaffMixin(UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_staff or self.request.user.is_superuser
@@ -30,7 +65,7 @@ class CanEditWorkLogMixin(UserPassesTestMixin):
         user = self.request.user
         
         # Administradores y supervisores pueden editar cualquier tarea
-        if user.is_staff or user.user_type in ['admin', 'supervisor']:
+        if get_roles(user).is_manager:
             return True
         
         # El técnico que creó la tarea puede editarla
@@ -87,21 +122,14 @@ class WorkLogCreateView(LoginRequiredMixin, CreateView):
             worklog=form.instance,
             user=self.request.user,
             action='created',
-            ip_address=self.get_client_ip(),
+            ip_address=client_ip(self.request),
             user_agent=self.request.META.get('HTTP_USER_AGENT', '')
         )
 
         messages.success(self.request, 'Tarea creada exitosamente.')
+        warn_about_gaps(self.request, form.instance)
         return response
 
-    def get_client_ip(self):
-        x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = self.request.META.get('REMOTE_ADDR')
-        return ip
-
 
 class WorkLogEditView(LoginRequiredMixin, CanEditWorkLogMixin, UpdateView):
     model = WorkLog
@@ -127,16 +155,12 @@ class WorkLogEditView(LoginRequiredMixin, CanEditWorkLogMixin, UpdateView):
         self.record_changes(old_instance, form.instance)
         
         messages.success(self.request, 'Tarea actualizada exitosamente.')
+        warn_about_gaps(self.request, form.instance)
         return response
 
     def record_changes(self, old_instance, new_instance):
         """Registra los cambios en el historial"""
-        fields_to_track = [
-            'start', 'end', 'task_type', 'other_task_type', 'general_ops_subtype',
-            'warranty', 'field_city', 'field_km_one_way', 'description', 'work_order', 'status'
-        ]
-        
-        for field in fields_to_track:
+        for field in HISTORY_TRACKED_FIELDS:
             old_value = getattr(old_instance, field)
             new_value = getattr(new_instance, field)
             
@@ -148,18 +172,10 @@ class WorkLogEditView(LoginRequiredMixin, CanEditWorkLogMixin, UpdateView):
                     field_name=field,
                     old_value=str(old_value) if old_value is not None else '',
                     new_value=str(new_value) if new_value is not None else '',
-                    ip_address=self.get_client_ip(),
+                    ip_address=client_ip(self.request),
                     user_agent=self.request.META.get('HTTP_USER_AGENT', '')
                 )
 
-    def get_client_ip(self):
-        x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = self.request.META.get('REMOTE_ADDR')
-        return ip
-
 
 class WorkLogDeleteView(LoginRequiredMixin, IsStaffMixin, DeleteView):
     model = WorkLog
@@ -174,22 +190,15 @@ class WorkLogDeleteView(LoginRequiredMixin, IsStaffMixin, DeleteView):
             worklog=worklog,
             user=request.user,
             action='deleted',
-            ip_address=self.get_client_ip(),
+            ip_address=client_ip(self.request),
             user_agent=request.META.get('HTTP_USER_AGENT', '')
         )
         
         messages.success(request, 'Tarea eliminada exitosamente.')
         return super().delete(request, *args, **kwargs)
 
-    def get_client_ip(self):
-        x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = self.request.META.get('REMOTE_ADDR')
-        return ip
-
 
+@method_decorator(read_only_view, name='dispatch')
 class WorkLogListView(LoginRequiredMixin, ListView):
     model = WorkLog
     template_name = 'worklog/worklog_list.html'
@@ -197,7 +206,7 @@ class WorkLogListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = WorkLog.objects.all() if user.is_staff or user.user_type in ['admin', 'supervisor'] else WorkLog.objects.filter(technician=user)
+        queryset = WorkLog.objects.all() if get_roles(user).is_manager else WorkLog.objects.filter(technician=user)
 
         form = WorkLogFilterForm(self.request.GET or None)
 
@@ -241,17 +250,18 @@ class WorkLogListView(LoginRequiredMixin, ListView):
         return context
 
 
+@read_only_view
 def export_worklogs_excel(request):
     user = request.user
 
     if not user.is_authenticated:
         return HttpResponse(status=403)
 
-    if not (user.is_staff or user.user_type in ['admin', 'supervisor', 'tecnico']):
+    if not get_roles(user).can_use_worklog:
         return HttpResponse(status=403)
 
     # Base queryset
-    logs = WorkLog.objects.all() if user.is_staff or user.user_type in ['admin', 'supervisor'] else WorkLog.objects.filter(technician=user)
+    logs = WorkLog.objects.all() if get_roles(user).is_manager else WorkLog.objects.filter(technician=user)
 
     # Aplicar filtros si vienen en la URL
     form = WorkLogFilterForm(request.GET or None)
@@ -322,79 +332,309 @@ def export_worklogs_excel(request):
     return response
 
 
+@read_only_view
+def export_timesheet_excel(request):
+    """Planilla de horas por técnico (resumen, diario, semanal y superposiciones) para un rango de fechas"""
+    user = request.user
+
+    if not user.is_authenticated:
+        return HttpResponse(status=403)
+
+    if not get_roles(user).can_use_worklog:
+        return HttpResponse(status=403)
+
+    logs = WorkLog.objects.all() if get_roles(user).is_manager else WorkLog.objects.filter(technician=user)
+
+    # Rango: desde/hasta, mes o semana del filtro; por defecto el mes actual
+    today = date.today()
+    start_date, end_date = today.replace(day=1), today
+    technician = None
+    form = WorkLogFilterForm(request.GET or None)
+    if form.is_valid():
+        technician = form.cleaned_data.get('technician')
+        week = form.cleaned_data.get('week')
+        month = form.cleaned_data.get('month')
+        if form.cleaned_data.get('start_date') and form.cleaned_data.get('end_date'):
+            start_date, end_date = form.cleaned_data['start_date'], form.cleaned_data['end_date']
+        elif month:
+            start_date = month.replace(day=1)
+            end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        elif week:
+            start_date, end_date = week, week + timedelta(days=6)
+
+    timesheet = build_timesheet(start_date, end_date, queryset=logs, technician=technician)
+    wb = timesheet_workbook(timesheet)
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    filename = f"planilla_horas_{start_date}_{end_date}.xlsx"
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+
+    wb.save(response)
+    return response
+
+
 @login_required
+@read_only_view
 def worklog_detail(request, pk):
     """Vista para mostrar detalles de una tarea"""
     worklog = get_object_or_404(WorkLog, pk=pk)
     
     # Verificar permisos
     user = request.user
-    if not (user.is_staff or user.user_type in ['admin', 'supervisor'] or 
+    if not (get_roles(user).is_manager or 
             worklog.created_by == user or worklog.technician == user):
         messages.error(request, 'No tienes permisos para ver esta tarea.')
         return redirect('worklog-list')
     
     context = {
         'worklog': worklog,
-        'history': worklog.history.all()[:10]  # Últimos 10 cambios
+        'history': worklog.history.all()[:10],  # Últimos 10 cambios
+        # Transcripción con tiempos, para saltar en el audio
+        'segments': worklog.segments.all() if worklog.audio_file else [],
     }
     return render(request, 'worklog/worklog_detail.html', context)
 
 
 @login_required
+@read_only_view
 def serve_audio_file(request, worklog_id):
     """Vista protegida para servir archivos de audio de las tareas"""
+    import logging
+    logger = logging.getLogger(__name__)
+
+    # Obtener la tarea y verificar permisos
+    worklog = get_object_or_404(WorkLog, pk=worklog_id)
+    user = request.user
+
+    # Verificar si el usuario tiene permisos para acceder a este audio
+    if not (get_roles(user).is_manager or
+            worklog.created_by == user or worklog.technician == user or
+            worklog.collaborator == user):
+        raise Http404("No tienes permisos para acceder a este archivo.")
+
+    # Verificar que la tarea tenga un archivo de audio
+    if not worklog.audio_file:
+        raise Http404("Esta tarea no tiene archivo de audio.")
+
+    storage = worklog.audio_file.storage
+    name = worklog.audio_file.name
     try:
-        # Obtener la tarea y verificar permisos
-        worklog = get_object_or_404(WorkLog, pk=worklog_id)
-        user = request.user
-        
-        # Verificar si el usuario tiene permisos para acceder a este audio
-        if not (user.is_staff or user.user_type in ['admin', 'supervisor'] or 
-                worklog.created_by == user or worklog.technician == user or 
-                worklog.collaborator == user):
-            raise Http404("No tienes permisos para acceder a este archivo.")
-        
-        # Verificar que la tarea tenga un archivo de audio
-        if not worklog.audio_file:
-            raise Http404("Esta tarea no tiene archivo de audio.")
-        
-        # Construir la ruta completa del archivo
-        # El archivo ya está en MEDIA_ROOT, solo necesitamos la ruta relativa
-        file_path = os.path.join(settings.MEDIA_ROOT, str(worklog.audio_file))
-        
-        # Debug: Log de las rutas
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Usuario {user.username} solicitando audio para worklog {worklog_id}")
-        logger.info(f"Archivo en BD: {worklog.audio_file}")
-        logger.info(f"MEDIA_ROOT: {settings.MEDIA_ROOT}")
-        logger.info(f"Ruta completa: {file_path}")
-        logger.info(f"Archivo existe: {os.path.exists(file_path)}")
-        
-        # Si el archivo no existe en la ruta esperada, intentar con la ruta antigua
-        if not os.path.exists(file_path):
-            # Intentar con la ruta antigua (worklog_audios/ sin el prefijo media/)
-            old_path = os.path.join(settings.MEDIA_ROOT, str(worklog.audio_file).replace('media/', ''))
-            logger.info(f"Intentando ruta antigua: {old_path}")
-            if os.path.exists(old_path):
-                file_path = old_path
-                logger.info(f"Archivo encontrado en ruta antigua: {file_path}")
-            else:
-                logger.error(f"Archivo no encontrado en ninguna ruta: {file_path} o {old_path}")
+        if not storage.exists(name):
+            # Registros viejos guardaban la ruta con el prefijo media/
+            legacy = name.replace('media/', '', 1)
+            if legacy == name or not storage.exists(legacy):
+                logger.error(f"Archivo de audio no encontrado: {name} (tarea {worklog_id})")
                 raise Http404("Archivo de audio no encontrado.")
-        
-        # Servir el archivo
-        try:
-            with open(file_path, 'rb') as f:
-                response = HttpResponse(f.read(), content_type='audio/ogg')
-                response['Content-Disposition'] = f'inline; filename="{os.path.basename(file_path)}"'
-                logger.info(f"Archivo servido exitosamente: {file_path}")
-                return response
-        except Exception as e:
-            logger.error(f"Error leyendo archivo {file_path}: {e}")
-            raise Http404("Error al leer el archivo de audio.")
-            
+            name = legacy
+        audio = storage.open(name, 'rb')
+    except Http404:
+        raise
     except Exception as e:
-        logger.error(f"Error general en serve_audio_file: {e}")
-        raise Http404("Error al acceder al archivo de audio.")
+        logger.error(f"Error leyendo archivo {name}: {e}")
+        raise Http404("Error al leer el archivo de audio.")
+
+    # Se envía por bloques desde el storage (disco o S3), sin cargar el audio entero en memoria
+    return FileResponse(audio, content_type='audio/ogg', filename=os.path.basename(name))
+
+
+# ----------------------------
+# API REST
+# ----------------------------
+class CanEditWorkLogPermission(permissions.BasePermission):
+    """Mismas reglas que CanEditWorkLogMixin e IsStaffMixin, para la API"""
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        # Solo staff puede eliminar (como WorkLogDeleteView)
+        if request.method == 'DELETE':
+            return user.is_staff or user.is_superuser
+        # Administradores y supervisores pueden editar cualquier tarea
+        if get_roles(user).is_manager:
+            return True
+        # El técnico que creó la tarea o el asignado pueden editarla
+        return obj.created_by_id == user.id or obj.technician_id == user.id
+
+
+class WorkLogPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class WorkLogViewSet(viewsets.ModelViewSet):
+    serializer_class = WorkLogSerializer
+    permission_classes = [permissions.IsAuthenticated, CanEditWorkLogPermission]
+    pagination_class = WorkLogPagination
+
+    def get_queryset(self):
+        # Misma visibilidad que WorkLogListView
+        user = self.request.user
+        queryset = WorkLog.objects.all() if get_roles(user).is_manager else WorkLog.objects.filter(technician=user)
+        return queryset.select_related('technician').order_by('-end')
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        worklog = serializer.save(technician=user, created_by=user)
+        WorkLogHistory.objects.create(
+            worklog=worklog,
+            user=user,
+            action='created',
+            ip_address=client_ip(self.request),
+            user_agent=self.request.META.get('HTTP_USER_AGENT', '')
+        )
+
+    def perform_update(self, serializer):
+        old_instance = WorkLog.objects.get(pk=serializer.instance.pk)
+        worklog = serializer.save(updated_by=self.request.user)
+        WorkLogHistory.objects.bulk_create([
+            WorkLogHistory(
+                worklog=worklog,
+                user=self.request.user,
+                action='updated',
+                field_name=field,
+                old_value=str(getattr(old_instance, field)) if getattr(old_instance, field) is not None else '',
+                new_value=str(getattr(worklog, field)) if getattr(worklog, field) is not None else '',
+                ip_address=client_ip(self.request),
+                user_agent=self.request.META.get('HTTP_USER_AGENT', '')
+            )
+            for field in HISTORY_TRACKED_FIELDS
+            if getattr(old_instance, field) != getattr(worklog, field)
+        ])
+
+    def perform_destroy(self, instance):
+        WorkLogHistory.objects.create(
+            worklog=instance,
+            user=self.request.user,
+            action='deleted',
+            ip_address=client_ip(self.request),
+            user_agent=self.request.META.get('HTTP_USER_AGENT', '')
+        )
+        instance.delete()
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Crea muchas tareas en una sola transacción.
+        Recibe una lista de objetos con el mismo formato que el alta individual;
+        si alguno es inválido no se inserta ninguno y se devuelven los errores por posición.
+        """
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Se esperaba una lista de tareas.'}, status=http_status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > BULK_CREATE_MAX_ITEMS:
+            return Response(
+                {'detail': f'Máximo {BULK_CREATE_MAX_ITEMS} tareas por solicitud.'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        user = request.user
+        ip_address = client_ip(self.request)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+
+        with transaction.atomic():
+            # Superposiciones dentro del lote y con las tareas guardadas, en una sola consulta
+            overlaps = find_batch_overlaps(
+                user.pk, [(item['start'], item['end']) for item in serializer.validated_data]
+            )
+            if overlaps:
+                return Response(
+                    [
+                        {'non_field_errors': [describe_batch_overlap(overlaps[position])]}
+                        if position in overlaps else {}
+                        for position in range(len(serializer.validated_data))
+                    ],
+                    status=http_status.HTTP_400_BAD_REQUEST
+                )
+
+            worklogs = WorkLog.objects.bulk_create(
+                [WorkLog(technician=user, created_by=user, **item) for item in serializer.validated_data],
+                batch_size=500,
+            )
+            WorkLogHistory.objects.bulk_create(
+                [
+                    WorkLogHistory(
+                        worklog=worklog,
+                        user=user,
+                        action='created',
+                        ip_address=ip_address,
+                        user_agent=user_agent
+                    )
+                    for worklog in worklogs
+                ],
+                batch_size=500,
+            )
+            record_changes(
+                WorkLog, [worklog.pk for worklog in worklogs], 'created',
+                technician_ids={worklog.pk: user.pk for worklog in worklogs}
+            )
+            refresh_daily_rollups({rollup_key(worklog) for worklog in worklogs})
+            # bulk_create no llama a save(): replicar la actualización de estado de la OT,
+            # una vez por orden y con la última tarea recibida para cada una
+            last_by_order = {}
+            for worklog in worklogs:
+                if worklog.work_order_ref_id:
+                    last_by_order[worklog.work_order_ref_id] = worklog
+            for worklog in last_by_order.values():
+                worklog.update_work_order_status()
+
+        return Response(self.get_serializer(worklogs, many=True).data, status=http_status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='sync')
+    def sync(self, request):
+        """
+        Sincronización incremental para clientes offline, sobre el feed de cambios.
+        - Primera carga (sin cursor): las tareas visibles ordenadas por id (?after_id=<id>),
+          junto con la posición del feed tomada al empezar (?snapshot=<seq>).
+        - Después (?cursor=<seq>): las tareas cambiadas desde esa entrada del feed y, en
+          'deleted', los ids de las borradas. El feed retiene los cambios más nuevos que
+          CHANGE_FEED_SAFETY_LAG_SECONDS para no saltear filas que se confirman tarde.
+          Un técnico solo recibe los ids de tareas que eran suyas (borradas o reasignadas).
+        'next' trae los parámetros de la siguiente llamada.
+        """
+        params = request.query_params
+        try:
+            limit = max(1, min(int(params.get('limit', SYNC_DEFAULT_LIMIT)), SYNC_MAX_LIMIT))
+            cursor = int(params['cursor']) if params.get('cursor') else None
+            snapshot = int(params['snapshot']) if params.get('snapshot') else None
+            after_id = int(params.get('after_id', 0))
+        except ValueError:
+            return Response(
+                {'detail': 'Parámetros cursor/snapshot/after_id/limit inválidos.'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        if cursor is None:
+            # La posición del feed se toma antes de leer las filas: lo que cambie
+            # mientras tanto vuelve a llegar por el feed
+            if snapshot is None:
+                snapshot = feed_position()
+            rows = list(self.get_queryset().filter(id__gt=after_id).order_by('id')[:limit + 1])
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            deleted = []
+            next_params = {'after_id': rows[-1].id, 'snapshot': snapshot} if has_more else {'cursor': snapshot}
+        else:
+            is_manager = get_roles(request.user).is_manager
+            entries, next_cursor, has_more = read_feed(
+                after=cursor, limit=limit, models=[WorkLog._meta.label_lower],
+                technician_id=None if is_manager else request.user.pk
+            )
+            changed = {entry.object_id for entry in entries}
+            rows = list(self.get_queryset().filter(id__in=changed).order_by('id'))
+            # Lo que el usuario veía y ya no está a su alcance (borrado o pasado a otro técnico)
+            owned = changed if is_manager else {
+                entry.object_id for entry in entries if entry.technician_id == request.user.pk
+            }
+            deleted = sorted(owned - {row.id for row in rows})
+            next_params = {'cursor': next_cursor}
+
+        return Response({
+            'results': self.get_serializer(rows, many=True).data,
+            'deleted': deleted,
+            'next': next_params,
+            'has_more': has_more,
+        })